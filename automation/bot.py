@@ -65,54 +65,25 @@ def run(email_destino=None):
         print(f"🚀 Acessando URL (Mascarada): {full_url.replace(BOT_BYPASS_KEY if BOT_BYPASS_KEY else 'N/A', '***')}")
         
         try:
-            page.goto(full_url, timeout=60000)
-            
-            # Tenta esperar o carregamento, mas segue se der timeout (às vezes já carregou)
-            try:
-                page.wait_for_selector("text=Carregando", state="detached", timeout=15000)
-            except:
-                pass
-            
-            # Injeção de CSS para ocultar Malha Central
-            page.add_style_tag(content="""
-                div[data-gerencia="MALHA CENTRAL"], 
-                tr:contains("MALHA CENTRAL"),
-                .card-malha-central { display: none !important; }
-            """)
-            
-            time.sleep(5) # Espera técnica para garantir renderização dos gráficos
-
             for gerencia in GERENCIAS:
                 try:
-                    # Lógica de Filtro
-                    filter_group = page.locator("div.group", has_text="Gerência").first
-                    if filter_group.is_visible():
-                        filter_btn = filter_group.locator("div").last 
-                        filter_btn.click()
-                        
-                        page.wait_for_selector("input[placeholder='Buscar...']", state="visible", timeout=5000)
-
-                        btn_limpar = page.locator("button:has-text('Limpar')").last
-                        if btn_limpar.is_visible() and btn_limpar.is_enabled():
-                            btn_limpar.click()
-                            time.sleep(0.5)
-                        
-                        page.fill("input[placeholder='Buscar...']", gerencia)
-                        time.sleep(1) 
-
-                        page.locator(f"div:has-text('{gerencia}')").last.click()
-                        page.click("button:has-text('Aplicar')")
-                        
-                        # Espera loading do filtro sumir
-                        time.sleep(1)
-                        if page.is_visible("text=Carregando dados..."):
-                            try:
-                                page.wait_for_selector("text=Carregando dados...", state="detached", timeout=10000)
-                            except:
-                                pass
-                        time.sleep(2)
-                        
-                        page.keyboard.press("Escape")
+                    # Filtro pela URL: a API já devolve só as atividades da gerência
+                    page.goto(f"{full_url}&gerencia={quote(gerencia)}", timeout=60000)
+                    
+                    # Tenta esperar o carregamento, mas segue se der timeout (às vezes já carregou)
+                    try:
+                        page.wait_for_selector("text=Carregando", state="detached", timeout=15000)
+                    except:
+                        pass
+                    
+                    # Injeção de CSS para ocultar Malha Central
+                    page.add_style_tag(content="""
+                        div[data-gerencia="MALHA CENTRAL"], 
+                        tr:contains("MALHA CENTRAL"),
+                        .card-malha-central { display: none !important; }
+                    """)
+                    
+                    time.sleep(3) # Espera técnica para garantir renderização dos gráficos
                     
                     # Screenshot
                     if page.locator("#dashboard-content").is_visible():
@@ -128,8 +99,6 @@ def run(email_destino=None):
 
                 except Exception as e:
                     print(f"❌ Erro na gerência {gerencia}: {e}")
-                    page.reload()
-                    time.sleep(5)
 
         except Exception as e:
             print(f"🔥 Erro fatal ao carregar página: {e}")
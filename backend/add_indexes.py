@@ -1,6 +1,36 @@
 from sqlalchemy import text
 from backend.db.connection import get_db_engine
 
+TABLE_NAME = 'atividades'
+
+# (nome do índice, colunas) usados pelo Dashboard
+INDEXES = [
+    ("idx_atividades_data", "data"),
+    ("idx_dashboard_full", "data, status, inicio_prog_min"),
+    # Ordem/cursor da paginação (DASHBOARD_ORDER)
+    ("idx_dashboard_keyset", "data DESC, (COALESCE(inicio_prog_min, 1440)), id"),
+    # Filtros do /dashboard: igualdade na primeira coluna, período na segunda
+    ("idx_dashboard_gerencia", "gerencia_da_via, data"),
+    ("idx_dashboard_atividade", "atividade, data"),
+    ("idx_dashboard_trecho", "trecho_da_via, data"),
+    ("idx_dashboard_status", "status, data"),
+    ("idx_dashboard_tipo", "tipo_class, data"),
+]
+
+def index_commands(table_name=TABLE_NAME, suffix=""):
+    """
+    Comandos de criação dos índices. O sufixo permite criá-los numa tabela
+    de staging sem colidir com os nomes da tabela em uso.
+    """
+    return [
+        f"CREATE INDEX IF NOT EXISTS {name}{suffix} ON {table_name} ({columns});"
+        for name, columns in INDEXES
+    ]
+
+def rename_index_commands(suffix):
+    """Comandos que devolvem aos índices de staging os nomes definitivos."""
+    return [f"ALTER INDEX IF EXISTS {name}{suffix} RENAME TO {name};" for name, _ in INDEXES]
+
 def create_indexes():
     """Cria índices otimizados para o Dashboard."""
     engine = get_db_engine()
@@ -8,27 +38,22 @@ def create_indexes():
         print("❌ DB: Engine não conectada para indexação.")
         return
 
-    commands = [
-        "CREATE INDEX IF NOT EXISTS idx_atividades_data ON atividades (data);",
-        "CREATE INDEX IF NOT EXISTS idx_dashboard_full ON atividades (data, status, inicio_prog);"
-    ]
-
     print("⏳ DB: Verificando/Criando índices...")
-    
+
     try:
         with engine.connect() as conn:
             # Define timeout infinito para garantir criação
             conn.execute(text("SET statement_timeout = 0;"))
             conn.commit()
 
-            for cmd in commands:
+            for cmd in index_commands():
                 conn.execute(text(cmd))
                 conn.commit()
 
         print("✅ DB: Índices sincronizados.")
-        
+
     except Exception as e:
         print(f"❌ DB: Erro ao criar índices: {e}")
 
 if __name__ == "__main__":
-    create_indexes()
\ No newline at end of file
+    create_indexes()
@@ -1,16 +1,20 @@
 # backend/app.py
-from flask import Flask, jsonify
+import hmac
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from backend.config import Config
 from backend.routes.dashboard_routes import dashboard_bp
 from backend.routes.overview_routes import overview_bp
 from backend.db.connection import get_db_engine
+from backend.services.response_cache import get_all_stats
+from backend.services.version_watcher import WATCHER
 import sqlalchemy
 
 app = Flask(__name__)
 
 # Configuração CORS mais segura (Permite tudo por enquanto, mas centralizado)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+# X-Truncated/Link: o frontend precisa ler o aviso de resposta cortada (ver /dashboard)
+CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=["X-Truncated", "Link"])
 
 # Registro de Blueprints
 app.register_blueprint(dashboard_bp, url_prefix='/api')
@@ -42,6 +46,21 @@ def health_check():
         
     return jsonify(status), status_code
 
+def is_admin_request():
+    """X-Admin-Key igual a Config.ADMIN_KEY; sem chave configurada, só em DEBUG."""
+    if not Config.ADMIN_KEY:
+        return Config.DEBUG
+    key = request.headers.get('X-Admin-Key', '')
+    return hmac.compare_digest(key.encode(), Config.ADMIN_KEY.encode())
+
+@app.route('/cache-stats')
+def cache_stats():
+    """Acertos, falhas, descartes e ocupação dos caches de resposta deste processo."""
+    # Expõe chaves do cache (filtros consultados) e detalhes internos: não é público
+    if not is_admin_request():
+        return jsonify({"error": "Não encontrado"}), 404
+    return jsonify({**get_all_stats(), "version_watcher": WATCHER.stats()})
+
 if __name__ == '__main__':
     # Para rodar corretamente sem sys.path: python -m backend.app
     app.run(host='0.0.0.0', port=Config.PORT, debug=Config.DEBUG)
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Confere o comportamento dos backends do cache de respostas (versão,
+validade, limite de bytes e compartilhamento entre processos), o
+single-flight e o stale-while-revalidate do ResponseCache, e mede o custo
+de leitura/gravação de cada backend.
+
+O Redis usa --redis-url se informado; senão, o fakeredis (se instalado)
+como substituto local.
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.cache_backends --size-kb 500
+    python -m backend.benchmarks.cache_backends --redis-url redis://localhost:6379/15
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backend.services.cache_backends import MemoryBackend, FileBackend, RedisBackend
+from backend.services.response_cache import ResponseCache
+
+def check(label, condition):
+    print(f"   {'✅' if condition else '❌'} {label}")
+    return condition
+
+def _write_from_child(directory, body):
+    FileBackend('bench', 10 * len(body), directory=directory).set("('outro worker',)", 1, body)
+
+def verify(backend, body, other=None):
+    """Regras comuns a todos os backends; other é um segundo 'worker' (mesmo armazenamento)."""
+    ok = True
+    cache = ResponseCache('bench', 100 * len(body), backend=backend)
+    cache.put(('a',), 1, body)
+    ok &= check("leitura da entrada gravada", cache.get(('a',), 1) == body)
+    ok &= check("outra versão não acerta", cache.get(('a',), 2) is None)
+    ok &= check("versão da entrada preservada", backend.get("('a',)") == (1, body))
+
+    past = datetime.now() - timedelta(seconds=1)
+    future = datetime.now() + timedelta(hours=1)
+    backend.set("('vencida',)", 2, body, past)
+    backend.set("('valida',)", 2, body, future)
+    ok &= check("entrada vencida não é servida", backend.get("('vencida',)") is None)
+    ok &= check("entrada dentro da validade é servida", backend.get("('valida',)") == (2, body))
+
+    if other is not None:
+        other.set("('compartilhada',)", 3, body)
+        ok &= check("entrada gravada por outro worker é servida", backend.get("('compartilhada',)") == (3, body))
+    return ok
+
+def verify_coalescing(body, clients=20, delay_s=0.2):
+    """Pedidos simultâneos calculam uma vez; após nova versão, serve a anterior e renova uma vez."""
+    cache = ResponseCache('bench_flight', 100 * len(body), backend=MemoryBackend('bench_flight', 100 * len(body)),
+                          stale_while_revalidate=True)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(delay_s)
+        return body + str(len(calls)).encode(), True
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(('k',), 1, compute)[0]))
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ok = check(f"{clients} pedidos simultâneos, {len(calls)} cálculo(s)", len(calls) == 1 and len(set(results)) == 1)
+
+    first = results[0]
+    results.clear()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(('k',), 2, compute)[0]))
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    ok &= check(f"nova versão: {clients} pedidos servidos com a anterior em {elapsed * 1000:.0f} ms",
+                set(results) == {first} and elapsed < delay_s)
+
+    deadline = time.time() + 5
+    while cache.get(('k',), 2) is None and time.time() < deadline:
+        time.sleep(0.01)
+    ok &= check(f"uma renovação em segundo plano ({len(calls) - 1})", len(calls) == 2 and cache.get(('k',), 2) is not None)
+    return ok
+
+def verify_lru(make_backend, body):
+    backend = make_backend(3 * len(body) + 64)
+    for i in range(3):
+        backend.set(f"('k{i}',)", 1, body)
+        time.sleep(0.01)
+    backend.get("('k0',)")  # k0 vira a mais recente
+    time.sleep(0.01)
+    backend.set("('k3',)", 1, body)
+    ok = check("limite de bytes descarta a menos usada", backend.get("('k1',)") is None)
+    ok &= check("entrada usada recentemente continua", backend.get("('k0',)") == (1, body))
+    return ok
+
+def measure(backend, body, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        backend.set(f"('m{i % 20}',)", 9, body)
+    put_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        backend.get(f"('m{i % 20}',)")
+    get_ms = (time.perf_counter() - start) * 1000 / repeat
+    return put_ms, get_ms
+
+def measure_file_scaling(counts=(10, 1000, 5000), repeat=200):
+    """Custo de gravação do FileBackend com o diretório já cheio (não deve crescer com as entradas)."""
+    body = b'x' * 4096
+    for count in counts:
+        directory = tempfile.mkdtemp(prefix='cache_bench_scale_')
+        try:
+            backend = FileBackend('bench', 10 ** 12, directory=directory)
+            for i in range(count):
+                backend.set(f"('e{i}',)", 1, body)
+            start = time.perf_counter()
+            for i in range(repeat):
+                backend.set(f"('n{i}',)", 1, body)
+            print(f"   file com {count:>5} entradas: gravação {(time.perf_counter() - start) * 1000 / repeat:7.3f} ms")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+def run(size_kb, repeat, redis_url=None):
+    body = os.urandom(size_kb * 1024)
+    results = {}
+    ok = True
+
+    print("🧠 memory")
+    ok &= verify(MemoryBackend('bench', 100 * len(body)), body)
+    ok &= verify_lru(lambda limit: MemoryBackend('bench', limit), body)
+    results['memory'] = measure(MemoryBackend('bench', 100 * len(body)), body, repeat)
+
+    print("🗂️ file")
+    directory = tempfile.mkdtemp(prefix='cache_bench_')
+    try:
+        backend = FileBackend('bench', 100 * len(body), directory=directory)
+        ok &= verify(backend, body, FileBackend('bench', 100 * len(body), directory=directory))
+        child = multiprocessing.Process(target=_write_from_child, args=(directory, body))
+        child.start()
+        child.join()
+        ok &= check("entrada gravada por outro processo é servida",
+                    backend.get("('outro worker',)") == (1, body))
+        lru_dir = tempfile.mkdtemp(prefix='cache_bench_lru_')
+        ok &= verify_lru(lambda limit: FileBackend('bench', limit, directory=lru_dir), body)
+        shutil.rmtree(lru_dir, ignore_errors=True)
+        results['file'] = measure(FileBackend('bench', 100 * len(body), directory=directory), body, repeat)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    clients = None
+    if redis_url:
+        import redis
+        clients = (redis.Redis.from_url(redis_url), redis.Redis.from_url(redis_url))
+    else:
+        try:
+            import fakeredis
+            server = fakeredis.FakeServer()
+            clients = (fakeredis.FakeRedis(server=server), fakeredis.FakeRedis(server=server))
+        except ImportError:
+            print("ℹ️ redis: sem --redis-url e sem fakeredis, pulando.")
+
+    if clients:
+        print(f"🧱 redis ({redis_url or 'fakeredis'})")
+        backend = RedisBackend('bench', 100 * len(body), client=clients[0])
+        ok &= verify(backend, body, RedisBackend('bench', 100 * len(body), client=clients[1]))
+        results['redis'] = measure(backend, body, repeat)
+        for key in clients[0].scan_iter(match="statusdiario:bench:*"):
+            clients[0].delete(key)
+
+    print("🛬 single-flight / stale-while-revalidate")
+    ok &= verify_coalescing(body)
+
+    print(f"\n⏱️ Corpo de {size_kb} KB, média de {repeat} operações:")
+    for name, (put_ms, get_ms) in results.items():
+        print(f"   {name:<7} gravação {put_ms:7.3f} ms | leitura {get_ms:7.3f} ms")
+    measure_file_scaling()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificação e custo dos backends do cache de respostas.")
+    parser.add_argument("--size-kb", type=int, default=500, help="Tamanho do corpo (o /dashboard completo tem ~450 KB)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--redis-url", default=None, help="Servidor Redis de teste (padrão: fakeredis)")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.size_kb, args.repeat, args.redis_url) else 1)
@@ -0,0 +1,67 @@
+"""
+Compara o /dashboard em linhas (padrão) com o formato colunar
+(?format=columnar): tamanho sem compressão, gzip e brotli, e tempo de
+JSON.parse do corpo. Confere que o colunar, remontado como faz o
+decodeColumnar do frontend, é igual à resposta em linhas.
+
+Uso (na raiz do projeto, com DATABASE_URL configurada):
+    python -m backend.benchmarks.dashboard_format --data 2026-03-05
+    python -m backend.benchmarks.dashboard_format --repeat 50
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+
+from backend.app import app
+from backend.services.dashboard_service import get_dashboard_data, to_columnar
+from backend.services.response_encoding import encode_json, brotli
+
+def decode_columnar(payload):
+    """Mesma remontagem do decodeColumnar (frontend/src/services/dashboardService.js)."""
+    if not isinstance(payload, dict) or payload.get('format') != 'columnar':
+        return payload
+    columns = {name: column if isinstance(column, list) else [column['values'][c] for c in column['codes']]
+               for name, column in payload['columns'].items()}
+    rows = []
+    for i in range(payload['length']):
+        row = {name: values[i] for name, values in columns.items()}
+        for alias, source in payload['aliases'].items():
+            row[alias] = row[source]
+        rows.append(row)
+    return rows
+
+def parse_ms(body, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(body)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def run(requested_date, repeat):
+    filters = {"dateRange": {"start": requested_date, "end": requested_date}} if requested_date else {}
+    with app.app_context():
+        rows = get_dashboard_data(filters)
+    if not rows:
+        print("❌ Nenhuma atividade para o filtro informado.")
+        return False
+
+    bodies = {"linhas": encode_json(rows), "colunar": encode_json(to_columnar(rows))}
+    print(f"📦 {len(rows)} atividades")
+    print(f"   {'formato':<8} {'bytes':>9} {'gzip':>8} {'brotli':>8} {'parse':>9}")
+    for name, body in bodies.items():
+        br = len(brotli.compress(body, quality=5)) if brotli else None
+        print(f"   {name:<8} {len(body):>9} {len(gzip.compress(body, 6)):>8} {br or '-':>8} "
+              f"{parse_ms(body, repeat):7.2f} ms")
+
+    same = decode_columnar(json.loads(bodies["colunar"])) == json.loads(bodies["linhas"])
+    print(f"   {'✅' if same else '❌'} colunar remontado igual às linhas")
+    return same
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tamanho e parse do /dashboard em linhas x colunar.")
+    parser.add_argument("--data", default=None, help="Data do filtro (AAAA-MM-DD); padrão: sem filtro")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.data, args.repeat) else 1)
@@ -0,0 +1,116 @@
+"""
+Lê um período inteiro do dashboard de três formas, a lista completa em
+memória (como get_dashboard_data, sem o LIMIT), as páginas por cursor
+(get_dashboard_page) e o streaming (iter_dashboard_rows + NDJSON), e
+confere que as três trazem as mesmas atividades na mesma ordem. Mede
+tempo e pico de memória (tracemalloc) de cada uma.
+
+Confere também o /api/dashboard sem paginação: acima de DASHBOARD_LIMIT
+linhas a resposta tem de vir com X-Truncated e um Link rel="next" que,
+seguido, completa o período. Sai com código 1 se algo não bater.
+
+Para volumes maiores, carregue planilhas sintéticas num banco à parte com
+    python -m backend.benchmarks.etl_suite --sizes 100000 --database-url <url>
+e aponte DATABASE_URL para ele.
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.dashboard_pagination --start 2025-01-01 --end 2026-12-31
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import text
+
+from backend.app import app
+from backend.db.connection import get_db_engine
+from backend.routes.dashboard_routes import ndjson_chunks
+from backend.services.dashboard_service import (
+    build_dashboard_query, format_dashboard_row, get_dashboard_page, iter_dashboard_rows, DASHBOARD_ORDER,
+    DASHBOARD_LIMIT
+)
+from backend.services.response_encoding import encode_json
+
+def full_list(filters):
+    sql, params = build_dashboard_query(filters)
+    with get_db_engine().connect() as conn:
+        rows = conn.execute(text(sql + f" ORDER BY {DASHBOARD_ORDER}"), params).mappings().all()
+    items = [format_dashboard_row(dict(row)) for row in rows]
+    encode_json(items)
+    return [item['id'] for item in items]
+
+def paged(filters, limit):
+    ids, cursor = [], None
+    while True:
+        page = get_dashboard_page(filters, limit=limit, cursor=cursor)
+        encode_json(page)
+        ids += [item['id'] for item in page['items']]
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+def streamed(filters):
+    ids = []
+    for chunk in ndjson_chunks(iter_dashboard_rows(filters)):
+        ids += [json.loads(line)['id'] for line in chunk.splitlines()]
+    return ids
+
+def default_path(start_date, end_date):
+    """
+    ids do /api/dashboard sem limit/cursor, seguindo o Link rel="next" se a
+    resposta vier truncada, e se o aviso (X-Truncated) veio.
+    """
+    client = app.test_client()
+    response = client.get(f'/api/dashboard?start={start_date}&end={end_date}')
+    ids = [item['id'] for item in response.get_json()]
+    truncated = response.headers.get('X-Truncated') == 'true'
+    link = re.match(r'<([^>]+)>; rel="next"', response.headers.get('Link', ''))
+    url = link.group(1) if link else None
+    while url:
+        page = client.get(url).get_json()
+        ids += [item['id'] for item in page['items']]
+        url = re.sub(r'cursor=[^&]*', f"cursor={page['next_cursor']}", url) if page['next_cursor'] else None
+    return ids, truncated, bool(link)
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def run(start_date, end_date, limit):
+    filters = {"dateRange": {"start": start_date, "end": end_date}}
+    reference, elapsed, peak = measure(lambda: full_list(filters))
+    print(f"📦 {len(reference)} atividades entre {start_date} e {end_date}")
+    print(f"   {'lista completa':<22} {elapsed:6.2f}s  pico {peak / 1024 / 1024:7.1f} MB")
+
+    ok = True
+    for label, fn in [(f"páginas de {limit}", lambda: paged(filters, limit)), ("streaming NDJSON", lambda: streamed(filters))]:
+        ids, elapsed, peak = measure(fn)
+        same = ids == reference
+        ok &= same
+        print(f"   {label:<22} {elapsed:6.2f}s  pico {peak / 1024 / 1024:7.1f} MB  {'✅' if same else '❌'} mesma ordem")
+
+    ids, truncated, has_link = default_path(start_date, end_date)
+    expect_signal = len(reference) > DASHBOARD_LIMIT
+    signal_ok = truncated == expect_signal and has_link == expect_signal
+    same = ids == reference
+    ok &= same and signal_ok
+    print(f"   {'sem paginação':<22} {'✅' if signal_ok else '❌'} X-Truncated={truncated} (esperado {expect_signal})"
+          f"  {'✅' if same else '❌'} completo seguindo o Link")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lista completa x páginas por cursor x streaming do dashboard.")
+    parser.add_argument("--start", required=True, help="Início do período (AAAA-MM-DD)")
+    parser.add_argument("--end", required=True, help="Fim do período (AAAA-MM-DD)")
+    parser.add_argument("--limit", type=int, default=1000, help="Linhas por página")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.start, args.end, args.limit) else 1)
@@ -0,0 +1,169 @@
+"""
+Benchmark ponta a ponta do ETL (leitura, transformação e carga) sobre
+planilhas sintéticas de tamanhos crescentes. Por padrão a carga vai para um
+SQLite local (caminho to_sql); --database-url aponta para um PostgreSQL
+local para medir o caminho COPY + troca de tabela.
+
+Cada tamanho roda num processo novo, para o pico de memória de um não
+contaminar o do outro. Os relatórios de perfil de cada execução ficam no
+diretório de saída e podem ser comparados com:
+    python -m backend.etl.profiler diff antigo.json novo.json
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.etl_suite --sizes 10000,100000
+    python -m backend.benchmarks.etl_suite --sizes 1000000 --workers 3
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+from backend.config import Config
+from backend.benchmarks.synthetic import VARIANTS, generate_dataset
+
+DEFAULT_SIZES = "10000,100000"
+DEFAULT_OUT = os.path.join(tempfile.gettempdir(), "statusdiario_bench")
+
+# Etapas exibidas na tabela final (as demais ficam no JSON)
+SUMMARY_STAGES = ['load', 'map_columns', 'status', 'fim_prog', 'time_normalization', 'hashing', 'insert', 'rollup']
+
+def dataset_dir(out_dir, rows, variant, files, gerencias, seed):
+    return os.path.join(out_dir, f"planilhas_{rows}_{variant}_{files}f_{gerencias}g_s{seed}")
+
+def ensure_dataset(path, rows, args):
+    """Gera as planilhas do tamanho pedido, reaproveitando as de execuções anteriores."""
+    map_path = os.path.join(path, "mapeamento_abas.json")
+    if os.path.exists(map_path):
+        print(f"🗃️ Reaproveitando planilhas de {rows} linhas: {path}")
+        return map_path
+
+    print(f"🧪 Gerando {rows} linhas em {path}...")
+    start = time.perf_counter()
+    map_path = generate_dataset(path, rows, args.files, args.variant, args.gerencias, args.seed)
+    print(f"   Geração: {time.perf_counter() - start:.1f}s")
+    return map_path
+
+def _children_max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def run_one(data_dir, result_path, database_url, workers):
+    """Executa o ETL completo sobre um conjunto de planilhas (processo filho)."""
+    from backend.etl.run_migration import run
+
+    # Medição a frio e sem mexer no cache das planilhas reais (use_cache=False)
+    Config.ETL_PROFILE_ENABLED = True
+    Config.ETL_REPORT_DIR = data_dir
+
+    engine = create_engine(database_url)
+    meta = run(load_mode='full', workers=workers, raw_path=data_dir,
+               map_path=os.path.join(data_dir, "mapeamento_abas.json"), engine=engine, use_cache=False)
+    engine.dispose()
+
+    with open(meta["report_path"], encoding='utf-8') as f:
+        report = json.load(f)
+
+    rows = meta.get("rows", 0)
+    result = {
+        "rows": rows,
+        "wall_s": meta["wall_s"],
+        "rows_per_s": rows / meta["wall_s"] if meta["wall_s"] else None,
+        "max_rss_mb": report["max_rss_mb"],
+        "workers_max_rss_mb": round(_children_max_rss_mb(), 1),
+        "database": engine.dialect.name,
+        "report_path": meta["report_path"],
+        "summary": report["summary"],
+    }
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+def run_size(rows, args):
+    data_dir = dataset_dir(args.out, rows, args.variant, args.files, args.gerencias, args.seed)
+    ensure_dataset(data_dir, rows, args)
+
+    database_url = args.database_url
+    if not database_url:
+        db_path = os.path.join(data_dir, "benchmark.sqlite")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        database_url = f"sqlite:///{db_path}"
+
+    result_path = os.path.join(data_dir, "resultado.json")
+    cmd = [sys.executable, "-m", "backend.benchmarks.etl_suite", "--run-one", data_dir,
+           "--result", result_path, "--database-url", database_url]
+    if args.workers is not None:
+        cmd += ["--workers", str(args.workers)]
+
+    env = dict(os.environ, ETL_PROFILE_MEMORY="true" if args.profile_memory else "false")
+    print(f"\n🚀 ETL com {rows} linhas ({database_url.split(':')[0]})...")
+    completed = subprocess.run(cmd, env=env, capture_output=not args.verbose, text=True)
+    if completed.returncode != 0:
+        print(f"🔴 Falha no ETL com {rows} linhas.")
+        if not args.verbose:
+            print(completed.stdout[-3000:])
+            print(completed.stderr[-3000:])
+        return None
+
+    with open(result_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def print_results(results):
+    print("\n📊 Resultado do benchmark:")
+    header = f"{'linhas':>9} {'total':>9} {'linhas/s':>10} {'RSS':>8} {'RSS workers':>11}"
+    header += "".join(f" {stage:>{max(len(stage), 11)}}" for stage in SUMMARY_STAGES)
+    print(header)
+    for size, res in results.items():
+        if res is None:
+            print(f"{size:>9} {'falhou':>9}")
+            continue
+        line = (f"{res['rows']:>9} {res['wall_s']:8.2f}s {res['rows_per_s']:10,.0f} "
+                f"{res['max_rss_mb']:6.0f}MB {res['workers_max_rss_mb']:9.0f}MB")
+        for stage in SUMMARY_STAGES:
+            item = res["summary"].get(stage)
+            width = max(len(stage), 11)
+            line += f" {item['wall_s']:{width - 1}.2f}s" if item else f" {'-':>{width}}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta do ETL com planilhas sintéticas.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tamanhos (linhas) separados por vírgula")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Diretório das planilhas, bancos e relatórios")
+    parser.add_argument("--variant", choices=VARIANTS, default='misto', help="Layout do cabeçalho")
+    parser.add_argument("--files", type=int, default=3, help="Planilhas por tamanho")
+    parser.add_argument("--gerencias", type=int, default=4, help="Quantidade de gerências")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="Processos do pipeline (padrão: Config)")
+    parser.add_argument("--database-url", default=None,
+                        help="Banco de destino (padrão: SQLite no diretório de saída)")
+    parser.add_argument("--profile-memory", action="store_true", help="Pico de memória por etapa (tracemalloc)")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o log completo do ETL")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one, args.result, args.database_url, args.workers)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = {size: run_size(size, args) for size in sizes}
+    print_results(results)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"etl_suite_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec='seconds'),
+                   "variant": args.variant, "files": args.files, "gerencias": args.gerencias,
+                   "results": results}, f, indent=2)
+    print(f"\n🧭 Resultados: {path}")
+    return 0 if all(results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
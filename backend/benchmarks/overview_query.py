@@ -0,0 +1,183 @@
+"""
+Compara o overview agregado em Python linha a linha (como era antes) com o
+lido do resumo overview_rollup (build_overview): confere que as respostas
+são iguais e mede tempo e pico de memória de cada caminho.
+
+Para volumes maiores, carregue planilhas sintéticas num banco à parte com
+    python -m backend.benchmarks.etl_suite --sizes 100000 --database-url <url>
+e aponte --database-url para ele (o resumo é montado pela própria
+migração; num banco antigo, rode python -m backend.etl.rollup antes). A data de referência padrão é o último
+dia com atividades no banco.
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.overview_query --repeat 5
+"""
+import argparse
+import math
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from backend.config import Config
+from backend.services.overview_service import (
+    build_overview, get_view_window, init_gerencia_structure, bucket_label
+)
+
+VIEW_MODES = ['hoje', 'semana', 'mes']
+
+LEGACY_SQL = """
+    SELECT gerencia_id, gerencia_da_via, tipo_class, is_mecanizacao, data, status_key,
+           horas_prog, horas_real, inicio_real_min
+    FROM atividades
+    WHERE data >= :start AND data <= :end AND is_valid_gerencia
+"""
+
+def legacy_overview(conn, start_date, end_date, view_mode):
+    """Referência: todas as linhas do período agregadas em Python."""
+    rows = conn.execute(text(LEGACY_SQL), {
+        "start": start_date.strftime('%Y-%m-%d'), "end": end_date.strftime('%Y-%m-%d')
+    }).mappings().all()
+
+    agg = {}
+    for row in rows:
+        targets = [(row['gerencia_id'], row['gerencia_da_via'].upper())]
+        if row['is_mecanizacao']:
+            targets.append(('mecanizacao_extra', 'MECANIZAÇÃO'))
+        if view_mode == 'hoje':
+            minutes = row['inicio_real_min']
+            label = bucket_label(minutes // 60 if minutes is not None else None, view_mode)
+        else:
+            label = bucket_label(row['data'], view_mode)
+
+        for gid, title in targets:
+            if gid not in agg:
+                agg[gid] = init_gerencia_structure(gid, title)
+            group = agg[gid]["types"][row['tipo_class']]
+            status_key = row['status_key']
+            group["kpis"]["prog_h"] += row['horas_prog']
+            group["kpis"]["real_h"] += row['horas_real']
+            group["kpis"]["prog_int"] += 1
+            if status_key in ['concluido', 'parcial']:
+                group["kpis"]["real_int"] += 1
+            group["kpis"]["breakdown"][status_key] += 1
+
+            day_point = next((p for p in group["chartData"] if p["name"] == label), None)
+            if not day_point:
+                day_point = {"name": label, "prog": 0, "real": 0}
+                group["chartData"].append(day_point)
+            day_point["prog"] += row['horas_prog']
+            day_point["real"] += row['horas_real']
+
+            if status_key in ['concluido', 'parcial', 'cancelado']:
+                group["meta_calc"]["total_valid"] += 1
+                group["meta_calc"]["points"] += {'concluido': 1.0, 'parcial': 0.5}.get(status_key, 0.0)
+
+    # Sem arredondar: same() confere o arredondamento do payload contra a soma exata
+    final_data = []
+    for data in agg.values():
+        for tdata in data["types"].values():
+            total = tdata["meta_calc"]["total_valid"]
+            tdata["percentual"] = tdata["meta_calc"]["points"] / total * 100 if total else 0
+            tdata["chartData"].sort(key=lambda x: x["name"])
+            del tdata["meta_calc"]
+            del tdata["chart_index"]
+        final_data.append(data)
+    final_data.sort(key=lambda x: (x["id"] == 'mecanizacao_extra', x["title"]))
+    return final_data
+
+# Campos que o payload arredonda a uma casa decimal
+ROUNDED_FIELDS = {'prog_h', 'real_h', 'percentual'}
+
+def rounds_to(raw, shown):
+    """
+    shown é raw arredondado a 0,1. Horas são minutos / 60, então a soma exata
+    pode cair num empate (ex.: 14,55) e a ordem das somas decide o lado: só
+    nesse caso os dois vizinhos são aceitos.
+    """
+    scaled = raw * 10
+    if abs(scaled - math.floor(scaled) - 0.5) < 1e-6:
+        candidates = [math.floor(scaled) / 10, math.ceil(scaled) / 10]
+    else:
+        candidates = [round(raw, 1)]
+    return any(math.isclose(shown, c, abs_tol=1e-9) for c in candidates)
+
+def same(a, b, path="overview"):
+    """
+    Igualdade estrutural entre a referência (a, sem arredondar) e o overview
+    (b). Em ponto flutuante só tolera a ordem das somas.
+    """
+    if path.rsplit('.', 1)[-1] in ROUNDED_FIELDS and isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        if rounds_to(a, b):
+            return True
+    elif isinstance(a, float) or isinstance(b, float):
+        if math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6):
+            return True
+    elif isinstance(a, dict) and isinstance(b, dict):
+        if a.keys() == b.keys() and all(same(a[k], b[k], f"{path}.{k}") for k in a):
+            return True
+    elif isinstance(a, list) and isinstance(b, list):
+        if len(a) == len(b) and all(same(x, y, f"{path}[{i}]") for i, (x, y) in enumerate(zip(a, b))):
+            return True
+    elif a == b:
+        return True
+    print(f"   ❌ {path}: {str(a)[:80]} != {str(b)[:80]}")
+    return False
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak / (1024 * 1024)
+
+def run(database_url, reference_date=None, repeat=5):
+    engine = create_engine(database_url)
+    ok = True
+    with engine.connect() as conn:
+        if reference_date is None:
+            reference_date = conn.execute(text("SELECT MAX(data) FROM atividades")).scalar()
+            if reference_date is None:
+                print("❌ Nenhuma atividade no banco.")
+                return False
+        # No SQLite o MAX(data) volta como texto; no PostgreSQL, date/datetime
+        reference_date = pd.to_datetime(reference_date).date()
+        total = conn.execute(text("SELECT COUNT(*) FROM atividades")).scalar()
+        print(f"📅 Referência {reference_date} | {total} atividades no banco ({engine.dialect.name})")
+
+        for view_mode in VIEW_MODES:
+            start_date, end_date = get_view_window(view_mode, reference_date)
+            expected = legacy_overview(conn, start_date, end_date, view_mode)
+            actual = build_overview(conn, start_date, end_date, view_mode)
+            if not same(expected, actual, view_mode):
+                ok = False
+                continue
+
+            rows = conn.execute(text("SELECT COUNT(*) FROM atividades WHERE data >= :s AND data <= :e"),
+                                {"s": start_date.strftime('%Y-%m-%d'), "e": end_date.strftime('%Y-%m-%d')}).scalar()
+            t_old, m_old = measure(lambda: legacy_overview(conn, start_date, end_date, view_mode), repeat)
+            t_new, m_new = measure(lambda: build_overview(conn, start_date, end_date, view_mode), repeat)
+            print(f"⏱️ {view_mode:<6} {rows:>7} linhas | linha a linha {t_old * 1000:8.1f} ms ({m_old:6.1f} MB)"
+                  f" | resumo {t_new * 1000:8.1f} ms ({m_new:6.1f} MB) | {t_old / t_new:5.1f}x")
+
+    engine.dispose()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Equivalência e custo do overview agregado no banco.")
+    parser.add_argument("--database-url", default=None, help="Banco a consultar (padrão: Config.DATABASE_URL)")
+    parser.add_argument("--date", default=None, help="Data de referência AAAA-MM-DD (padrão: último dia com dados)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (usa o melhor tempo)")
+    args = parser.parse_args()
+
+    reference = datetime.strptime(args.date, '%Y-%m-%d').date() if args.date else None
+    sys.exit(0 if run(args.database_url or Config.DATABASE_URL, reference, args.repeat) else 1)
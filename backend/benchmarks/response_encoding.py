@@ -0,0 +1,71 @@
+"""
+Compara a serialização do /dashboard pelo jsonify do Flask com o
+encode_json (orjson, se instalado) e mede o custo de gerar as variantes
+gzip/brotli guardadas no cache e o de servir um acerto (escolha da
+variante). Confere que todas as variantes decodificam para o mesmo JSON do
+Flask.
+
+Uso (na raiz do projeto, com DATABASE_URL configurada):
+    python -m backend.benchmarks.response_encoding --data 2026-03-05
+    python -m backend.benchmarks.response_encoding --repeat 50
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+
+from werkzeug.datastructures import Accept
+
+from backend.app import app
+from backend.services.dashboard_service import get_dashboard_data
+from backend.services.response_encoding import encode_json, build_variants, pick_variant, orjson, brotli
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+def decode(encoding, body):
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return body
+
+def run(requested_date, repeat):
+    filters = {"dateRange": {"start": requested_date, "end": requested_date}} if requested_date else {}
+    with app.app_context():
+        data = get_dashboard_data(filters)
+        if not data:
+            print("❌ Nenhuma atividade para o filtro informado.")
+            return False
+        flask_body, flask_ms = timed(lambda: app.json.response(data).get_data(), repeat)
+
+    body, encode_ms = timed(lambda: encode_json(data), repeat)
+    packed, variants_ms = timed(lambda: build_variants(body), max(1, repeat // 5))
+
+    print(f"📦 {len(data)} atividades | encoder: {'orjson' if orjson else 'json'} | brotli: {'sim' if brotli else 'não'}")
+    print(f"   jsonify (Flask)   {flask_ms:8.2f} ms  {len(flask_body):>9} bytes")
+    print(f"   encode_json       {encode_ms:8.2f} ms  {len(body):>9} bytes")
+    print(f"   gzip + brotli     {variants_ms:8.2f} ms  (uma vez por versão)")
+
+    ok = True
+    expected = json.loads(flask_body)
+    for header in ['br, gzip', 'gzip, deflate', 'identity', '']:
+        accept = Accept([(value.strip(), 1) for value in header.split(',') if value.strip()])
+        (encoding, variant), hit_ms = timed(lambda: pick_variant(packed, accept), repeat * 10)
+        same = json.loads(decode(encoding, variant)) == expected
+        ok &= same
+        print(f"   {'✅' if same else '❌'} Accept-Encoding {header or '(vazio)':<14} -> {encoding:<8} "
+              f"{len(variant):>9} bytes, acerto em {hit_ms * 1000:6.1f} µs")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serialização e compressão das respostas em cache.")
+    parser.add_argument("--data", default=None, help="Data do filtro (AAAA-MM-DD); padrão: sem filtro")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.data, args.repeat) else 1)
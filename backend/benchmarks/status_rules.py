@@ -0,0 +1,111 @@
+"""
+Compara a classificação de status linha a linha (apply_status_rules) com a
+versão vetorizada (classify_status) usando as planilhas de raw_data.
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.status_rules --scale 50 --repeat 3
+"""
+import argparse
+import sys
+import time
+import pandas as pd
+
+from backend.etl.run_migration import load_raw_files
+from backend.etl.processor import map_columns, classify_status
+
+def apply_status_rules(row):
+    """Regra de status linha a linha (referência para classify_status)."""
+    raw = row.get('status')
+    if pd.isna(raw) or str(raw).strip() == '': return 'NAO_INICIADO'
+    try: st = int(float(raw))
+    except: return 'NAO_INICIADO'
+    
+    if st == 0: return 'CANCELADO'
+    if st == 1: return 'ANDAMENTO'
+    
+    if st == 2:
+        def parse_prod(val):
+            try:
+                if pd.isna(val) or str(val).strip() == '': return 0.0
+                return float(str(val).replace(',', '.'))
+            except:
+                return 0.0
+
+        p_prog = parse_prod(row.get('producao_prog'))
+        p_real = parse_prod(row.get('producao_real'))
+        
+        if p_prog == 0: 
+            return 'CONCLUIDO' if p_real > 0 else 'CANCELADO'
+        
+        percent = p_real / p_prog
+        if percent <= 0.49: return 'CANCELADO'
+        elif percent <= 0.90: return 'PARCIAL'
+        else: return 'CONCLUIDO'
+    
+    return 'NAO_INICIADO'
+
+# Células que o Excel pode trazer e que a coerção do pandas trataria diferente
+EDGE_STATUS = [2, 2.0, '2', ' 2 ', '2,0', 'nan', '1_000', '0_0', True, False, '２', '１',
+               None, float('nan'), '', 'abc', 2.7, -0.5, float('inf'), 'inf']
+EDGE_PRODUCAO = [None, float('nan'), '', 'nan', '1_000', '1,5', '0,49', True, False, '２',
+                 10, 4.9, 9, '-', 0, 'inf']
+
+def edge_case_frame():
+    """Todas as combinações de EDGE_STATUS x EDGE_PRODUCAO (prog) x EDGE_PRODUCAO (real)."""
+    rows = [{'status': st, 'producao_prog': prog, 'producao_real': real}
+            for st in EDGE_STATUS for prog in EDGE_PRODUCAO for real in EDGE_PRODUCAO]
+    return pd.DataFrame(rows, dtype=object)
+
+def check_equivalence(df, label):
+    expected = df.apply(apply_status_rules, axis=1)
+    actual = classify_status(df)
+    mismatches = df.loc[expected != actual, ['status', 'producao_prog', 'producao_real']]
+
+    print(f"\n🔎 Equivalência em {len(df)} {label}: {len(mismatches)} divergências")
+    if not mismatches.empty:
+        print(mismatches.assign(esperado=expected, obtido=actual).head(20))
+        return False
+    return True
+
+def best_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def run(scale=1, repeat=3):
+    raw_dfs = load_raw_files()
+    if not raw_dfs:
+        print("❌ Nenhuma planilha carregada.")
+        return False
+
+    df = map_columns(pd.concat(raw_dfs, ignore_index=True))
+    if 'status' not in df.columns:
+        print("❌ Coluna 'status' não encontrada.")
+        return False
+
+    # Equivalência sobre os dados reais, sem replicação, e sobre os casos de borda
+    if not check_equivalence(df, "linhas reais"):
+        return False
+    if not check_equivalence(edge_case_frame(), "combinações de borda"):
+        return False
+
+    big = pd.concat([df] * scale, ignore_index=True) if scale > 1 else df
+    t_row, _ = best_time(lambda: big.apply(apply_status_rules, axis=1), repeat)
+    t_vec, _ = best_time(lambda: classify_status(big), repeat)
+
+    print(f"⏱️ {len(big)} linhas (escala x{scale}, melhor de {repeat}):")
+    print(f"   linha a linha: {t_row * 1000:.1f} ms")
+    print(f"   vetorizado:    {t_vec * 1000:.1f} ms")
+    print(f"   speedup:       {t_row / t_vec:.1f}x")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da classificação de status.")
+    parser.add_argument("--scale", type=int, default=50, help="Replica os dados N vezes para a medição")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (usa o melhor tempo)")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.scale, args.repeat) else 1)
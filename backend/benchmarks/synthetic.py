@@ -0,0 +1,247 @@
+"""
+Gera planilhas sintéticas no mesmo layout das de raw_data: 4 linhas de
+preâmbulo, cabeçalho na linha 5, linhas "modelo" sem ativo logo abaixo e os
+dados a partir daí. Os valores seguem a distribuição das planilhas reais
+(tipos de célula inclusive: horários, durações, SB numérico ou texto).
+
+Variantes de cabeçalho:
+    padrao       - cabeçalho atual das planilhas (INICIA, DURAÇÃO, SB_4...)
+    alternativo  - nomes alternativos aceitos pelo find_column (Data
+                   Atividade, Início Previsto, Janela, Produção Real...)
+    misto        - alterna as duas variantes entre os arquivos
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.synthetic --rows 100000 --out /tmp/planilhas
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, time as dtime, timedelta
+from itertools import repeat
+
+import numpy as np
+from openpyxl import Workbook
+
+# Cabeçalho das planilhas reais (linha 5), na ordem original
+HEADER = [
+    'CHAVE', 'DATA', 'Semana', 'ATIVO', '*1', 'Atividade', 'Atividade - Inidicador',
+    'Local - Partida', 'Local - Encerramento', 'SUB', 'KM - Inicio', 'KM - Fim',
+    'Entre - Estações', 'SB', 'Inicia', 'Duração', 'Quantidade', 'Unidade',
+    'Gerência da Via', 'Coordenação da Via', 'Trecho', 'Responsavel pelo boletim',
+    'Detalhe Programação', 'Programar para D+1', 'Confirmação programação', 'Prioridade',
+    'Qtd. Maquinista', 'Tipo de Maquinista (Fixo / Escala)', 'Tipo de Acionamento',
+    'Apresentação no lastro', 'Ativo - 1', 'Ativo - 2', 'Vagões - Qtd.', '*2', 'Atividade_1',
+    'Atividade - PDM', 'Local - Partida_2', 'Local - Encerramento_3', 'Entre-Locais', 'SB_4',
+    'SUB_5', 'KM - ínicio', 'KM - Fim_6', 'HR Turma Pronta', 'Inicio', 'Fim', 'Inicio_7',
+    'Fim_8', 'Inicio_9', 'Fim_10', 'TOTAL', 'LIBERADO PELO CCO', 'Quantidade_11', 'Unidade_12',
+    'Gerência da Via_13', 'Coordenação da Via_14', 'Trecho_15', 'Responsavel pelo boletim_16',
+    '*3', 'Status', 'Prévia CCO 22h', 'Prévia - 1', 'Prévia - 2', '*4', 'Responsabilidade',
+    'Fechamento - Impacto', 'Detalhe - Fechamento', 'Justificativa', 'Analise Prévia',
+    'Intervalo', 'QTD', 'Concat'
+]
+
+# Nomes alternativos que o mapeamento de colunas também reconhece
+# (ATIVO fica igual: a leitura exige a coluna 'ativo' no cabeçalho)
+ALTERNATIVE_NAMES = {
+    'DATA': 'Data Atividade',
+    'SB': 'Local Prog',
+    'Inicia': 'Início Previsto',
+    'Duração': 'Janela',
+    'Quantidade': 'Produção Prog',
+    'Gerência da Via': 'Gerência',
+    'Programar para D+1': 'Classificação',
+    'SB_4': 'Local Real',
+    'SUB_5': 'Sub Trecho',
+    'Inicio': 'Início Real',
+    'Fim': 'Término',
+    'TOTAL': 'Tempo Gasto',
+    'Quantidade_11': 'Produção Real',
+    'Coordenação da Via_14': 'Trecho da Via',
+    'Status': 'Status Operacional',
+    'Prévia - 1': 'Comentário 1',
+    'Prévia - 2': 'Comentário 2',
+}
+
+VARIANTS = ['padrao', 'alternativo', 'misto']
+
+PREAMBLE = [
+    ['INICIO', None, None, None, 'PROGRAMA', None, None, None, ']', None, 'GESTÃO DE ACOMPANHAMENTO', None, 'FECHAMENTO'],
+    ['ITENS GUIA', None, 'RESPONSABILIDADE', None, 'RECURSO', None, 'ITENS GUIA', None, 'INTERVALO', 'PRODUÇÃO', 'RESPONSABILIDADE'],
+    ['O QUE?', None, 'ONDE?', None, 'INTERVALO', 'PODUÇÃO', 'QUEM VAI RESPONDER PELA EXECUÇÃO?', 'GESTÃO', 'EQUIPAGEM', 'ATIVOS'],
+    ['FORMULA', None, 'ESCREVE', None, 'FORMULA', 'SELECIONAR', 'SELECIONAR', 'FORMULA', 'ESCREVE', 'ESCREVE'],
+]
+
+# Linhas de modelo sem ativo que as planilhas reais têm logo após o cabeçalho
+TEMPLATE_ROWS = 2
+
+GERENCIAS = ['SP SUL', 'SP NORTE', 'FERRONORTE', 'MALHA CENTRAL']
+
+# Atividades mais frequentes nas planilhas reais, com o peso observado
+ATIVIDADES = {
+    'PDM - SOLDA': 119, 'MECANIZAÇÃO - SOCADORA': 88, 'MODERNIZAÇÃO - SOLDA': 57,
+    'PDM - SUBSTITUIÇÃO - DORMENTE': 57, 'DESLOCAMENTO': 44, 'DETECÇÃO - RONDA 7 DIAS': 33,
+    'MODERNIZAÇÃO - SOCADORA': 27, 'BLOCO': 27, 'TRILHEIRO - DESCARGA': 20,
+    'CAMINHÃO DE SOLDA': 18, 'PDM - DESCARGA - DORMENTE': 17, 'PDM - AMV - JACARÉ': 16,
+    'VARRIÇÃO': 15, 'DETECÇÃO - ULTRASSOM - SPERRY': 14, 'LIMPEZA LASTRO': 14,
+    'EXPANSÃO - SOLDA': 13, 'PDM - SUBSTITUIÇÃO - TRILHO': 12, 'MECANIZAÇÃO - CAPINA QUÍMICA': 12,
+    'MECANIZAÇÃO - ESMERILHADORA': 11, 'PDM - PEDRA - DESCARGA': 10,
+    'MODERNIZAÇÃO - OUTRA ATIVIDADE': 10, 'MODERNIZAÇÃO - REGULAGEM': 9, 'INSPEÇÃO RIV': 7,
+    'RECOLHIMENTO DE DORMENTE': 7, 'MODERNIZAÇÃO - PEDRA - DESCARGA': 7,
+    'MODERNIZAÇÃO - DORMENTE - DESCARGA': 6, 'DESCARGA DE MATERIAL': 6, 'MECANIZAÇÃO - DOL': 5,
+}
+
+TIPOS = {'Oportunidade': 553, 'Contrato': 134, 'Extra': 19, None: 5}
+STATUS = {0: 313, 2: 274, None: 116, 3: 5, 1: 3}
+COORDENACOES = ['ZKE-ZEV', 'ZEV-ZPT', 'ZBV-ZKE', 'TMI-ZEB', 'ZCZ-ZTI', 'TMI-TCS', 'TGR-TRO', 'ZPT-ZGP']
+UNIDADES = ['M', 'KM', 'UN', 'Nº DE SOLDA']
+PREVIAS = [
+    'TP em preparação', 'Condições climáticas (chuva)', 'Em intervalo das 10h00 até 20h00',
+    'Aguarda equipe informar pronto para alinhar intervalo', 'Cancelado / Condições climáticas (chuva)',
+    'Equipe em paradão de segurança não solicita intervalo', 'Tp pronta 08hrs, sem faixa fluxo de trens',
+]
+
+START_TIMES = [dtime(h, m) for h in range(7, 15) for m in (0, 30)]
+DURATIONS = [dtime(0, 1), dtime(1, 0), dtime(1, 30), dtime(2, 0), dtime(3, 0), dtime(4, 0)]
+DURATION_WEIGHTS = [65, 156, 219, 172, 39, 23]
+
+def _weighted(rng, options, n):
+    """Sorteia n valores de um dicionário {valor: peso} (ou lista de pares)."""
+    items = list(options.items()) if isinstance(options, dict) else list(options)
+    values = [v for v, _ in items]
+    weights = np.array([w for _, w in items], dtype=float)
+    idx = rng.choice(len(values), size=n, p=weights / weights.sum())
+    return [values[i] for i in idx]
+
+def _pick(rng, values, n):
+    idx = rng.integers(0, len(values), size=n)
+    return [values[i] for i in idx]
+
+def _maybe(rng, values, missing_rate):
+    mask = rng.random(len(values)) < missing_rate
+    return [None if m else v for v, m in zip(values, mask)]
+
+def gerencia_names(count):
+    """Gerências reais e, acima de 4, gerências fictícias numeradas."""
+    extra = [f"GERÊNCIA {i:02d}" for i in range(len(GERENCIAS) + 1, count + 1)]
+    return (GERENCIAS + extra)[:max(count, 1)]
+
+def header_for(variant):
+    if variant == 'alternativo':
+        return [ALTERNATIVE_NAMES.get(col, col) for col in HEADER]
+    return list(HEADER)
+
+def build_columns(rng, rows, gerencias, start_date, rows_per_day):
+    """Gera os valores de cada coluna do cabeçalho (None para as não usadas)."""
+    days = np.arange(rows) // max(rows_per_day, 1)
+    datas = [start_date + timedelta(days=int(d)) for d in days]
+
+    ativos_pool = [f"{letter}{num:02d}" for letter in "AEVRS" for num in range(10, 100)]
+    ativos = _pick(rng, ativos_pool, rows)
+    atividades = _weighted(rng, ATIVIDADES, rows)
+    sb_pool = [f"Z{chr(65 + i % 26)}{chr(65 + (i * 7) % 26)}{i}" for i in range(400)] + list(range(280000, 280100))
+    sb = _pick(rng, sb_pool, rows)
+    sb_real = [v if keep else None for v, keep in zip(sb, rng.random(rows) < 0.9)]
+    status = _weighted(rng, STATUS, rows)
+
+    inicio_real = _pick(rng, START_TIMES + [dtime(0, 0)] * 8, rows)
+    fim_real = [dtime(min(t.hour + 2, 23), t.minute) if t != dtime(0, 0) else t for t in inicio_real]
+    executed = [s is not None for s in status]
+    producao_prog = rng.integers(1, 1000, size=rows)
+    producao_real = (producao_prog * rng.choice([0.0, 0.3, 0.7, 1.0], size=rows)).astype(int)
+
+    values = {
+        'CHAVE': [f"{a}{i:05d}" for i, a in enumerate(ativos)],
+        'DATA': datas,
+        'Semana': [int(d.strftime('%W')) for d in datas],
+        'ATIVO': ativos,
+        '*1': list(range(1, rows + 1)),
+        'Atividade': atividades,
+        'Atividade - Inidicador': [a.split(' - ')[0] for a in atividades],
+        'SB': sb,
+        'Inicia': _pick(rng, START_TIMES, rows),
+        'Duração': _weighted(rng, list(zip(DURATIONS, DURATION_WEIGHTS)), rows),
+        'Quantidade': producao_prog.tolist(),
+        'Unidade': _pick(rng, UNIDADES, rows),
+        'Gerência da Via': _pick(rng, gerencias, rows),
+        'Coordenação da Via': _pick(rng, COORDENACOES, rows),
+        'Programar para D+1': _weighted(rng, TIPOS, rows),
+        'SB_4': sb_real,
+        'SUB_5': rng.integers(50, 100, size=rows).tolist(),
+        'Inicio': [t if e else None for t, e in zip(inicio_real, executed)],
+        'Fim': [t if e else None for t, e in zip(fim_real, executed)],
+        'TOTAL': _pick(rng, [timedelta(0), timedelta(hours=1), timedelta(minutes=90), timedelta(hours=2)], rows),
+        'Quantidade_11': [int(p) if e else None for p, e in zip(producao_real, executed)],
+        'Coordenação da Via_14': _pick(rng, COORDENACOES, rows),
+        'Status': status,
+        'Prévia - 1': _maybe(rng, _pick(rng, PREVIAS, rows), 0.15),
+        'Prévia - 2': _maybe(rng, _pick(rng, PREVIAS, rows), 0.6),
+    }
+    return [values.get(col, repeat(None, rows)) for col in HEADER]
+
+def write_workbook(path, sheet_name, rows, variant='padrao', gerencias=None, seed=42,
+                   start_date=datetime(2025, 1, 1), rows_per_day=250):
+    """Grava uma planilha sintética (openpyxl write-only, memória constante por linha)."""
+    rng = np.random.default_rng(seed)
+    columns = build_columns(rng, rows, gerencias or GERENCIAS, start_date, rows_per_day)
+
+    wb = Workbook(write_only=True)
+    # Aba extra antes da aba mapeada, como nas planilhas reais
+    wb.create_sheet("BASE_MAPA").append(["BASE"])
+    ws = wb.create_sheet(sheet_name)
+
+    for line in PREAMBLE:
+        ws.append(line)
+    ws.append(header_for(variant))
+    for i in range(TEMPLATE_ROWS):
+        ws.append([None] * 4 + [i + 1])
+    for row in zip(*columns):
+        ws.append(row)
+
+    wb.save(path)
+
+def generate_dataset(out_dir, rows, files=3, variant='padrao', gerencias=4, seed=42, rows_per_day=250):
+    """
+    Gera `files` planilhas somando `rows` linhas e o mapeamento arquivo -> aba
+    correspondente. Cada arquivo fica com um subconjunto das gerências,
+    como as planilhas regionais reais. Retorna o caminho do mapeamento.
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Variante inválida: {variant} (use {', '.join(VARIANTS)})")
+
+    os.makedirs(out_dir, exist_ok=True)
+    names = gerencia_names(gerencias)
+    per_file = np.array_split(np.arange(rows), files)
+    mapping = {}
+
+    for i, chunk in enumerate(per_file):
+        filename = f"SINTETICO_{i + 1:02d}.xlsx"
+        sheet_name = f"SINT_{i + 1:02d}"
+        file_variant = variant if variant != 'misto' else ('padrao', 'alternativo')[i % 2]
+        file_gerencias = names[i::files] or names
+
+        start = time.perf_counter()
+        write_workbook(os.path.join(out_dir, filename), sheet_name, len(chunk), file_variant,
+                       file_gerencias, seed + i, rows_per_day=max(rows_per_day // files, 1))
+        print(f"   📝 {filename}: {len(chunk)} linhas ({file_variant}) em {time.perf_counter() - start:.1f}s")
+        mapping[filename] = sheet_name
+
+    map_path = os.path.join(out_dir, "mapeamento_abas.json")
+    with open(map_path, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, ensure_ascii=False)
+    return map_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas no layout das planilhas reais.")
+    parser.add_argument("--rows", type=int, default=10000, help="Total de linhas (somando os arquivos)")
+    parser.add_argument("--out", required=True, help="Diretório de saída")
+    parser.add_argument("--files", type=int, default=3, help="Quantidade de planilhas")
+    parser.add_argument("--variant", choices=VARIANTS, default='padrao', help="Layout do cabeçalho")
+    parser.add_argument("--gerencias", type=int, default=4, help="Quantidade de gerências")
+    parser.add_argument("--rows-per-day", type=int, default=250, help="Atividades por dia (define o período)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"🧪 Gerando {args.rows} linhas em {args.out}...")
+    generate_dataset(args.out, args.rows, args.files, args.variant, args.gerencias, args.seed, args.rows_per_day)
+    print("✅ Planilhas geradas.")
@@ -0,0 +1,117 @@
+"""
+Compara a conversão antiga de horários (pd.to_datetime + strftime, com
+formatação por string nos serviços) com a representação em minutos do ETL,
+usando as planilhas de raw_data e alguns casos de borda.
+
+Uso (na raiz do projeto):
+    python -m backend.benchmarks.time_minutes --scale 50 --repeat 3
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, time as dtime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.etl.run_migration import load_raw_files
+from backend.etl.processor import map_columns, time_to_seconds, to_minutes, TIME_COLUMNS, MINUTES_PER_DAY
+from backend.services.formatting import format_minutes
+
+EDGE_CASES = [
+    dtime(9, 0), dtime(8, 59, 59, 999000), dtime(0, 0), dtime(23, 59, 59),
+    timedelta(hours=2), timedelta(days=1, hours=1), timedelta(minutes=90, seconds=30), timedelta(0),
+    '09:30:00', '9:30:00', ' 09:30:00', '09:30', '25:00:00', '7:5:3', '-', '',
+    1.5, 0.375, np.nan, None, datetime(2026, 1, 1, 9, 0), pd.Timestamp('2026-01-01 10:15:00'),
+]
+
+def legacy_times(df):
+    """Passos 5 e 7 do process_dataframe antes dos minutos (referência)."""
+    out = pd.DataFrame(index=df.index)
+    start_dt = pd.to_datetime(df['inicio_prog'].astype(str), format='%H:%M:%S', errors='coerce')
+    duration_dt = pd.to_datetime(df['tempo_prog'].astype(str), format='%H:%M:%S', errors='coerce')
+    if not start_dt.isna().all() and not duration_dt.isna().all():
+        start_delta = pd.to_timedelta(start_dt.dt.strftime('%H:%M:%S'))
+        duration_delta = pd.to_timedelta(duration_dt.dt.strftime('%H:%M:%S'))
+        out['fim_prog'] = (datetime(2000, 1, 1) + start_delta + duration_delta).dt.time
+    else:
+        out['fim_prog'] = None
+
+    for col in TIME_COLUMNS:
+        source = out[col] if col == 'fim_prog' else df[col]
+        temp = pd.to_datetime(source, format='%H:%M:%S', errors='coerce').dt.time
+        out[col] = temp.replace({np.nan: None})
+
+    # O que o dashboard_service mostrava
+    return out.apply(lambda s: s.map(lambda v: str(v)[:5] if v is not None else None))
+
+def minute_times(df):
+    """Versão atual: minutos no ETL e formatação HH:MM a partir deles."""
+    out = pd.DataFrame(index=df.index)
+    start_s = time_to_seconds(df['inicio_prog'], accept_datetime=False)
+    duration_s = time_to_seconds(df['tempo_prog'], accept_datetime=False)
+    fim = pd.Series(np.nan, index=df.index)
+    if start_s.notna().any() and duration_s.notna().any():
+        fim = (start_s + duration_s) % (MINUTES_PER_DAY * 60)
+    out['fim_prog'] = to_minutes(fim)
+    for col in TIME_COLUMNS:
+        if col != 'fim_prog':
+            out[col] = to_minutes(time_to_seconds(df[col]))
+
+    return out.apply(lambda s: s.map(format_minutes, na_action='ignore').astype(object)
+                     .where(s.notna(), None))
+
+def best_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def compare(df, label):
+    expected = legacy_times(df)
+    actual = minute_times(df)
+    mismatches = 0
+    for col in TIME_COLUMNS:
+        diff = expected[col].fillna('∅') != actual[col].fillna('∅')
+        if diff.any():
+            mismatches += int(diff.sum())
+            print(f"   ❌ {col}: {int(diff.sum())} divergências")
+            print(pd.DataFrame({'origem': df.loc[diff, col] if col in df else None,
+                                'antes': expected.loc[diff, col], 'depois': actual.loc[diff, col]}).head(10))
+    print(f"🔎 {label}: {len(df)} linhas, {mismatches} divergências")
+    return mismatches == 0
+
+def run(scale=1, repeat=3):
+    raw_dfs = load_raw_files()
+    if not raw_dfs:
+        print("❌ Nenhuma planilha carregada.")
+        return False
+    df = map_columns(pd.concat(raw_dfs, ignore_index=True))
+
+    edge = pd.DataFrame({col: pd.Series(EDGE_CASES, dtype=object) for col in TIME_COLUMNS if col != 'fim_prog'})
+    # Desloca as colunas para combinar início e duração diferentes
+    edge['tempo_prog'] = np.roll(edge['tempo_prog'].to_numpy(), 3)
+
+    ok = compare(df, "Planilhas reais") and compare(edge, "Casos de borda")
+    if not ok:
+        return False
+
+    big = pd.concat([df] * scale, ignore_index=True) if scale > 1 else df
+    t_old = best_time(lambda: legacy_times(big), repeat)
+    t_new = best_time(lambda: minute_times(big), repeat)
+
+    print(f"⏱️ {len(big)} linhas (escala x{scale}, melhor de {repeat}), ETL + formatação:")
+    print(f"   to_datetime/strftime: {t_old * 1000:.1f} ms")
+    print(f"   minutos:              {t_new * 1000:.1f} ms")
+    print(f"   speedup:              {t_old / t_new:.1f}x")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Equivalência e tempo da conversão de horários para minutos.")
+    parser.add_argument("--scale", type=int, default=50, help="Replica os dados N vezes para a medição")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (usa o melhor tempo)")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.scale, args.repeat) else 1)
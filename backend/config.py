@@ -1,5 +1,6 @@
 # backend/config.py
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,12 +9,65 @@ class Config:
     DATABASE_URL = os.getenv("DATABASE_URL")
     PORT = int(os.environ.get("PORT", 8000))
     DEBUG = os.environ.get("FLASK_ENV") != "production"
+    # Chave das rotas de diagnóstico (/cache-stats), enviada no header X-Admin-Key.
+    # Sem chave, essas rotas só respondem fora de produção (DEBUG)
+    ADMIN_KEY = os.getenv("ADMIN_KEY")
     
     # Configurações do SQLAlchemy Engine
     DB_POOL_SIZE = 10
     DB_POOL_RECYCLE = 1800
     DB_POOL_PRE_PING = True
 
+    # Cache de respostas da API, limitado em bytes
+    # memory: LRU por processo | file: arquivos compartilhados entre os workers | redis: CACHE_REDIS_URL
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+                                                    "statusdiario_cache"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    # Vida máxima das entradas no Redis (versões antigas somem por aqui)
+    CACHE_REDIS_TTL_S = int(os.getenv("CACHE_REDIS_TTL_S", 24 * 3600))
+    # Depois de uma migração, serve a resposta anterior enquanto um único cálculo gera a nova
+    CACHE_STALE_WHILE_REVALIDATE = os.getenv("CACHE_STALE_WHILE_REVALIDATE", "true").lower() != "false"
+    # Espera máxima de um pedido pelo cálculo da mesma resposta em andamento
+    CACHE_FLIGHT_TIMEOUT_S = int(os.getenv("CACHE_FLIGHT_TIMEOUT_S", 30))
+    DASHBOARD_CACHE_MAX_BYTES = int(os.getenv("DASHBOARD_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    OVERVIEW_CACHE_MAX_BYTES = int(os.getenv("OVERVIEW_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    # Paginação por cursor do /dashboard (?limit=&cursor=)
+    DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", 500))
+    DASHBOARD_PAGE_MAX_ROWS = int(os.getenv("DASHBOARD_PAGE_MAX_ROWS", 5000))
+    # Cache-Control das respostas com ETag: 0 = navegador/CDN revalidam sempre (304 sem consulta)
+    HTTP_CACHE_MAX_AGE_S = int(os.getenv("HTTP_CACHE_MAX_AGE_S", 0))
+    # Variantes comprimidas guardadas no cache (brotli só com o pacote instalado)
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+    RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 6))
+    RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", 5))
+
+    # Versão do banco em memória: LISTEN no canal avisado pelo run_migration (pg_notify)
+    # e consulta periódica ao migration_log quando o LISTEN não está disponível
+    VERSION_WATCHER_ENABLED = os.getenv("VERSION_WATCHER_ENABLED", "true").lower() != "false"
+    VERSION_NOTIFY_CHANNEL = os.getenv("VERSION_NOTIFY_CHANNEL", "migration_log")
+    VERSION_POLL_INTERVAL_S = float(os.getenv("VERSION_POLL_INTERVAL_S", 30))
+
+    # Configurações do ETL
+    # incremental: aplica só o diff (insert/update/delete) | full: recria a tabela
+    ETL_LOAD_MODE = os.getenv("ETL_LOAD_MODE", "incremental")
+    # Timeout da transação de carga (sintaxe do PostgreSQL, ex.: '60s', '5min', '0' = sem limite)
+    ETL_STATEMENT_TIMEOUT = os.getenv("ETL_STATEMENT_TIMEOUT", "5min")
+    # Espera máxima pelo lock exclusivo na troca da tabela (carga completa)
+    ETL_LOCK_TIMEOUT = os.getenv("ETL_LOCK_TIMEOUT", "5s")
+    # Processos para ler/transformar as planilhas (0 = um por planilha, limitado aos núcleos)
+    ETL_WORKERS = int(os.getenv("ETL_WORKERS", 0))
+    # Leitor em streaming (openpyxl read-only, só as colunas usadas); "false" volta ao pd.read_excel
+    ETL_STREAMING_READER = os.getenv("ETL_STREAMING_READER", "true").lower() != "false"
+    # Cache em disco das planilhas já processadas (chave: conteúdo + aba + versão do processador)
+    ETL_CACHE_ENABLED = os.getenv("ETL_CACHE_ENABLED", "true").lower() != "false"
+    ETL_CACHE_DIR = os.getenv("ETL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".etl_cache"))
+    # Relatório JSON de perfil por execução (tempo/CPU/memória por etapa); "false" desativa
+    ETL_PROFILE_ENABLED = os.getenv("ETL_PROFILE_ENABLED", "true").lower() != "false"
+    # Pico de memória por etapa via tracemalloc (mais preciso, porém deixa o ETL mais lento)
+    ETL_PROFILE_MEMORY = os.getenv("ETL_PROFILE_MEMORY", "false").lower() == "true"
+    ETL_REPORT_DIR = os.getenv("ETL_REPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".etl_reports"))
+
     @staticmethod
     def check_config():
         if not Config.DATABASE_URL:
@@ -0,0 +1,89 @@
+import warnings
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from backend.etl.processor import clean_column_names, resolve_source_columns
+from backend.etl.profiler import profile_stage
+
+# Silencia avisos do OpenPyXL
+warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
+
+HEADER_ROW = 4
+
+# Mesmos textos que o pd.read_excel trata como vazio por padrão
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+# Células com erro de fórmula (o read_excel também as converte para NaN)
+EXCEL_ERRORS = {'#DIV/0!', '#NAME?', '#NULL!', '#NUM!', '#REF!', '#VALUE!', '#GETTING_DATA'}
+
+def _convert_cell(value):
+    """Replica a conversão de célula do read_excel (engine openpyxl); vazio vira NaN."""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        if value in NA_STRINGS or value in EXCEL_ERRORS:
+            return np.nan
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def stream_sheet(file_path, sheet_name, header_row=HEADER_ROW):
+    """
+    Lê a aba em modo read-only, linha a linha, guardando só as colunas que o
+    processamento usa (resolvidas a partir do cabeçalho) e descartando linhas
+    vazias. Cada coluna é uma lista de valores e o DataFrame é montado uma
+    única vez no fim, sem lotes intermediários nem concat: o pico de memória
+    fica perto do tamanho do próprio resultado.
+
+    Retorna (total de linhas da aba, DataFrame com cabeçalho limpo) ou
+    (total, None) se a aba não tiver cabeçalho.
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+
+        total_rows = 0
+        raw_header = None
+        for row in rows:
+            total_rows += 1
+            if total_rows == header_row + 1:
+                raw_header = row
+                break
+
+        if raw_header is None:
+            return total_rows, None
+
+        with profile_stage("clean_headers", rows=len(raw_header)):
+            header = clean_column_names(['' if v is None else v for v in raw_header])
+            needed = resolve_source_columns(header)
+            selected = [(idx, name) for idx, name in enumerate(header) if name in needed]
+            names = [name for _, name in selected]
+
+        columns = {name: [] for name in names}
+
+        for row in rows:
+            total_rows += 1
+            values = [_convert_cell(row[idx]) if idx < len(row) else np.nan for idx, _ in selected]
+            if all(v is np.nan for v in values):
+                continue
+
+            for name, value in zip(names, values):
+                columns[name].append(value)
+
+        # Uma coluna por vez vira array (e a lista é liberada); com copy=False o
+        # DataFrame usa os arrays como estão, sem juntá-los num bloco novo
+        arrays = {}
+        for name in names:
+            values = columns.pop(name)
+            arrays[name] = np.fromiter(values, dtype=object, count=len(values))
+            del values
+
+        data = pd.DataFrame(arrays, columns=names, dtype=object, copy=False)
+        return total_rows, data
+    finally:
+        wb.close()
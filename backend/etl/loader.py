@@ -0,0 +1,326 @@
+import io
+import time
+import pandas as pd
+from sqlalchemy import text, inspect
+
+from backend.config import Config
+from backend.add_indexes import index_commands, rename_index_commands
+
+TABLE_NAME = 'atividades'
+NEW_SUFFIX = '_new'
+NEW_TABLE = f'{TABLE_NAME}{NEW_SUFFIX}'
+STAGE_TABLE = 'atividades_stage'
+CHANGES_TABLE = 'atividades_changes'
+
+# Quantas versões de histórico ficam no log de alterações
+CHANGE_LOG_RETENTION = 50
+
+# Tentativas de obter o lock da troca de tabelas antes de desistir
+SWAP_ATTEMPTS = 3
+SWAP_RETRY_DELAY_S = 2
+
+# Marcador de nulo no CSV enviado via COPY
+COPY_NULL = '\\N'
+
+# Colunas que mudam a cada execução e não indicam alteração real da linha
+VOLATILE_COLUMNS = ['updated_at']
+
+def get_table_columns(conn, table_name=TABLE_NAME):
+    """Retorna as colunas da tabela no banco ou None se ela não existir."""
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return None
+    return [col['name'] for col in inspector.get_columns(table_name)]
+
+def is_postgres(conn):
+    return conn.dialect.name == 'postgresql'
+
+def copy_rows(conn, df, table_name):
+    """
+    Envia o DataFrame com COPY FROM STDIN. O CSV é montado em memória pelo
+    writer do pandas, sem criar um INSERT (e seus parâmetros) por linha.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+def write_rows(conn, df, table_name):
+    """Grava as linhas numa tabela existente (COPY no PostgreSQL, to_sql nos demais)."""
+    start = time.perf_counter()
+    if is_postgres(conn):
+        copy_rows(conn, df, table_name)
+        method = "COPY"
+    else:
+        df.to_sql(table_name, conn, if_exists='append', index=False, chunksize=1000)
+        method = "to_sql"
+
+    elapsed = time.perf_counter() - start
+    rate = len(df) / elapsed if elapsed > 0 else float('inf')
+    print(f"   🚚 {len(df)} linhas em '{table_name}' via {method}: {elapsed:.2f}s ({rate:,.0f} linhas/s)")
+    return elapsed
+
+def create_table_like_dataframe(conn, df, table_name):
+    """Recria a tabela com os mesmos tipos que o to_sql inferiria do DataFrame."""
+    conn.execute(text(f"DROP TABLE IF EXISTS {table_name};"))
+    conn.execute(text(pd.io.sql.get_schema(df, table_name, con=conn)))
+
+def ensure_tracking_tables(conn):
+    """Garante migration_log (com versão) e o log de alterações por linha."""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS migration_log (
+            id INT PRIMARY KEY, 
+            last_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """))
+    # Bancos criados antes do controle de versão não têm a coluna
+    if 'version' not in get_table_columns(conn, 'migration_log'):
+        conn.execute(text("ALTER TABLE migration_log ADD COLUMN version BIGINT NOT NULL DEFAULT 0;"))
+
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            version BIGINT NOT NULL,
+            id BIGINT,
+            op CHAR(1) NOT NULL,
+            prev_data TIMESTAMP,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """))
+    # Data da linha antes da alteração: /changes?data= sabe o que saiu do dia pedido
+    if 'prev_data' not in get_table_columns(conn, CHANGES_TABLE):
+        conn.execute(text(f"ALTER TABLE {CHANGES_TABLE} ADD COLUMN prev_data TIMESTAMP;"))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{CHANGES_TABLE}_version ON {CHANGES_TABLE} (version);"))
+
+def get_next_version(conn):
+    # No PostgreSQL a linha fica travada até o commit (migrações concorrentes esperam)
+    lock = " FOR UPDATE" if is_postgres(conn) else ""
+    current = conn.execute(text(f"SELECT version FROM migration_log WHERE id = 1{lock}")).scalar()
+    return (current or 0) + 1
+
+def bump_migration_log(conn, version):
+    """Publica a nova versão e descarta o histórico mais antigo que a retenção."""
+    conn.execute(text("""
+        INSERT INTO migration_log (id, last_updated_at, version) VALUES (1, CURRENT_TIMESTAMP, :version)
+        ON CONFLICT (id) DO UPDATE SET last_updated_at = CURRENT_TIMESTAMP, version = EXCLUDED.version;
+    """), {"version": version})
+    conn.execute(text(f"DELETE FROM {CHANGES_TABLE} WHERE version <= :oldest"),
+                 {"oldest": version - CHANGE_LOG_RETENTION})
+    if is_postgres(conn):
+        # Avisa os servidores da API (VersionWatcher); o PostgreSQL só entrega no commit
+        conn.execute(text("SELECT pg_notify(:channel, :version)"),
+                     {"channel": Config.VERSION_NOTIFY_CHANNEL, "version": str(version)})
+
+def build_new_table(conn, df):
+    """
+    Monta a tabela de staging completa (dados, chave primária, índices e
+    estatísticas) sem tocar na tabela em uso pelos leitores.
+    """
+    create_table_like_dataframe(conn, df, NEW_TABLE)
+    write_rows(conn, df, NEW_TABLE)
+
+    # Sem renomear índices (ex.: SQLite), eles são criados depois da troca, na mesma transação
+    if not is_postgres(conn):
+        return
+
+    conn.execute(text(f"ALTER TABLE {NEW_TABLE} ADD PRIMARY KEY (id);"))
+
+    start = time.perf_counter()
+    for cmd in index_commands(NEW_TABLE, NEW_SUFFIX):
+        conn.execute(text(cmd))
+    conn.execute(text(f"ANALYZE {NEW_TABLE};"))
+    print(f"   🗂️ Índices e estatísticas de '{NEW_TABLE}': {time.perf_counter() - start:.2f}s")
+
+def swap_tables_generic(conn):
+    """Troca para bancos sem ALTER INDEX ... RENAME: índices recriados após renomear."""
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME};"))
+    conn.execute(text(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE_NAME};"))
+    conn.execute(text(f"CREATE UNIQUE INDEX {TABLE_NAME}_pkey ON {TABLE_NAME} (id);"))
+    for cmd in index_commands():
+        conn.execute(text(cmd))
+    conn.execute(text(f"ANALYZE {TABLE_NAME};"))
+
+def log_table_diff(conn, version, old_cols):
+    """
+    Registra no log de alterações a diferença entre a tabela atual e a nova,
+    comparando pelo content_hash. Sem id/content_hash na tabela antiga não há
+    como comparar: grava o marcador 'R' (clientes precisam recarregar tudo).
+    """
+    params = {"version": version}
+
+    if old_cols is None or not {'id', 'content_hash'} <= set(old_cols):
+        conn.execute(text(f"INSERT INTO {CHANGES_TABLE} (version, id, op) VALUES (:version, NULL, 'R')"),
+                     params)
+        total = conn.execute(text(f"SELECT COUNT(*) FROM {NEW_TABLE}")).scalar()
+        return {"inserted": total, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    prev_data = "o.data" if 'data' in old_cols else "NULL"
+    conn.execute(text(f"""
+        INSERT INTO {CHANGES_TABLE} (version, id, op, prev_data)
+        SELECT :version, COALESCE(n.id, o.id),
+               CASE WHEN o.id IS NULL THEN 'I' WHEN n.id IS NULL THEN 'D' ELSE 'U' END,
+               {prev_data}
+        FROM {NEW_TABLE} n
+        FULL OUTER JOIN {TABLE_NAME} o ON o.id = n.id
+        WHERE o.id IS NULL OR n.id IS NULL OR o.content_hash IS DISTINCT FROM n.content_hash;
+    """), params)
+
+    counts = dict(conn.execute(text(f"""
+        SELECT op, COUNT(*) FROM {CHANGES_TABLE} WHERE version = :version GROUP BY op
+    """), params).fetchall())
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {NEW_TABLE}")).scalar()
+
+    inserted, updated, deleted = counts.get('I', 0), counts.get('U', 0), counts.get('D', 0)
+    return {"inserted": inserted, "updated": updated, "deleted": deleted,
+            "unchanged": total - inserted - updated}
+
+def swap_tables(conn):
+    """
+    Troca a tabela em uso pela nova com renomeações (atômicas na transação).
+    O lock exclusivo só é pedido aqui, com lock_timeout para não enfileirar
+    os leitores atrás de uma consulta longa; se não sair, tenta de novo.
+    """
+    if not is_postgres(conn):
+        swap_tables_generic(conn)
+        return
+
+    conn.execute(text("SELECT set_config('lock_timeout', :timeout, true)"),
+                 {"timeout": Config.ETL_LOCK_TIMEOUT})
+
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            with conn.begin_nested():
+                conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME};"))
+                conn.execute(text(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE_NAME};"))
+                conn.execute(text(f"ALTER TABLE {TABLE_NAME} RENAME CONSTRAINT {NEW_TABLE}_pkey TO {TABLE_NAME}_pkey;"))
+                for cmd in rename_index_commands(NEW_SUFFIX):
+                    conn.execute(text(cmd))
+            return
+        except Exception as e:
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            print(f"   ⏳ Tabela em uso, nova tentativa de troca ({attempt}/{SWAP_ATTEMPTS}): {e}")
+            time.sleep(SWAP_RETRY_DELAY_S)
+
+def load_full(conn, df, version, before_swap=None):
+    """
+    Carga completa: monta a nova tabela ao lado da atual e a troca no fim da
+    transação. Os leitores continuam vendo a tabela antiga (com índices)
+    até o commit, e nunca uma tabela pela metade.
+
+    before_swap(conn, NEW_TABLE) roda com a tabela nova pronta e antes do
+    lock exclusivo da troca: trabalho derivado (ex.: o resumo do overview)
+    vai aí para não bloquear os leitores enquanto é feito.
+    """
+    old_cols = get_table_columns(conn)
+    build_new_table(conn, df)
+    stats = log_table_diff(conn, version, old_cols)
+    if before_swap:
+        before_swap(conn, NEW_TABLE)
+    swap_tables(conn)
+    return stats
+
+def load_incremental(conn, df, version):
+    """
+    Aplica apenas o diff entre o DataFrame e a tabela atual, dentro da
+    transação da conexão recebida. As linhas novas vão para uma tabela
+    temporária e o banco resolve INSERT/UPDATE/DELETE pela chave 'id',
+    registrando cada id alterado no log de alterações da versão. Devolve
+    também os dias afetados (affected_dates), antes e depois da alteração.
+    """
+    conn.execute(text(f"""
+        CREATE TEMP TABLE {STAGE_TABLE} (LIKE {TABLE_NAME} INCLUDING DEFAULTS)
+        ON COMMIT DROP;
+    """))
+    write_rows(conn, df, STAGE_TABLE)
+
+    all_cols = list(df.columns)
+    data_cols = [c for c in all_cols if c != 'id']
+    if 'content_hash' in all_cols:
+        compare_cols = ['content_hash']
+    else:
+        compare_cols = [c for c in data_cols if c not in VOLATILE_COLUMNS]
+
+    insert_cols = ", ".join(all_cols)
+    select_cols = ", ".join(f"s.{c}" for c in all_cols)
+    set_clause = ", ".join(f"{c} = s.{c}" for c in data_cols)
+    old_row = ", ".join(f"a.{c}" for c in compare_cols)
+    new_row = ", ".join(f"s.{c}" for c in compare_cols)
+
+    params = {"version": version}
+
+    # Dias tocados pelo diff (data antiga e nova), para o resumo do overview
+    affected_dates = [row[0] for row in conn.execute(text(f"""
+        SELECT s.data FROM {STAGE_TABLE} s LEFT JOIN {TABLE_NAME} a ON a.id = s.id
+        WHERE a.id IS NULL OR ROW({old_row}) IS DISTINCT FROM ROW({new_row})
+        UNION
+        SELECT a.data FROM {TABLE_NAME} a LEFT JOIN {STAGE_TABLE} s ON s.id = a.id
+        WHERE s.id IS NULL OR ROW({old_row}) IS DISTINCT FROM ROW({new_row})
+    """))]
+
+    deleted = conn.execute(text(f"""
+        WITH removed AS (
+            DELETE FROM {TABLE_NAME} a
+            WHERE NOT EXISTS (SELECT 1 FROM {STAGE_TABLE} s WHERE s.id = a.id)
+            RETURNING a.id
+        )
+        INSERT INTO {CHANGES_TABLE} (version, id, op) SELECT :version, id, 'D' FROM removed;
+    """), params).rowcount
+
+    updated = conn.execute(text(f"""
+        WITH changed AS (
+            UPDATE {TABLE_NAME} a SET {set_clause}
+            FROM {STAGE_TABLE} s
+            WHERE a.id = s.id AND ROW({old_row}) IS DISTINCT FROM ROW({new_row})
+            RETURNING a.id
+        )
+        INSERT INTO {CHANGES_TABLE} (version, id, op) SELECT :version, id, 'U' FROM changed;
+    """), params).rowcount
+
+    inserted = conn.execute(text(f"""
+        WITH added AS (
+            INSERT INTO {TABLE_NAME} ({insert_cols})
+            SELECT {select_cols} FROM {STAGE_TABLE} s
+            WHERE NOT EXISTS (SELECT 1 FROM {TABLE_NAME} a WHERE a.id = s.id)
+            RETURNING id
+        )
+        INSERT INTO {CHANGES_TABLE} (version, id, op) SELECT :version, id, 'I' FROM added;
+    """), params).rowcount
+
+    unchanged = len(df) - inserted - updated
+
+    return {"inserted": inserted, "updated": updated, "deleted": deleted, "unchanged": unchanged,
+            "affected_dates": affected_dates}
+
+def load_dataframe(conn, df, version, mode='incremental', before_swap=None):
+    """
+    Escolhe a estratégia de carga. O modo incremental só é usado quando a
+    tabela já existe com as mesmas colunas; qualquer falha nele volta para
+    a carga completa dentro da mesma transação. before_swap só é chamado
+    na carga completa (ver load_full).
+    """
+    stored_cols = get_table_columns(conn)
+
+    if mode == 'incremental':
+        if not is_postgres(conn):
+            print(f"   ℹ️ Carga incremental requer PostgreSQL ({conn.dialect.name}): usando carga completa.")
+        elif stored_cols is None:
+            print("   ℹ️ Tabela inexistente: usando carga completa.")
+        elif set(stored_cols) != set(df.columns):
+            print("   ℹ️ Estrutura da tabela mudou: usando carga completa.")
+        else:
+            try:
+                with conn.begin_nested():
+                    return "incremental", load_incremental(conn, df, version)
+            except Exception as e:
+                print(f"   ⚠️ Carga incremental falhou ({e}). Usando carga completa.")
+
+    return "full", load_full(conn, df, version, before_swap)
@@ -0,0 +1,208 @@
+import os
+import glob
+import json
+import time
+import warnings
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.config import Config
+from backend.etl.processor import process_dataframe, clean_column_names
+from backend.etl.excel_reader import stream_sheet
+from backend.etl.workbook_cache import WorkbookCache, file_fingerprint
+from backend.etl.profiler import StageProfiler, profile_stage
+
+# Silencia avisos do OpenPyXL (também nos processos filhos)
+warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
+
+etl_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(etl_dir)
+
+RAW_PATH = os.path.join(backend_dir, "raw_data")
+MAP_PATH = os.path.join(etl_dir, "mapeamento_abas.json")
+
+def load_sheet_mapping(map_path=MAP_PATH):
+    """Lê o mapeamento arquivo -> aba, criando o padrão se não existir."""
+    if not os.path.exists(map_path):
+        print("⚠️ Criando mapeamento padrão...")
+        default_map = {"FN_MC.xlsx": "FN_MC", "SP_NORTE.xlsx": "SP_NORTE", "SP_SUL.xlsx": "SP_SUL"}
+        with open(map_path, 'w') as f:
+            json.dump(default_map, f)
+
+    try:
+        with open(map_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"🔴 Erro ao ler mapeamento: {e}")
+        return None
+
+def get_workbook_tasks(raw_path=RAW_PATH, map_path=MAP_PATH):
+    """Lista (caminho, aba) das planilhas mapeadas, em ordem estável de nome."""
+    aba_map = load_sheet_mapping(map_path)
+    if aba_map is None:
+        return []
+
+    all_files = sorted(glob.glob(os.path.join(raw_path, "*.xlsx")))
+    print(f"📂 Verificando {len(all_files)} arquivos em: {raw_path}")
+
+    tasks = []
+    for file_path in all_files:
+        filename = os.path.basename(file_path)
+        sheet_name = aba_map.get(filename)
+
+        if not sheet_name:
+            print(f"⚠️ {filename}: Sem mapeamento de aba.")
+            continue
+        tasks.append((file_path, sheet_name))
+
+    return tasks
+
+def read_workbook(file_path, sheet_name):
+    """Lê a aba e aplica o cabeçalho limpo (linha 5). Retorna None se inválida."""
+    filename = os.path.basename(file_path)
+
+    if Config.ETL_STREAMING_READER:
+        total_rows, data = stream_sheet(file_path, sheet_name)
+    else:
+        total_rows, data = read_sheet_pandas(file_path, sheet_name)
+    print(f"🔍 {filename}: Total de linhas lidas: {total_rows}")
+
+    if total_rows < 6 or data is None:
+        print(f"⚠️ {filename}: Linhas insuficientes (< 6).")
+        return None
+
+    print(f"   📊 Colunas detectadas: {list(data.columns[:5])}...")
+
+    if 'ativo' not in data.columns:
+        print(f"   ⚠️ {filename}: Coluna 'ativo' não encontrada no header (Linha 5).")
+        return None
+
+    print(f"   ✅ {filename}: {len(data)} linhas capturadas.")
+    return data
+
+def read_sheet_pandas(file_path, sheet_name):
+    """Leitura completa com pd.read_excel (todas as colunas, todas as linhas)."""
+    temp = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+    if len(temp) < 6:
+        return len(temp), None
+
+    data = temp.iloc[5:].copy()
+    with profile_stage("clean_headers", rows=temp.shape[1]):
+        data.columns = clean_column_names(temp.iloc[4])
+    return len(temp), data
+
+def get_workbook_cache(enabled=None):
+    if enabled is None:
+        enabled = Config.ETL_CACHE_ENABLED
+    return WorkbookCache(Config.ETL_CACHE_DIR, enabled)
+
+def process_workbook(task):
+    """
+    Unidade de trabalho de cada processo: lê, limpa o cabeçalho e transforma
+    uma planilha, ou reaproveita o resultado do cache se o arquivo não mudou.
+    A identidade das linhas é atribuída depois da junção. As etapas medidas
+    no processo voltam em result["stages"].
+
+    As opções vêm na própria tarefa (ver run_pipeline): com spawn/forkserver
+    o worker reimporta o Config do ambiente e não veria o que a linha de
+    comando mudou no processo pai.
+    """
+    file_path, sheet_name, use_cache, profile_memory = task
+    filename = os.path.basename(file_path)
+    result = {"file": filename, "df": None, "error": None,
+              "raw_rows": 0, "read_s": 0.0, "process_s": 0.0,
+              "cache": "off", "cache_key": None, "saved_s": 0.0, "stages": []}
+
+    with StageProfiler(label=filename, track_memory=profile_memory) as profiler:
+        _process_workbook(file_path, sheet_name, use_cache, result)
+    result["stages"] = profiler.records
+    return result
+
+def _process_workbook(file_path, sheet_name, use_cache, result):
+    filename = result["file"]
+    try:
+        cache = get_workbook_cache(use_cache)
+        if cache.enabled:
+            start = time.perf_counter()
+            result["cache_key"] = file_fingerprint(file_path, sheet_name)
+            with profile_stage("cache_lookup") as stage:
+                cached = cache.get(filename, result["cache_key"])
+                stage["rows"] = len(cached[0]) if cached is not None else 0
+
+            if cached is not None:
+                df, meta = cached
+                df['updated_at'] = datetime.now()
+                load_s = time.perf_counter() - start
+                result.update(df=df, cache="hit", raw_rows=meta["raw_rows"],
+                              read_s=load_s, saved_s=meta["build_s"] - load_s)
+                print(f"🗃️ {filename}: sem alterações, usando cache ({len(df)} registros).")
+                return
+            result["cache"] = "miss"
+
+        start = time.perf_counter()
+        with profile_stage("load") as stage:
+            raw = read_workbook(file_path, sheet_name)
+            stage["rows"] = len(raw) if raw is not None else 0
+        result["read_s"] = time.perf_counter() - start
+
+        if raw is None:
+            return
+        result["raw_rows"] = len(raw)
+
+        start = time.perf_counter()
+        result["df"] = process_dataframe(raw, assign_identity=False)
+        result["process_s"] = time.perf_counter() - start
+
+        if result["cache"] == "miss":
+            cache.put(filename, result["cache_key"], result["df"], {
+                "source": filename,
+                "sheet": sheet_name,
+                "raw_rows": result["raw_rows"],
+                "build_s": result["read_s"] + result["process_s"]
+            })
+    except Exception as e:
+        result["error"] = str(e)
+
+def resolve_workers(requested, task_count):
+    """0/None usa um processo por planilha, limitado pelos núcleos disponíveis."""
+    if not requested or requested < 1:
+        requested = os.cpu_count() or 1
+    return max(1, min(requested, task_count))
+
+def run_pipeline(tasks, workers=None, use_cache=None, profile_memory=None):
+    """
+    Processa as planilhas em paralelo e devolve os resultados na ordem das
+    tarefas. use_cache/profile_memory=None seguem Config.ETL_CACHE_ENABLED
+    e Config.ETL_PROFILE_MEMORY.
+    """
+    if not tasks:
+        return []
+    if use_cache is None:
+        use_cache = Config.ETL_CACHE_ENABLED
+    if profile_memory is None:
+        profile_memory = Config.ETL_PROFILE_MEMORY
+
+    workers = resolve_workers(workers, len(tasks))
+    print(f"⚙️ Processando {len(tasks)} planilhas com {workers} processo(s)...")
+
+    jobs = [(file_path, sheet_name, use_cache, profile_memory) for file_path, sheet_name in tasks]
+    if workers == 1:
+        return [process_workbook(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(process_workbook, jobs))
+
+def report_timings(results, wall_s):
+    print("\n⏱️ Tempos por planilha:")
+    for res in results:
+        if res["error"]:
+            print(f"   🔴 {res['file']}: {res['error']}")
+            continue
+        rows = len(res["df"]) if res["df"] is not None else 0
+        origin = " (cache)" if res["cache"] == "hit" else ""
+        print(f"   {res['file']}{origin}: leitura {res['read_s']:.2f}s | ETL {res['process_s']:.2f}s | "
+              f"{res['raw_rows']} linhas brutas -> {rows} registros")
+
+    serial_s = sum(r["read_s"] + r["process_s"] for r in results)
+    print(f"   Total: {wall_s:.2f}s de relógio ({serial_s:.2f}s somando as planilhas)")
@@ -2,7 +2,9 @@ import pandas as pd
 import numpy as np
 import hashlib
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+
+from backend.etl.profiler import profile_stage
 
 def clean_column_names(header_row):
     """Retorna nomes limpos e únicos para o cabeçalho."""
@@ -37,10 +39,14 @@ def clean_column_names(header_row):
 
 def find_column(df, candidates):
     """Procura a primeira ocorrência de uma coluna candidata no DataFrame."""
+    return find_in_columns(list(df.columns), candidates)
+
+def find_in_columns(columns, candidates):
+    """Mesma busca do find_column, sobre uma lista de nomes."""
     for col in candidates:
-        if col in df.columns:
+        if col in columns:
             return col
-    for col in df.columns:
+    for col in columns:
         for cand in candidates:
             if cand in col and len(col) < len(cand) + 4: 
                 return col
@@ -57,113 +63,333 @@ def parse_time_to_hours(val):
     except:
         return 0.0
 
-def process_dataframe(df):
+# Versão das regras de transformação. Incrementar a cada mudança no
+# processamento para invalidar o cache de planilhas já processadas.
+PROCESSOR_VERSION = "4"
+
+# Colunas que identificam uma atividade na planilha (não mudam com o apontamento)
+KEY_COLUMNS = ['data', 'ativo', 'atividade', 'inicio_prog_min', 'local_prog']
+
+# Horários e durações da planilha. No banco viram inteiros com os minutos
+# desde 00:00 (ou a duração em minutos) na coluna '<nome>_min'.
+TIME_COLUMNS = ['inicio_prog', 'inicio_real', 'fim_prog', 'fim_real', 'tempo_prog', 'tempo_real']
+MINUTES_PER_DAY = 24 * 60
+
+# Colunas que não fazem parte do conteúdo comparável da linha
+NON_CONTENT_COLUMNS = ['id', 'row_hash', 'content_hash', 'updated_at']
+
+def _md5_series(values):
+    return [hashlib.md5(v.encode()).hexdigest() for v in values]
+
+def _as_key_text(series):
+    # Nulos (None/NaN/NaT) viram '' para o hash não depender do tipo do nulo
+    return series.map(str).where(series.notna(), '')
+
+def _join_columns(df, columns):
+    joined = _as_key_text(df[columns[0]])
+    for col in columns[1:]:
+        joined = joined + "|" + _as_key_text(df[col])
+    return joined
+
+def assign_row_identity(df, columns):
+    """
+    Gera a identidade estável de cada linha:
+    - row_hash: chave natural (KEY_COLUMNS + ordem entre duplicadas), não
+      depende da posição da linha na planilha;
+    - id: inteiro derivado do row_hash (52 bits, seguro para o JS);
+    - content_hash: hash do conteúdo, muda quando qualquer campo muda.
+    """
+    with profile_stage("hashing", rows=len(df)):
+        key_source = _join_columns(df, KEY_COLUMNS)
+        ordinal = key_source.groupby(key_source).cumcount().astype(str)
+        df['row_hash'] = _md5_series(key_source + "#" + ordinal)
+        df['id'] = [int(h[:13], 16) for h in df['row_hash']]
+
+        if df['id'].duplicated().any():
+            raise ValueError("Colisão de ids gerados a partir da chave natural.")
+
+        content_cols = [c for c in columns if c not in NON_CONTENT_COLUMNS]
+        df['content_hash'] = _md5_series(_join_columns(df, content_cols))
+    return df
+
+ATIVO_CANDIDATES = ['ativo', 'prefixo', 'locomotiva']
+
+COL_MAPPINGS = {
+    'status': ['status', 'status_operacional', 'farol'],
+    'status_1': ['status_1', 'previa___1', 'previa_1', 'previa', 'comentario_1'],
+    'status_2': ['status_2', 'previa___2', 'previa_2', 'comentario_2', 'observacao_2'],
+    'inicio_prog': ['inicia', 'inicio_prog', 'inicio_previsto'],
+    'inicio_real': ['inicio', 'inicio_real'],
+    'fim_real': ['fim', 'fim_real', 'termino'],
+    'tempo_prog': ['duracao', 'tempo_prog', 'janela'],
+    'tempo_real': ['total', 'tempo_real', 'tempo_gasto'],
+    'local_prog': ['sb', 'local_prog'],
+    'local_real': ['sb_4', 'local_real'],
+    'sub_trecho': ['sub_5', 'sub_trecho'],
+    'trecho_da_via': ['coordenacao_da_via_14', 'trecho_da_via', 'trecho'],
+    'gerencia_da_via': ['gerencia', 'gerencia_da_via'],
+    'producao_prog': ['quantidade', 'producao_prog'],
+    'producao_real': ['quantidade_11', 'producao_real'],
+    'tipo': ['programar_para_d+1', 'tipo', 'classificacao'],
+    'data': ['data_atividade', 'data']
+}
+
+def resolve_source_columns(columns):
+    """
+    Colunas da planilha (já limpas) que o map_columns/process_dataframe
+    efetivamente usam. Permite ler só essas colunas do Excel sem mudar o
+    resultado do mapeamento.
+    """
+    columns = list(columns)
+    needed = set()
+
+    col_ativo = find_in_columns(columns, ATIVO_CANDIDATES)
+    if col_ativo:
+        needed.add(col_ativo)
+        columns = ['ativo' if c == col_ativo else c for c in columns]
+
+    for candidates in COL_MAPPINGS.values():
+        found = find_in_columns(columns, candidates)
+        if found:
+            needed.add(col_ativo if found == 'ativo' else found)
+
+    # Colunas com nome de destino também entram no DataFrame final
+    targets = set(COL_MAPPINGS) | {'ativo', 'atividade'}
+    needed.update(c for c in columns if c in targets)
+    if col_ativo:
+        needed.discard('ativo')
+        needed.add(col_ativo)
+
+    return needed
+
+def map_columns(df):
+    """Filtra linhas sem ativo/data e renomeia as colunas da planilha para o padrão do banco."""
+    # 1. FILTRAR LINHAS VAZIAS E RENOMEAR COLUNA ATIVO
+    col_ativo = find_column(df, ATIVO_CANDIDATES)
+    
+    if col_ativo:
+        df = df.dropna(subset=[col_ativo])
+        df = df[df[col_ativo].astype(str).str.strip() != '']
+        df.rename(columns={col_ativo: 'ativo'}, inplace=True)
+        print(f"DEBUG: Após filtrar '{col_ativo}' vazio: {len(df)} linhas.")
+    else:
+        print("⚠️ AVISO: Coluna de identificação do Ativo não encontrada.")
+    
+    # 2. MAPEAMENTO DE COLUNAS
+    rename_dict = {}
+    for target, candidates in COL_MAPPINGS.items():
+        found = find_column(df, candidates)
+        if found:
+            rename_dict[found] = target
+    
+    df.rename(columns=rename_dict, inplace=True)
+
+    if 'data' in df.columns:
+        df = df.dropna(subset=['data'])
+        df = df[df['data'].astype(str).str.strip() != '']
+        print(f"DEBUG: Após filtrar 'data' vazia: {len(df)} linhas.")
+    else:
+        print("⚠️ AVISO: Coluna 'data' não identificada após mapeamento.")
+
+    # 3. FILTROS DE NEGÓCIO
+    if 'atividade' in df.columns:
+        # Espaço para ATIVIDADES_IGNORADAS se necessário
+        pass
+
+    return df
+
+def _status_code(raw):
+    """Status como int(float(x)): 0, 1 ou 2; -1 para vazio, inválido ou outro número."""
     try:
-        print(f"DEBUG: Iniciando process_dataframe com {len(df)} linhas brutas.")
-        
-        # 1. FILTRAR LINHAS VAZIAS E RENOMEAR COLUNA ATIVO
-        col_ativo = find_column(df, ['ativo', 'prefixo', 'locomotiva'])
-        
-        if col_ativo:
-            df = df.dropna(subset=[col_ativo])
-            df = df[df[col_ativo].astype(str).str.strip() != '']
-            df.rename(columns={col_ativo: 'ativo'}, inplace=True)
-            print(f"DEBUG: Após filtrar '{col_ativo}' vazio: {len(df)} linhas.")
-        else:
-            print("⚠️ AVISO: Coluna de identificação do Ativo não encontrada.")
-        
-        # 2. MAPEAMENTO DE COLUNAS
-        col_mappings = {
-            'status': ['status', 'status_operacional', 'farol'],
-            'status_1': ['status_1', 'previa___1', 'previa_1', 'previa', 'comentario_1'],
-            'status_2': ['status_2', 'previa___2', 'previa_2', 'comentario_2', 'observacao_2'],
-            'inicio_prog': ['inicia', 'inicio_prog', 'inicio_previsto'],
-            'inicio_real': ['inicio', 'inicio_real'],
-            'fim_real': ['fim', 'fim_real', 'termino'],
-            'tempo_prog': ['duracao', 'tempo_prog', 'janela'],
-            'tempo_real': ['total', 'tempo_real', 'tempo_gasto'],
-            'local_prog': ['sb', 'local_prog'],
-            'local_real': ['sb_4', 'local_real'],
-            'sub_trecho': ['sub_5', 'sub_trecho'],
-            'trecho_da_via': ['coordenacao_da_via_14', 'trecho_da_via', 'trecho'],
-            'gerencia_da_via': ['gerencia', 'gerencia_da_via'],
-            'producao_prog': ['quantidade', 'producao_prog'],
-            'producao_real': ['quantidade_11', 'producao_real'],
-            'tipo': ['programar_para_d+1', 'tipo', 'classificacao'],
-            'data': ['data_atividade', 'data']
-        }
-
-        rename_dict = {}
-        for target, candidates in col_mappings.items():
-            found = find_column(df, candidates)
-            if found:
-                rename_dict[found] = target
-        
-        df.rename(columns=rename_dict, inplace=True)
+        if pd.isna(raw) or str(raw).strip() == '': return -1
+        st = int(float(raw))
+    except:
+        return -1
+    return st if st in (0, 1, 2) else -1
 
-        if 'data' in df.columns:
-            df = df.dropna(subset=['data'])
-            df = df[df['data'].astype(str).str.strip() != '']
-            print(f"DEBUG: Após filtrar 'data' vazia: {len(df)} linhas.")
-        else:
-            print("⚠️ AVISO: Coluna 'data' não identificada após mapeamento.")
+def _producao_number(val):
+    """Produção com vírgula decimal; 0.0 para vazio/inválido."""
+    try:
+        if pd.isna(val) or str(val).strip() == '': return 0.0
+        return float(str(val).replace(',', '.'))
+    except:
+        return 0.0
+
+def _map_distinct(series, parse):
+    """
+    parse uma vez por valor distinto da coluna. A chave leva o tipo: True e 1
+    são iguais no dict, mas float(True) e float('True') convertem diferente.
+    """
+    values = series.to_numpy(dtype=object)
+    keys = list(zip(map(type, values), values))
+    parsed = {key: parse(key[1]) for key in set(keys)}
+    return np.array([parsed[key] for key in keys], dtype=float)
+
+def _parse_producao(df, col):
+    if col not in df.columns:
+        return np.zeros(len(df))
+    return _map_distinct(df[col], _producao_number)
+
+_TIME_TEXT = r'^(\d{1,2}):(\d{1,2}):(\d{1,2})$'
+
+def time_to_seconds(series, accept_datetime=True):
+    """
+    Segundos desde 00:00 de cada célula (NaN se não for um horário), com as
+    mesmas regras do pd.to_datetime(format='%H:%M:%S') usado antes:
+    - time/timedelta valem se tiverem segundos inteiros e menos de 24h;
+    - texto só no formato H:M:S;
+    - datetime vale pela hora do dia (accept_datetime), como na conversão
+      direta; o cálculo do fim programado passava por texto e os ignorava.
+    Células de horário são convertidas por atributo, sem ida e volta por texto.
+    """
+    result = pd.Series(np.nan, index=series.index, dtype=float)
+    values = series[series.notna()]
+    if values.empty:
+        return result
+
+    kinds = values.map(type)
+
+    times = values[kinds == time]
+    if not times.empty:
+        result[times.index] = [
+            t.hour * 3600 + t.minute * 60 + t.second if not t.microsecond else np.nan
+            for t in times
+        ]
+
+    deltas = values[kinds == timedelta]
+    if not deltas.empty:
+        result[deltas.index] = [
+            d.seconds if d.days == 0 and not d.microseconds else np.nan
+            for d in deltas
+        ]
+
+    if accept_datetime:
+        stamps = values[values.map(lambda v: isinstance(v, datetime))]
+        if not stamps.empty:
+            result[stamps.index] = [t.hour * 3600 + t.minute * 60 + t.second for t in stamps]
+
+    texts = values[kinds == str]
+    if not texts.empty:
+        parts = texts.str.extract(_TIME_TEXT).astype(float)
+        seconds = parts[0] * 3600 + parts[1] * 60 + parts[2]
+        valid = (parts[0] < 24) & (parts[1] < 60) & (parts[2] < 60)
+        result[texts.index] = seconds.where(valid)
+
+    return result
+
+def to_minutes(seconds):
+    """Segundos -> minutos inteiros (segundos descartados), nulo preservado."""
+    return (seconds // 60).astype('Int16')
+
+# Valores de gerência que não identificam uma gerência de fato
+INVALID_ENTRIES = ['-', '--', '.', '?', 'N/A', 'NULL', '0']
+
+# Atividades que também entram no grupo virtual MECANIZAÇÃO do overview
+ATIVIDADES_MECANIZACAO = [
+    "MECANIZACAO", "MECANIZAÇÃO", "SOCADORA", "REGULADORA", "ESMERILHADORA",
+    "DESGUARNECEDORA", "ESTABILIZADORA", "CAPINA QUÍMICA", "CAPINA QUIMICA"
+]
+
+STATUS_KEYS = {
+    'CONCLUIDO': 'concluido',
+    'PARCIAL': 'parcial',
+    'ANDAMENTO': 'andamento',
+    'NAO_INICIADO': 'nao_iniciado',
+    'CANCELADO': 'cancelado'
+}
 
-        # 3. FILTROS DE NEGÓCIO
-        if 'atividade' in df.columns:
-            # Espaço para ATIVIDADES_IGNORADAS se necessário
-            pass
+def is_valid_entry_series(series):
+    """Gerência exibível: não nula, não vazia, fora de INVALID_ENTRIES e com algum caractere alfanumérico."""
+    valid = pd.Series(False, index=series.index)
+    present = series.notna()
+    text = series[present].map(str).str.strip()
+    valid[present] = ~(
+        text.eq('') | text.isin(INVALID_ENTRIES) | text.str.match(r'^[\W_]+$')
+    )
+    return valid
+
+def derive_columns(df):
+    """
+    Classificações que os serviços faziam por linha a cada requisição:
+    - is_valid_gerencia / gerencia_id: gerência exibível e sua chave
+      (maiúsculas, espaços -> '_', minúsculas);
+    - tipo_class: 'contrato' se o tipo contém CONTRATO, senão 'oportunidade';
+    - is_mecanizacao: atividade cai no grupo virtual de mecanização;
+    - status_key: status em minúsculas para o breakdown;
+    - horas_prog / horas_real: durações em horas (0 quando vazias).
+    """
+    valid = is_valid_entry_series(df['gerencia_da_via'])
+    df['is_valid_gerencia'] = valid
+    df['gerencia_id'] = None
+    df.loc[valid, 'gerencia_id'] = (
+        df.loc[valid, 'gerencia_da_via'].map(str).str.upper().str.replace(' ', '_').str.lower()
+    )
+
+    tipo = df['tipo'].fillna('').map(str).str.upper()
+    df['tipo_class'] = np.where(tipo.str.contains('CONTRATO', regex=False), 'contrato', 'oportunidade')
+
+    atividade = df['atividade'].fillna('').map(str).str.upper()
+    pattern = '|'.join(re.escape(k) for k in ATIVIDADES_MECANIZACAO)
+    df['is_mecanizacao'] = atividade.str.contains(pattern, regex=True)
+
+    status = df['status'].fillna('').map(str).str.upper().str.strip()
+    df['status_key'] = status.map(STATUS_KEYS).fillna('nao_iniciado')
+
+    df['horas_prog'] = df['tempo_prog_min'].astype(float).fillna(0.0) / 60.0
+    df['horas_real'] = df['tempo_real_min'].astype(float).fillna(0.0) / 60.0
+    return df
+
+def classify_status(df):
+    """
+    Status final de cada linha: 0 cancelado, 1 andamento e 2 conforme a
+    produção real/programada (limiares 0.49/0.90); o resto, não iniciado.
+    A coerção é a escalar (float do Python), só que feita uma vez por valor
+    distinto: '1_000', '２' e True convertem como na regra linha a linha
+    (backend/benchmarks/status_rules.py), o que pd.to_numeric não faz.
+    """
+    status_num = _map_distinct(df['status'], _status_code)
+    p_prog = _parse_producao(df, 'producao_prog')
+    p_real = _parse_producao(df, 'producao_real')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = p_real / p_prog
+
+    concluded = np.select(
+        [p_prog == 0, percent <= 0.49, percent <= 0.90],
+        [np.where(p_real > 0, 'CONCLUIDO', 'CANCELADO'), 'CANCELADO', 'PARCIAL'],
+        default='CONCLUIDO'
+    )
+    status = np.select(
+        [status_num == 0, status_num == 1, status_num == 2],
+        ['CANCELADO', 'ANDAMENTO', concluded],
+        default='NAO_INICIADO'
+    )
+    return pd.Series(status, index=df.index, dtype=object)
+
+def process_dataframe(df, assign_identity=True):
+    try:
+        print(f"DEBUG: Iniciando process_dataframe com {len(df)} linhas brutas.")
+        
+        with profile_stage("map_columns", rows=len(df)):
+            df = map_columns(df)
 
         # 4. TRATAMENTO DE STATUS
-        if 'status' not in df.columns:
-            df['status'] = 'NAO_INICIADO'
-        else:
-            def apply_status_rules(row):
-                raw = row.get('status')
-                if pd.isna(raw) or str(raw).strip() == '': return 'NAO_INICIADO'
-                try: st = int(float(raw))
-                except: return 'NAO_INICIADO'
-                
-                if st == 0: return 'CANCELADO'
-                if st == 1: return 'ANDAMENTO'
-                
-                if st == 2:
-                    def parse_prod(val):
-                        try:
-                            if pd.isna(val) or str(val).strip() == '': return 0.0
-                            return float(str(val).replace(',', '.'))
-                        except:
-                            return 0.0
-
-                    p_prog = parse_prod(row.get('producao_prog'))
-                    p_real = parse_prod(row.get('producao_real'))
-                    
-                    if p_prog == 0: 
-                        return 'CONCLUIDO' if p_real > 0 else 'CANCELADO'
-                    
-                    percent = p_real / p_prog
-                    if percent <= 0.49: return 'CANCELADO'
-                    elif percent <= 0.90: return 'PARCIAL'
-                    else: return 'CONCLUIDO'
-                
-                return 'NAO_INICIADO'
-
-            df['status'] = df.apply(apply_status_rules, axis=1)
-
-        # 5. CÁLCULO FIM PROGRAMADO
-        if 'inicio_prog' in df.columns and 'tempo_prog' in df.columns:
-            start_dt = pd.to_datetime(df['inicio_prog'].astype(str), format='%H:%M:%S', errors='coerce')
-            duration_dt = pd.to_datetime(df['tempo_prog'].astype(str), format='%H:%M:%S', errors='coerce')
-            
-            dummy_date = datetime(2000, 1, 1)
-            if not start_dt.isna().all() and not duration_dt.isna().all():
-                start_delta = pd.to_timedelta(start_dt.dt.strftime('%H:%M:%S'))
-                duration_delta = pd.to_timedelta(duration_dt.dt.strftime('%H:%M:%S'))
-                final_dt = dummy_date + start_delta + duration_delta
-                df['fim_prog'] = final_dt.dt.time
+        with profile_stage("status", rows=len(df)):
+            if 'status' not in df.columns:
+                df['status'] = 'NAO_INICIADO'
             else:
-                df['fim_prog'] = None
-        else:
-            df['fim_prog'] = None
+                df['status'] = classify_status(df)
+
+        # 5. CÁLCULO FIM PROGRAMADO (minutos desde 00:00, virando o dia)
+        with profile_stage("fim_prog", rows=len(df)):
+            fim_seconds = pd.Series(np.nan, index=df.index)
+            if 'inicio_prog' in df.columns and 'tempo_prog' in df.columns:
+                start_s = time_to_seconds(df['inicio_prog'], accept_datetime=False)
+                duration_s = time_to_seconds(df['tempo_prog'], accept_datetime=False)
+
+                if start_s.notna().any() and duration_s.notna().any():
+                    fim_seconds = (start_s + duration_s) % (MINUTES_PER_DAY * 60)
+            df['fim_prog_min'] = to_minutes(fim_seconds)
 
         # 6. REGRAS DE MODERNIZAÇÃO
         ativos_modernizacao = [
@@ -183,40 +409,47 @@ def process_dataframe(df):
         if 'gerencia_da_via' not in df.columns: df['gerencia_da_via'] = None
         if 'atividade' not in df.columns: df['atividade'] = ''
 
-        mask_mod = (df['ativo'].astype(str).str.strip().isin(ativos_modernizacao)) | \
-                   (df['atividade'].astype(str).str.strip().isin(atividades_modernizacao))
-        df.loc[mask_mod, 'gerencia_da_via'] = 'MODERNIZAÇÃO'
+        with profile_stage("modernizacao", rows=len(df)):
+            mask_mod = (df['ativo'].astype(str).str.strip().isin(ativos_modernizacao)) | \
+                       (df['atividade'].astype(str).str.strip().isin(atividades_modernizacao))
+            df.loc[mask_mod, 'gerencia_da_via'] = 'MODERNIZAÇÃO'
 
         # 7. LIMPEZA E PREPARAÇÃO FINAL
         df['updated_at'] = datetime.now()
 
         required_columns = [
-            'status', 'gerencia_da_via', 'trecho_da_via', 'sub_trecho',
+            'id', 'status', 'gerencia_da_via', 'trecho_da_via', 'sub_trecho',
             'ativo', 'atividade', 'tipo', 'data',
-            'inicio_prog', 'inicio_real', 'fim_prog', 'fim_real',
-            'tempo_prog', 'tempo_real',
+            'inicio_prog_min', 'inicio_real_min', 'fim_prog_min', 'fim_real_min',
+            'tempo_prog_min', 'tempo_real_min',
             'local_prog', 'local_real', 'producao_prog', 'producao_real',
-            'status_1', 'status_2', 'row_hash', 'updated_at' 
+            'status_1', 'status_2',
+            'gerencia_id', 'is_valid_gerencia', 'tipo_class', 'is_mecanizacao', 'status_key',
+            'horas_prog', 'horas_real',
+            'row_hash', 'content_hash', 'updated_at'
         ]
 
+        with profile_stage("time_normalization", rows=len(df)):
+            for col in TIME_COLUMNS:
+                if col == 'fim_prog':
+                    continue
+                if col in df.columns:
+                    df[f'{col}_min'] = to_minutes(time_to_seconds(df[col]))
+                else:
+                    df[f'{col}_min'] = pd.array([pd.NA] * len(df), dtype='Int16')
+
         for col in required_columns:
             if col not in df.columns: df[col] = None
 
-        time_cols = ['inicio_prog', 'inicio_real', 'fim_prog', 'fim_real', 'tempo_prog', 'tempo_real']
-        for col in time_cols:
-            if col in df.columns:
-                temp = pd.to_datetime(df[col], format='%H:%M:%S', errors='coerce').dt.time
-                df[col] = temp.replace({np.nan: None})
+        # 7b. COLUNAS DERIVADAS (usadas pelos serviços para filtrar e agrupar)
+        with profile_stage("derived_columns", rows=len(df)):
+            df = derive_columns(df)
 
-        # 8. HASHING
-        if not df.empty:
+        # 8. IDENTIDADE E HASHING
+        # (no pipeline paralelo a identidade é atribuída após juntar as planilhas)
+        if assign_identity and not df.empty:
             df = df.reset_index(drop=True)
-            df['hash_source'] = (
-                df.index.astype(str) + "-" + 
-                df['data'].astype(str) + "-" + 
-                df['ativo'].astype(str)
-            )
-            df['row_hash'] = df['hash_source'].apply(lambda x: hashlib.md5(str(x).encode()).hexdigest())
+            df = assign_row_identity(df, required_columns)
 
         print(f"DEBUG: Finalizando process_dataframe com {len(df)} registros válidos.")
         return df[required_columns]
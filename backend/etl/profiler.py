@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS fica de fora (o tracemalloc segue valendo)
+    resource = None
+
+# Variação relativa (por etapa) a partir da qual o diff aponta regressão
+DEFAULT_THRESHOLD = 0.20
+# Etapas mais rápidas que isso ficam fora do alarme (ruído de medição)
+MIN_WALL_S = 0.05
+
+# Profiler ativo no processo atual (cada processo do pipeline tem o seu)
+_active = None
+# Picos de memória das etapas abertas no processo (etapas podem ser aninhadas,
+# inclusive entre profilers, como o do worker dentro do da execução)
+_open_peaks = []
+
+def _max_rss_mb():
+    """Pico de RSS do processo em MB, arredondado; None sem o módulo resource."""
+    if resource is None:
+        return None
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024, 1)
+
+def _fold_peak(peak):
+    for open_peak in _open_peaks:
+        open_peak[0] = max(open_peak[0], peak)
+
+class StageProfiler:
+    """
+    Registra, por etapa do ETL, tempo de relógio, tempo de CPU, memória e
+    linhas processadas. Usado como contexto, vira o profiler ativo do
+    processo e as funções do ETL anotam suas etapas com profile_stage().
+
+    O pico de memória por etapa usa tracemalloc (track_memory=True), que
+    deixa o ETL mais lento; sem ele, só o pico de RSS do processo é anotado.
+    """
+
+    def __init__(self, label=None, track_memory=False):
+        self.label = label
+        self.track_memory = track_memory
+        self.records = []
+        self._previous = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        _active = self
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        _active = self._previous
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return False
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {"stage": name, "file": self.label, "rows": rows}
+        tracing = self.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            # Antes de zerar o pico, repassa o pico atual às etapas externas
+            _fold_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            base_mem = tracemalloc.get_traced_memory()[0]
+            _open_peaks.append([base_mem])
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall_start, 6)
+            record["cpu_s"] = round(time.process_time() - cpu_start, 6)
+            record["peak_mb"] = None
+            if tracing:
+                _fold_peak(tracemalloc.get_traced_memory()[1])
+                peak = _open_peaks.pop()[0]
+                record["peak_mb"] = round(max(peak - base_mem, 0) / (1024 * 1024), 3)
+            record["max_rss_mb"] = _max_rss_mb()
+            self.records.append(record)
+
+    def extend(self, records):
+        """Incorpora as etapas medidas em outro processo (ex.: workers do pipeline)."""
+        self.records.extend(records or [])
+
+@contextmanager
+def profile_stage(name, rows=None):
+    """Mede a etapa no profiler ativo; sem profiler, não faz nada."""
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name, rows) as record:
+        yield record
+
+def add_stages(records):
+    """Anexa ao profiler ativo etapas medidas em outro processo."""
+    if _active is not None:
+        _active.extend(records)
+
+def summarize(records):
+    """Agrega as etapas por nome (somando as planilhas)."""
+    summary = {}
+    for rec in records:
+        item = summary.setdefault(rec["stage"], {"wall_s": 0.0, "cpu_s": 0.0, "rows": 0,
+                                                 "peak_mb": None, "calls": 0})
+        item["wall_s"] += rec["wall_s"]
+        item["cpu_s"] += rec["cpu_s"]
+        item["rows"] += rec["rows"] or 0
+        item["calls"] += 1
+        if rec.get("peak_mb") is not None:
+            item["peak_mb"] = max(item["peak_mb"] or 0.0, rec["peak_mb"])
+    return summary
+
+def write_report(profiler, report_dir, meta):
+    """Grava o relatório JSON da execução e devolve o caminho do arquivo."""
+    os.makedirs(report_dir, exist_ok=True)
+    now = datetime.now()
+    report = {
+        "created_at": now.isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "max_rss_mb": _max_rss_mb(),
+        **meta,
+        "summary": summarize(profiler.records),
+        "stages": profiler.records,
+    }
+
+    path = os.path.join(report_dir, f"etl_{now.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    return path
+
+def print_summary(profiler):
+    print("\n🧭 Perfil por etapa (somando as planilhas):")
+    for name, item in summarize(profiler.records).items():
+        peak = f" | pico {item['peak_mb']:.1f} MB" if item["peak_mb"] is not None else ""
+        print(f"   {name:<20} {item['wall_s']:8.3f}s relógio | {item['cpu_s']:8.3f}s CPU | "
+              f"{item['rows']} linhas{peak}")
+
+def diff_reports(old, new, threshold=DEFAULT_THRESHOLD):
+    """
+    Compara os resumos de dois relatórios. Retorna as linhas do comparativo
+    e a lista de etapas cujo tempo de relógio piorou além do limiar.
+    """
+    old_summary, new_summary = old["summary"], new["summary"]
+    rows = []
+    regressions = []
+
+    for name in list(old_summary) + [n for n in new_summary if n not in old_summary]:
+        before, after = old_summary.get(name), new_summary.get(name)
+        if before is None or after is None:
+            rows.append((name, before, after, None))
+            continue
+
+        change = (after["wall_s"] - before["wall_s"]) / before["wall_s"] if before["wall_s"] else None
+        rows.append((name, before, after, change))
+        if change is not None and change > threshold and after["wall_s"] >= MIN_WALL_S:
+            regressions.append(name)
+
+    return rows, regressions
+
+def _fmt(item, key, unit):
+    if item is None or item.get(key) is None:
+        return "-".rjust(10)
+    return f"{item[key]:9.3f}{unit}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ferramentas dos relatórios de perfil do ETL.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    diff_cmd = sub.add_parser("diff", help="Compara dois relatórios JSON")
+    diff_cmd.add_argument("old")
+    diff_cmd.add_argument("new")
+    diff_cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                          help="Piora relativa do tempo de relógio considerada regressão (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.old, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+
+    rows, regressions = diff_reports(old, new, args.threshold)
+
+    print(f"{'etapa':<20} {'antes':>10} {'depois':>10} {'variação':>9} {'CPU antes':>10} {'CPU depois':>10} {'pico depois':>11}")
+    for name, before, after, change in rows:
+        delta = f"{change:+8.1%}" if change is not None else "-".rjust(8)
+        flag = " ⚠️" if name in regressions else ""
+        print(f"{name:<20} {_fmt(before, 'wall_s', 's')} {_fmt(after, 'wall_s', 's')} {delta:>9} "
+              f"{_fmt(before, 'cpu_s', 's')} {_fmt(after, 'cpu_s', 's')} {_fmt(after, 'peak_mb', 'M'):>11}{flag}")
+
+    print(f"\nTotal: {old.get('wall_s', 0):.3f}s -> {new.get('wall_s', 0):.3f}s")
+    if regressions:
+        print(f"🔴 Regressões acima de {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("✅ Nenhuma regressão acima do limiar.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+from sqlalchemy import text
+
+# Setup de path (permite rodar como script)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from backend.db.connection import get_db_engine
+from backend.etl.loader import TABLE_NAME, get_table_columns
+
+ROLLUP_TABLE = 'overview_rollup'
+
+# Hora usada para atividades sem início real (a chave primária não aceita NULL)
+NO_HOUR = -1
+
+def ensure_rollup_table(conn):
+    """Cria o resumo do overview se ainda não existir. Retorna True se criou."""
+    if get_table_columns(conn, ROLLUP_TABLE) is not None:
+        return False
+
+    # Uma linha por dia × hora do início real × gerência × tipo × status
+    conn.execute(text(f"""
+        CREATE TABLE {ROLLUP_TABLE} (
+            data TIMESTAMP NOT NULL,
+            hora SMALLINT NOT NULL,
+            gerencia_id TEXT NOT NULL,
+            gerencia_da_via TEXT NOT NULL,
+            tipo_class TEXT NOT NULL,
+            status_key TEXT NOT NULL,
+            atividades INTEGER NOT NULL,
+            prog_h DOUBLE PRECISION NOT NULL,
+            real_h DOUBLE PRECISION NOT NULL,
+            points DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (data, gerencia_id, tipo_class, status_key, hora)
+        );
+    """))
+    return True
+
+def rollup_insert_sql(where="", source=TABLE_NAME):
+    """
+    Agrega as atividades (de source) para o resumo. O grupo virtual
+    MECANIZAÇÃO entra como uma cópia das linhas de mecanização (UNION ALL).
+    """
+    return f"""
+        INSERT INTO {ROLLUP_TABLE}
+            (data, hora, gerencia_id, gerencia_da_via, tipo_class, status_key,
+             atividades, prog_h, real_h, points)
+        SELECT data, COALESCE(inicio_real_min / 60, {NO_HOUR}), gerencia_id, MIN(gerencia_da_via),
+               tipo_class, status_key,
+               COUNT(*), SUM(horas_prog), SUM(horas_real),
+               SUM(CASE status_key WHEN 'concluido' THEN 1.0 WHEN 'parcial' THEN 0.5 ELSE 0 END)
+        FROM (
+            SELECT data, inicio_real_min, gerencia_id, gerencia_da_via, tipo_class, status_key,
+                   horas_prog, horas_real
+            FROM {source}
+            WHERE is_valid_gerencia AND data IS NOT NULL {where}
+            UNION ALL
+            SELECT data, inicio_real_min, 'mecanizacao_extra', 'MECANIZAÇÃO', tipo_class, status_key,
+                   horas_prog, horas_real
+            FROM {source}
+            WHERE is_valid_gerencia AND data IS NOT NULL AND is_mecanizacao {where}
+        ) grupos
+        GROUP BY data, COALESCE(inicio_real_min / 60, {NO_HOUR}), gerencia_id, tipo_class, status_key;
+    """
+
+def refresh_rollup(conn, dates=None, source=TABLE_NAME):
+    """
+    Atualiza o resumo dentro da transação recebida. Com dates, recalcula só
+    esses dias; sem dates (carga completa) ou com a tabela recém-criada,
+    recalcula tudo. source permite agregar a tabela nova da carga completa
+    antes da troca. Retorna a quantidade de dias recalculados (None = todos).
+    """
+    created = ensure_rollup_table(conn)
+
+    if dates is None or created:
+        conn.execute(text(f"DELETE FROM {ROLLUP_TABLE};"))
+        conn.execute(text(rollup_insert_sql(source=source)))
+        return None
+
+    dates = tuple(d for d in dates if d is not None)
+    if not dates:
+        return 0
+
+    params = {"dates": dates}
+    conn.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE data IN :dates;"), params)
+    conn.execute(text(rollup_insert_sql("AND data IN :dates", source)), params)
+    return len(dates)
+
+def rebuild_rollup():
+    """Recalcula o resumo inteiro (ex.: banco migrado antes do resumo existir)."""
+    engine = get_db_engine()
+    if not engine:
+        print("❌ DB: Engine não conectada.")
+        return
+
+    print(f"⏳ DB: Recalculando '{ROLLUP_TABLE}'...")
+    start = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            refresh_rollup(conn)
+            total = conn.execute(text(f"SELECT COUNT(*) FROM {ROLLUP_TABLE}")).scalar()
+        print(f"✅ DB: {total} linhas no resumo ({time.perf_counter() - start:.2f}s).")
+    except Exception as e:
+        print(f"❌ DB: Erro ao recalcular o resumo: {e}")
+
+if __name__ == "__main__":
+    rebuild_rollup()
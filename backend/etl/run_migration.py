@@ -1,14 +1,10 @@
 import sys
 import os
-import glob
-import json
+import argparse
+import time
 import pandas as pd
-import warnings
 from sqlalchemy import text
 
-# Silencia avisos do OpenPyXL
-warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
-
 # Setup de path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 backend_dir = os.path.dirname(current_dir)
@@ -17,133 +13,181 @@ project_root = os.path.dirname(backend_dir)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from backend.config import Config
 from backend.db.connection import get_db_engine
-from backend.etl.processor import process_dataframe, clean_column_names
+from backend.etl.processor import assign_row_identity
+from backend.etl.pipeline import (
+    RAW_PATH, MAP_PATH, get_workbook_tasks, read_workbook, run_pipeline, report_timings, get_workbook_cache
+)
+from backend.etl.workbook_cache import report_cache_stats
+from backend.etl.loader import load_dataframe, ensure_tracking_tables, get_next_version, bump_migration_log
+from backend.etl.rollup import refresh_rollup
+from backend.optimize_db import analyze_table
 from backend.add_indexes import create_indexes
-from backend.optimize_db import optimize_database
+from backend.etl.profiler import StageProfiler, profile_stage, add_stages, write_report, print_summary
 
 def load_raw_files():
-    raw_path = os.path.join(backend_dir, "raw_data")
-    map_path = os.path.join(current_dir, "mapeamento_abas.json")
-    
-    if not os.path.exists(map_path):
-        print("⚠️ Criando mapeamento padrão...")
-        default_map = {"FN_MC.xlsx": "FN_MC", "SP_NORTE.xlsx": "SP_NORTE", "SP_SUL.xlsx": "SP_SUL"}
-        with open(map_path, 'w') as f:
-            json.dump(default_map, f)
-    
-    try:
-        with open(map_path, 'r', encoding='utf-8') as f:
-            aba_map = json.load(f)
-    except Exception as e:
-        print(f"🔴 Erro ao ler mapeamento: {e}")
-        return []
-
-    all_files = glob.glob(os.path.join(raw_path, "*.xlsx"))
+    """Lê todas as planilhas mapeadas (sequencial, sem transformação)."""
     dfs = []
-
-    print(f"📂 Verificando {len(all_files)} arquivos em: {raw_path}")
-
-    for file_path in all_files:
-        filename = os.path.basename(file_path)
-        sheet_name = aba_map.get(filename)
-        
-        if not sheet_name:
-            print(f"⚠️ {filename}: Sem mapeamento de aba.")
-            continue
-            
+    for file_path, sheet_name in get_workbook_tasks():
         try:
-            temp = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-            print(f"🔍 {filename}: Total de linhas lidas: {len(temp)}")
-            
-            if len(temp) < 6:
-                print(f"⚠️ {filename}: Linhas insuficientes (< 6).")
-                continue
-
-            header = temp.iloc[4]
-            data = temp.iloc[5:].copy()
-            data.columns = clean_column_names(header)
-            
-            print(f"   📊 Colunas detectadas: {list(data.columns[:5])}...")
-        
-            if 'ativo' in data.columns:
+            data = read_workbook(file_path, sheet_name)
+            if data is not None:
                 dfs.append(data)
-                print(f"   ✅ {filename}: {len(data)} linhas capturadas.")
-            else:
-                print(f"   ⚠️ {filename}: Coluna 'ativo' não encontrada no header (Linha 5).")
-                
         except Exception as e:
-            print(f"   🔴 Erro em {filename}: {e}")
+            print(f"   🔴 Erro em {os.path.basename(file_path)}: {e}")
 
     return dfs
 
-def run():
+def load_processed_files(workers=None, raw_path=RAW_PATH, map_path=MAP_PATH, use_cache=None, profile_memory=None):
+    """Lê e transforma cada planilha em seu próprio processo e junta o resultado."""
+    tasks = get_workbook_tasks(raw_path, map_path)
+
+    start = time.perf_counter()
+    with profile_stage("pipeline") as stage:
+        results = run_pipeline(tasks, workers, use_cache, profile_memory)
+        stage["rows"] = sum(len(r["df"]) for r in results if r["df"] is not None)
+    report_timings(results, time.perf_counter() - start)
+    for res in results:
+        add_stages(res["stages"])
+
+    # Entradas de versões anteriores das planilhas (ou de arquivos removidos) saem do cache
+    evicted = get_workbook_cache(use_cache).evict_stale(
+        [(r["file"], r["cache_key"]) for r in results if r["cache_key"]]
+    )
+    report_cache_stats(results, evicted)
+
+    frames = [r["df"] for r in results if r["df"] is not None and not r["df"].empty]
+    if not frames:
+        return None
+
+    with profile_stage("concat", rows=sum(len(f) for f in frames)):
+        clean_df = pd.concat(frames, ignore_index=True)
+    return assign_row_identity(clean_df, list(clean_df.columns))
+
+def run(load_mode=None, workers=None, raw_path=RAW_PATH, map_path=MAP_PATH, engine=None,
+        use_cache=None, profile_memory=None):
+    """
+    Executa a migração e devolve os metadados da execução (os mesmos do
+    relatório de perfil). raw_path/map_path/engine permitem rodar o ETL
+    sobre outras planilhas e outro banco (ex.: benchmarks). use_cache e
+    profile_memory (None = Config) chegam aos workers na própria tarefa.
+    """
+    load_mode = load_mode or Config.ETL_LOAD_MODE
+    workers = workers if workers is not None else Config.ETL_WORKERS
+    use_cache = use_cache if use_cache is not None else Config.ETL_CACHE_ENABLED
+    profile_memory = profile_memory if profile_memory is not None else Config.ETL_PROFILE_MEMORY
+
+    meta = {"load_mode": load_mode, "workers": workers, "status": "erro"}
+    start = time.perf_counter()
+    with StageProfiler(track_memory=profile_memory) as profiler:
+        try:
+            meta.update(migrate(load_mode, workers, raw_path, map_path, engine, use_cache, profile_memory))
+        finally:
+            meta["wall_s"] = round(time.perf_counter() - start, 6)
+            if Config.ETL_PROFILE_ENABLED:
+                print_summary(profiler)
+                try:
+                    meta["report_path"] = write_report(profiler, Config.ETL_REPORT_DIR, meta)
+                    print(f"🧭 Relatório de perfil: {meta['report_path']}")
+                except Exception as e:
+                    print(f"⚠️ Não foi possível gravar o relatório de perfil: {e}")
+    return meta
+
+def rollup_before_swap(conn, source):
+    """
+    Carga completa: recalcula o resumo a partir da tabela nova, antes da
+    troca. Depois dela a agregação rodaria segurando o lock exclusivo de
+    'atividades' e bloquearia o dashboard enquanto durasse.
+    """
+    print("   (2/3) Recalculando resumo do overview a partir da tabela nova...")
+    with profile_stage("rollup"):
+        refresh_rollup(conn, None, source)
+    print("   🧮 Resumo: recalculado por completo")
+
+def migrate(load_mode, workers, raw_path=RAW_PATH, map_path=MAP_PATH, engine=None,
+            use_cache=None, profile_memory=None):
+    """Executa a migração e devolve os metadados da execução para o relatório."""
     print("\n🚀 INICIANDO MIGRAÇÃO AUTOMATIZADA")
     print("===========================================")
     
-    engine = get_db_engine()
+    engine = engine or get_db_engine()
     if not engine:
         sys.exit(1)
 
-    raw_dfs = load_raw_files()
-    if not raw_dfs:
-        print("❌ Erro: Nenhum DataFrame carregado. Verifique os arquivos Excel.")
-        sys.exit(0)
-
-    print("\n⚙️ Unificando e transformando dados...")
-    full_df = pd.concat(raw_dfs, ignore_index=True)
-    print(f"📝 Total bruto antes do ETL: {len(full_df)}")
-    
-    clean_df = process_dataframe(full_df)
-    
-    if clean_df.empty:
-        print("❌ Erro: O processamento (ETL) resultou em 0 registros. Verifique filtros de data e atividade.")
+    clean_df = load_processed_files(workers, raw_path, map_path, use_cache, profile_memory)
+    if clean_df is None:
+        print("❌ Erro: O processamento (ETL) resultou em 0 registros. Verifique os arquivos Excel.")
         sys.exit(0)
 
-    clean_df.reset_index(inplace=True) 
-    clean_df.rename(columns={'index': 'id'}, inplace=True)
-
     print(f"📊 Dados prontos para inserção: {len(clean_df)} registros.")
 
-    print("💾 Inserindo no banco de dados...")
+    print(f"💾 Inserindo no banco de dados (modo: {load_mode})...")
     try:
         with engine.begin() as conn:
             # Aumenta o timeout da sessão para esta transação específica
-            conn.execute(text("SET statement_timeout = '60s';"))
-            
-            print("   (1/3) Substituindo tabela 'atividades'...")
-            clean_df.to_sql(
-                'atividades', 
-                conn, 
-                if_exists='replace', 
-                index=False,
-                chunksize=1000 
-            )
+            if conn.dialect.name == 'postgresql':
+                conn.execute(text("SELECT set_config('statement_timeout', :timeout, true)"),
+                             {"timeout": Config.ETL_STATEMENT_TIMEOUT})
             
-            print("   (2/3) Definindo Chave Primária...")
-            conn.execute(text("ALTER TABLE atividades ADD PRIMARY KEY (id);"))
+            ensure_tracking_tables(conn)
+            version = get_next_version(conn)
+
+            print("   (1/3) Sincronizando tabela 'atividades'...")
+            with profile_stage("insert", rows=len(clean_df)):
+                applied_mode, stats = load_dataframe(conn, clean_df, version, load_mode,
+                                                     before_swap=rollup_before_swap)
+            affected_dates = stats.pop("affected_dates", None)
+            # A carga completa sempre troca a tabela (e o updated_at), então sempre publica versão
+            has_changes = applied_mode == 'full' or stats["inserted"] or stats["updated"] or stats["deleted"]
             
-            print("   (3/3) Atualizando log de migração...")
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS migration_log (
-                    id INT PRIMARY KEY, 
-                    last_updated_at TIMESTAMP DEFAULT NOW()
-                );
-                INSERT INTO migration_log (id, last_updated_at) VALUES (1, NOW())
-                ON CONFLICT (id) DO UPDATE SET last_updated_at = NOW();
-            """))
+            print(f"   📈 Inseridas: {stats['inserted']} | Atualizadas: {stats['updated']} | "
+                  f"Removidas: {stats['deleted']} | Inalteradas: {stats['unchanged']}")
+
+            # Na carga completa o resumo já foi recalculado antes da troca (rollup_before_swap)
+            if applied_mode != 'full':
+                print("   (2/3) Atualizando resumo do overview...")
+                with profile_stage("rollup"):
+                    days = refresh_rollup(conn, affected_dates)
+                print(f"   🧮 Resumo: {'recalculado por completo' if days is None else f'{days} dia(s) recalculado(s)'}")
+
+            if has_changes:
+                print(f"   (3/3) Atualizando log de migração (versão {version})...")
+                bump_migration_log(conn, version)
+            else:
+                print("   (3/3) Nenhuma alteração: log de migração mantido.")
             
         print("✅ Dados inseridos com sucesso!")
 
         print("\n🔧 Tarefas pós-migração...")
-        create_indexes()
-        optimize_database()
+        with profile_stage("post_tasks"):
+            if applied_mode == 'full':
+                # Índices e ANALYZE já foram feitos na tabela nova, antes da troca
+                print("   Tabela nova publicada já indexada e analisada.")
+            else:
+                # O diff não recria a tabela: só cria índices novos (IF NOT EXISTS) e, se mudou, atualiza estatísticas
+                create_indexes()
+                if has_changes:
+                    analyze_table(engine)
 
         print("\n✨ MIGRAÇÃO CONCLUÍDA! ✨")
-        
+        return {"status": "ok", "applied_mode": applied_mode, "rows": len(clean_df),
+                "version": version if has_changes else None, **stats}
+
     except Exception as e:
         print(f"\n🔴 FALHA CRÍTICA: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="ETL das planilhas para a tabela 'atividades'.")
+    parser.add_argument("--full", action="store_true", help="Força a recriação completa da tabela")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos para ler/transformar as planilhas (0 = um por planilha)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache de planilhas processadas")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Mede o pico de memória por etapa (tracemalloc, mais lento)")
+    args = parser.parse_args()
+
+    run(load_mode='full' if args.full else None, workers=args.workers,
+        use_cache=False if args.no_cache else None,
+        profile_memory=True if args.profile_memory else None)
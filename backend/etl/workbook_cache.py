@@ -0,0 +1,139 @@
+import os
+import json
+import glob
+import hashlib
+import pandas as pd
+
+from backend.etl.processor import PROCESSOR_VERSION
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+CACHE_SUFFIX = ".arrow"
+META_KEY = b"statusdiario"
+
+def file_fingerprint(file_path, sheet_name):
+    """Chave do cache: conteúdo do arquivo + aba mapeada + versão do processador."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    digest.update(f"|{sheet_name}|{PROCESSOR_VERSION}".encode())
+    return digest.hexdigest()[:32]
+
+def _to_arrow(df):
+    """
+    Converte o DataFrame processado para Arrow. Colunas object com tipos
+    mistos (ex.: SB numérico e texto) não têm tipo Arrow único e são gravadas
+    como texto, o mesmo valor que o banco recebe para colunas mistas.
+    """
+    columns = {}
+    kinds = {}
+    for col in df.columns:
+        series = df[col]
+        kinds[col] = str(series.dtype)
+        if series.dtype == object:
+            try:
+                pa.array(series, from_pandas=True)
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                series = series.map(str).where(series.notna(), None)
+                kinds[col] = "text"
+        columns[col] = series
+
+    table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+    return table, kinds
+
+def _restore_column(series, kind):
+    if kind == "object":
+        # O leitor já converte floats inteiros em int; o Arrow pode tê-los promovido
+        values = [int(v) if isinstance(v, float) and v.is_integer() else v for v in series]
+        return pd.Series(values, index=series.index, dtype=object)
+    if kind == "text":
+        return series.astype(object)
+    return series
+
+class WorkbookCache:
+    """
+    Cache em disco do DataFrame já processado de cada planilha (Arrow IPC).
+    Uma entrada vale enquanto o arquivo, a aba e a versão do processador
+    forem os mesmos.
+    """
+
+    def __init__(self, cache_dir, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled and pa is not None
+        if enabled and pa is None:
+            print("⚠️ Cache de planilhas desativado: pyarrow não instalado.")
+
+    def _entry_path(self, filename, key):
+        return os.path.join(self.cache_dir, f"{filename}.{key}{CACHE_SUFFIX}")
+
+    def get(self, filename, key):
+        """Retorna (DataFrame, metadados) ou None se não houver entrada válida."""
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(filename, key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            table = feather.read_table(path)
+            meta = json.loads(table.schema.metadata[META_KEY])
+            df = table.to_pandas()
+            for col, kind in meta["kinds"].items():
+                df[col] = _restore_column(df[col], kind)
+            return df, meta
+        except Exception as e:
+            print(f"⚠️ Cache corrompido para {filename}, reprocessando: {e}")
+            return None
+
+    def put(self, filename, key, df, meta):
+        if not self.enabled:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            table, kinds = _to_arrow(df)
+            meta = dict(meta, kinds=kinds, processor_version=PROCESSOR_VERSION)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                META_KEY: json.dumps(meta).encode()
+            })
+
+            # Grava em arquivo temporário e renomeia (evita entrada pela metade)
+            path = self._entry_path(filename, key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            feather.write_feather(table, tmp_path, compression='lz4')
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Não foi possível gravar cache de {filename}: {e}")
+
+    def evict_stale(self, active_entries):
+        """Remove entradas que não correspondem a nenhum (arquivo, chave) atual."""
+        if not self.enabled or not os.path.isdir(self.cache_dir):
+            return 0
+
+        active = {os.path.basename(self._entry_path(f, k)) for f, k in active_entries}
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, f"*{CACHE_SUFFIX}*")):
+            if os.path.basename(path) not in active:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+def report_cache_stats(results, evicted):
+    hits = [r for r in results if r.get("cache") == "hit"]
+    misses = [r for r in results if r.get("cache") == "miss"]
+    if not hits and not misses:
+        return
+
+    saved_s = sum(max(r["saved_s"], 0.0) for r in hits)
+    print(f"🗃️ Cache de planilhas: {len(hits)} hit(s), {len(misses)} miss(es), "
+          f"{evicted} entrada(s) removida(s), ~{saved_s:.2f}s economizados")
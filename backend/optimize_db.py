@@ -18,5 +18,20 @@ def optimize_database():
         print(f"⚠️ Aviso: {e}")
         print("Nota: Alguns bancos em nuvem não permitem VACUUM via código. Se deu erro, confie apenas no timeout aumentado.")
 
+def analyze_table(engine=None):
+    """Atualiza apenas as estatísticas da tabela (mais leve que o VACUUM)."""
+    engine = engine or get_db_engine()
+    if not engine:
+        print("❌ Erro: Engine não conectada.")
+        return
+
+    print("📈 Atualizando estatísticas (ANALYZE)...")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE atividades;"))
+        print("✅ Estatísticas atualizadas.")
+    except Exception as e:
+        print(f"⚠️ Aviso: {e}")
+
 if __name__ == "__main__":
     optimize_database()
\ No newline at end of file
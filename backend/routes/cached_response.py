@@ -0,0 +1,48 @@
+from flask import current_app, request
+from backend.routes.conditional import make_etag, encoded_etag, is_not_modified, add_validators, not_modified
+from backend.services.response_encoding import (
+    ENCODINGS, CACHE_FORMAT, encode_json, build_variants, pick_variant, packed_headers
+)
+
+def cached_json(cache, key, version, load, expires_at=None, last_modified=None, mimetype='application/json',
+                with_headers=False):
+    """
+    Resposta JSON servida pelo cache (ResponseCache.get_or_compute), com
+    GET condicional: se o cliente já tem o ETag da versão atual, responde
+    304 antes de qualquer consulta. O cache guarda o corpo já serializado e
+    comprimido (gzip/brotli), então um acerto só escolhe a variante do
+    Accept-Encoding. load() devolve os dados e pode rodar fora do pedido
+    (renovação em segundo plano), por isso roda num contexto próprio da
+    aplicação. Resultados vazios não entram no cache nem ganham ETag: podem
+    ser uma falha momentânea do banco. Com with_headers, load() devolve
+    (dados, cabeçalhos) e os cabeçalhos são guardados e reenviados com o corpo.
+    """
+    app = current_app._get_current_object()
+    etag = make_etag(version, key)
+    for encoding in ENCODINGS:
+        if is_not_modified(encoded_etag(etag, encoding)):
+            response = not_modified(encoded_etag(etag, encoding), last_modified, expires_at)
+            response.vary.add('Accept-Encoding')
+            return response
+
+    cacheable = True
+
+    def compute():
+        nonlocal cacheable
+        with app.app_context():
+            data, headers = load() if with_headers else (load(), None)
+            cacheable = bool(data)
+            return build_variants(encode_json(data), headers), cacheable
+
+    packed, stale = cache.get_or_compute((CACHE_FORMAT, key), version, compute, expires_at)
+    encoding, body = pick_variant(packed, request.accept_encodings)
+
+    response = app.response_class(body, mimetype=mimetype)
+    response.headers.update(packed_headers(packed))
+    response.vary.add('Accept-Encoding')
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    # Corpo da versão anterior não pode levar o ETag da versão atual
+    if stale or not cacheable:
+        return response
+    return add_validators(response, encoded_etag(etag, encoding), last_modified, expires_at)
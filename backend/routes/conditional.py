@@ -0,0 +1,44 @@
+import hashlib
+from datetime import datetime
+from flask import current_app, request
+from backend.config import Config
+
+# GET condicional: o ETag depende só da versão do banco (em memória) e dos
+# parâmetros normalizados do pedido, então o 304 sai sem consulta nem
+# serialização. O navegador reenvia o ETag sozinho (If-None-Match).
+
+def make_etag(version, key):
+    """ETag forte da resposta: versão do banco + chave normalizada do pedido. None sem versão."""
+    if version is None:
+        return None
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+    return f"{version}-{digest}"
+
+def encoded_etag(etag, encoding):
+    """Cada codificação (gzip, br) é uma representação diferente, com ETag próprio."""
+    if etag is None or encoding == 'identity':
+        return etag
+    return f"{etag}-{encoding}"
+
+def is_not_modified(etag):
+    # Comparação fraca (RFC 9110): proxies que comprimem podem devolver W/"..."
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+def add_validators(response, etag, last_modified=None, expires_at=None):
+    """ETag, Last-Modified e Cache-Control para navegador/CDN revalidarem a resposta."""
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    max_age = Config.HTTP_CACHE_MAX_AGE_S
+    if expires_at is not None:
+        max_age = max(0, min(max_age, int((expires_at - datetime.now()).total_seconds())))
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.must_revalidate = True
+    return response
+
+def not_modified(etag, last_modified=None, expires_at=None):
+    return add_validators(current_app.response_class(status=304), etag, last_modified, expires_at)
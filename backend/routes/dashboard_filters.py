@@ -0,0 +1,63 @@
+from datetime import datetime
+
+# Filtros de lista aceitos pelo /dashboard: ?gerencia=A&gerencia=B (parâmetro repetido)
+LIST_FILTERS = ['gerencia', 'status', 'tipo', 'atividade', 'trecho']
+
+STATUS_VALUES = {'CONCLUIDO', 'PARCIAL', 'ANDAMENTO', 'NAO_INICIADO', 'CANCELADO'}
+TIPO_VALUES = {'contrato', 'oportunidade'}
+
+# Limites contra consultas abusivas (IN gigante ou textos enormes)
+MAX_FILTER_VALUES = 50
+MAX_FILTER_LENGTH = 200
+
+def parse_date(name, value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise ValueError(f"{name} deve estar no formato AAAA-MM-DD")
+
+def parse_list(args, name):
+    values = [v.strip() for v in args.getlist(name) if v.strip()]
+    if len(values) > MAX_FILTER_VALUES:
+        raise ValueError(f"{name}: no máximo {MAX_FILTER_VALUES} valores")
+    if any(len(v) > MAX_FILTER_LENGTH for v in values):
+        raise ValueError(f"{name}: valores com no máximo {MAX_FILTER_LENGTH} caracteres")
+    return values
+
+def parse_dashboard_filters(args):
+    """
+    Filtros do dashboard a partir da query string: um dia (data) ou um
+    período (start/end), mais gerencia, status, tipo, atividade e trecho.
+    ValueError com a mensagem para o 400 se algum for inválido.
+    """
+    filters = {}
+
+    start_date, end_date, requested_date = args.get('start'), args.get('end'), args.get('data')
+    if start_date or end_date:
+        if not (start_date and end_date):
+            raise ValueError("Informe start e end")
+        start_date, end_date = parse_date('start', start_date), parse_date('end', end_date)
+        if start_date > end_date:
+            raise ValueError("start deve ser menor ou igual a end")
+        filters["dateRange"] = { "start": start_date, "end": end_date }
+    elif requested_date:
+        requested_date = parse_date('data', requested_date)
+        filters["dateRange"] = { "start": requested_date, "end": requested_date }
+
+    lists = {name: parse_list(args, name) for name in LIST_FILTERS}
+
+    status = [s.upper() for s in lists['status']]
+    invalid = sorted(set(status) - STATUS_VALUES)
+    if invalid:
+        raise ValueError(f"status inválido: {', '.join(invalid)} (use {', '.join(sorted(STATUS_VALUES))})")
+
+    tipo = [t.lower() for t in lists['tipo']]
+    invalid = sorted(set(tipo) - TIPO_VALUES)
+    if invalid:
+        raise ValueError(f"tipo inválido: {', '.join(invalid)} (use contrato ou oportunidade)")
+
+    for name, values in [('gerencia', lists['gerencia']), ('status', status), ('tipo', tipo),
+                         ('atividade', lists['atividade']), ('trecho', lists['trecho'])]:
+        if values:
+            filters[name] = values
+    return filters
@@ -1,54 +1,231 @@
-from flask import Blueprint, jsonify, request
-from backend.services.dashboard_service import get_dashboard_data, get_last_migration_time
-import threading
+from itertools import chain
+from urllib.parse import urlencode
+from flask import Blueprint, current_app, jsonify, request
+from backend.config import Config
+from backend.services.dashboard_service import (
+    get_dashboard_page, iter_dashboard_rows, get_changes_since,
+    get_detalhamento_bucket, get_bucket_expiry, to_columnar, get_dashboard_options, DASHBOARD_LIMIT
+)
+from backend.services.version_watcher import get_migration_snapshot
+from backend.services.response_cache import ResponseCache, filters_cache_key
+from backend.routes.cached_response import cached_json
+from backend.routes.dashboard_filters import parse_dashboard_filters
+from backend.routes.conditional import make_etag, is_not_modified, add_validators, not_modified
+from backend.services.response_encoding import encode_json
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
-CACHE = { "last_db_update": None, "cached_date": None, "payload": None }
-CACHE_LOCK = threading.Lock()
+# Respostas JSON prontas por combinação de filtros, válidas até a próxima migração
+CACHE = ResponseCache('dashboard', Config.DASHBOARD_CACHE_MAX_BYTES)
+
+# Formatos além do JSON em linhas: ?format=<nome> ou Accept com o tipo
+COLUMNAR_MIMETYPE = 'application/vnd.statusdiario.columnar+json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+FORMAT_MIMETYPES = {'rows': 'application/json', 'columnar': COLUMNAR_MIMETYPE, 'ndjson': NDJSON_MIMETYPE}
+
+# Linhas por bloco enviado no streaming NDJSON
+STREAM_CHUNK_ROWS = 500
+
+def get_dashboard_format():
+    """'rows' (padrão), 'columnar' ou 'ndjson'; None se ?format for inválido."""
+    requested = request.args.get('format')
+    if requested is not None:
+        return requested if requested in FORMAT_MIMETYPES else None
+    best = request.accept_mimetypes.best_match(list(FORMAT_MIMETYPES.values()))
+    return next((name for name, mimetype in FORMAT_MIMETYPES.items() if mimetype == best), 'rows')
+
+def load_dashboard(filters, bucket, output_format, path, args):
+    """
+    (dados, cabeçalhos) da resposta sem paginação: a primeira página de
+    DASHBOARD_LIMIT linhas. Se houver mais, nada é cortado em silêncio:
+    X-Truncated: true e Link rel="next" para continuar por cursor.
+    """
+    page = get_dashboard_page(filters, bucket, DASHBOARD_LIMIT)
+    # Lista vazia (sem dados ou falha do banco) continua fora do cache
+    if not page or not page["items"]:
+        return [], None
+
+    items = page["items"]
+    data = to_columnar(items) if output_format == 'columnar' else items
+    headers = None
+    if page["next_cursor"]:
+        headers = {"X-Truncated": "true", "Link": next_page_link(path, args, page["next_cursor"])}
+    return data, headers
+
+def next_page_link(path, args, cursor):
+    """Link rel="next" (relativo) que continua o pedido pela paginação por cursor."""
+    query = urlencode([(k, v) for k, v in args if k not in ('limit', 'cursor')]
+                      + [('limit', DASHBOARD_LIMIT), ('cursor', cursor)])
+    return f'<{path}?{query}>; rel="next"'
 
 @dashboard_bp.route('/dashboard', methods=['GET'])
 @dashboard_bp.route('/atividades', methods=['GET'])
 def list_atividades():
     try:
-        requested_date = request.args.get('data')
-        current_db_time = get_last_migration_time()
-
-        # Cache Logic
-        with CACHE_LOCK:
-            cache_valido = (
-                CACHE["payload"] is not None and 
-                CACHE["last_db_update"] == current_db_time and
-                current_db_time is not None
-            )
-            is_same_request = (requested_date == CACHE["cached_date"]) if requested_date else True
-
-            if cache_valido and is_same_request:
-                return jsonify(CACHE["payload"])
-
-        # Monta filtro corretamente
-        filters = {}
-        if requested_date:
-            filters["dateRange"] = { "start": requested_date, "end": requested_date }
-        
-        data = get_dashboard_data(filters)
-
-        if data:
-            with CACHE_LOCK:
-                CACHE["payload"] = data
-                CACHE["last_db_update"] = current_db_time
-                CACHE["cached_date"] = requested_date
-        
-        return jsonify(data)
+        output_format = get_dashboard_format()
+        if output_format is None:
+            return jsonify({"error": "format deve ser 'rows', 'columnar' ou 'ndjson'"}), 400
+
+        # Período (data ou start/end), gerencia, status, tipo, atividade e trecho
+        try:
+            filters = parse_dashboard_filters(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # O detalhamento depende do dia e do corte das 13h: entra na chave e na validade
+        bucket = get_detalhamento_bucket()
+        expires_at = get_bucket_expiry(bucket)
+        version, last_updated_at = get_migration_snapshot()
+
+        if output_format == 'ndjson':
+            response = stream_dashboard(filters, bucket, version, last_updated_at, expires_at)
+        elif 'limit' in request.args or 'cursor' in request.args:
+            response = dashboard_page(filters, bucket, output_format, version, last_updated_at, expires_at)
+        else:
+            key = (filters_cache_key(filters), bucket, output_format)
+            # O load pode rodar fora do pedido (renovação em segundo plano): path/args vão capturados
+            path, args = request.path, list(request.args.items(multi=True))
+            load = lambda: load_dashboard(filters, bucket, output_format, path, args)
+            response = cached_json(CACHE, key, version, load, expires_at, last_updated_at,
+                                   FORMAT_MIMETYPES[output_format], with_headers=True)
+
+        if isinstance(response, tuple):
+            return response
+        response.vary.add('Accept')
+        return response
 
     except Exception as e:
         print(f"Erro Dash Route: {e}")
         return jsonify([]), 200 
 
+def dashboard_page(filters, bucket, output_format, version, last_updated_at, expires_at):
+    """
+    Página por cursor (?limit=&cursor=): {"items", "next_cursor"}. Fica fora
+    do cache de respostas para exportações não expulsarem as telas; o ETag
+    ainda evita refazer páginas que o cliente já tem.
+    """
+    limit = request.args.get('limit', Config.DASHBOARD_PAGE_SIZE, type=int)
+    if not 1 <= limit <= Config.DASHBOARD_PAGE_MAX_ROWS:
+        return jsonify({"error": f"limit deve estar entre 1 e {Config.DASHBOARD_PAGE_MAX_ROWS}"}), 400
+    cursor = request.args.get('cursor') or None
+
+    etag = make_etag(version, ('page', filters_cache_key(filters), bucket, output_format, limit, cursor))
+    if is_not_modified(etag):
+        return not_modified(etag, last_updated_at, expires_at)
+
+    try:
+        page = get_dashboard_page(filters, bucket, limit, cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if page is None:
+        return jsonify({"error": "Falha ao consultar atividades"}), 503
+
+    if output_format == 'columnar':
+        page["items"] = to_columnar(page["items"]) if page["items"] else []
+    response = current_app.response_class(encode_json(page), mimetype=FORMAT_MIMETYPES[output_format])
+    return add_validators(response, etag, last_updated_at, expires_at)
+
+def ndjson_chunks(rows):
+    """Uma atividade por linha, enviadas em blocos de STREAM_CHUNK_ROWS."""
+    chunk = []
+    for item in rows:
+        chunk.append(encode_json(item))
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield b'\n'.join(chunk) + b'\n'
+            chunk = []
+    if chunk:
+        yield b'\n'.join(chunk) + b'\n'
+
+def stream_dashboard(filters, bucket, version, last_updated_at, expires_at):
+    """
+    Todas as atividades do filtro em NDJSON, enviadas conforme são lidas do
+    cursor no servidor: memória constante para qualquer período.
+    """
+    etag = make_etag(version, ('ndjson', filters_cache_key(filters), bucket))
+    if is_not_modified(etag):
+        return not_modified(etag, last_updated_at, expires_at)
+
+    rows = iter_dashboard_rows(filters, bucket)
+    try:
+        # Abre a conexão e executa a consulta antes do 200: falhas aqui viram 503
+        first = next(rows, None)
+    except Exception as e:
+        print(f"Erro Dash Stream: {e}")
+        return jsonify({"error": "Falha ao consultar atividades"}), 503
+
+    def generate():
+        if first is None:
+            return
+        try:
+            yield from ndjson_chunks(chain([first], rows))
+        except Exception as e:
+            # Cabeçalhos já enviados: o cliente recebe o corpo interrompido
+            print(f"Erro Dash Stream: {e}")
+
+    response = current_app.response_class(generate(), mimetype=NDJSON_MIMETYPE)
+    return add_validators(response, etag, last_updated_at, expires_at)
+
+@dashboard_bp.route('/dashboard/options', methods=['GET'])
+def list_dashboard_options():
+    """
+    Listas dos seletores (gerencia, trecho, sub, ativo, atividade) para o
+    dia (data) ou período (start/end): o frontend não precisa baixar todas
+    as atividades só para montar os filtros.
+    """
+    try:
+        try:
+            filters = parse_dashboard_filters(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        filters = {"dateRange": filters["dateRange"]} if "dateRange" in filters else {}
+
+        version, last_updated_at = get_migration_snapshot()
+        key = ('options', filters_cache_key(filters))
+        return cached_json(CACHE, key, version, lambda: get_dashboard_options(filters),
+                           last_modified=last_updated_at)
+
+    except Exception as e:
+        print(f"Erro Dash Options: {e}")
+        return jsonify({}), 200
+
+@dashboard_bp.route('/changes', methods=['GET'])
+def list_changes():
+    try:
+        since = request.args.get('since', type=int)
+
+        # Mesmos filtros do /dashboard: o delta cobre exatamente o recorte do cliente
+        try:
+            filters = parse_dashboard_filters(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        bucket = get_detalhamento_bucket()
+        version, last_updated_at = get_migration_snapshot()
+        etag = make_etag(version, ('changes', since, filters_cache_key(filters), bucket))
+        expires_at = get_bucket_expiry(bucket)
+        if is_not_modified(etag):
+            return not_modified(etag, last_updated_at, expires_at)
+
+        data = get_changes_since(since, filters, bucket)
+        if data is None:
+            return jsonify({"error": "Falha ao consultar alterações"}), 503
+
+        # A consulta lê a versão do banco: só leva o ETag se bater com a da memória
+        if data["version"] != version:
+            return jsonify(data)
+        return add_validators(jsonify(data), etag, last_updated_at, expires_at)
+
+    except Exception as e:
+        print(f"Erro Changes Route: {e}")
+        return jsonify({"error": "Falha ao consultar alterações"}), 500
+
 @dashboard_bp.route('/last-update', methods=['GET'])
 def get_last_update():
     try:
-        dt = get_last_migration_time()
-        return jsonify({"last_updated_at": dt}), 200
+        version, dt = get_migration_snapshot()
+        etag = make_etag(version, ('last-update', dt))
+        if is_not_modified(etag):
+            return not_modified(etag, dt)
+        return add_validators(jsonify({"last_updated_at": dt, "version": version}), etag, dt)
     except:
-        return jsonify({"last_updated_at": None}), 200
\ No newline at end of file
+        return jsonify({"last_updated_at": None, "version": None}), 200
\ No newline at end of file
@@ -1,14 +1,46 @@
 from flask import Blueprint, jsonify, request
-from backend.services.overview_service import get_overview_data
+from backend.config import Config
+from backend.services.overview_service import get_overview_data, get_view_window, get_window_expiry
+from backend.services.version_watcher import get_migration_snapshot
+from backend.services.response_cache import ResponseCache
+from backend.routes.cached_response import cached_json
+from datetime import datetime
 
 overview_bp = Blueprint('overview', __name__)
 
+# Respostas por período; hoje/semana/mes também expiram na virada do período
+CACHE = ResponseCache('overview', Config.OVERVIEW_CACHE_MAX_BYTES)
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
 @overview_bp.route('/overview', methods=['GET'])
 def overview():
     try:
         view_mode = request.args.get('view', 'semana') # semana, mes, hoje
-        data = get_overview_data(view_mode)
-        return jsonify(data)
+
+        # Período livre opcional: ?start=AAAA-MM-DD&end=AAAA-MM-DD
+        try:
+            start_date, end_date = parse_date_arg('start'), parse_date_arg('end')
+        except ValueError:
+            return jsonify({"error": "Datas devem estar no formato AAAA-MM-DD"}), 400
+        if (start_date is None) != (end_date is None) or (start_date and start_date > end_date):
+            return jsonify({"error": "Informe start e end, com start <= end"}), 400
+
+        expires_at = None
+        if start_date is None:
+            start_date, end_date = get_view_window(view_mode)
+            expires_at = get_window_expiry(end_date)
+
+        # Só o "hoje" de um único dia agrupa por hora; o resto agrupa por dia
+        bucket = 'hora' if view_mode == 'hoje' and start_date == end_date else 'dia'
+        key = (bucket, start_date, end_date)
+        version, last_updated_at = get_migration_snapshot()
+
+        return cached_json(CACHE, key, version,
+                           lambda: get_overview_data(view_mode, start_date, end_date), expires_at,
+                           last_updated_at)
     except Exception as e:
         print(f"Erro Overview Route: {e}")
-        return jsonify([]), 500
\ No newline at end of file
+        return jsonify([]), 500
@@ -0,0 +1,275 @@
+import os
+import struct
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from backend.config import Config
+
+# Cabeçalho gravado antes do corpo (arquivos e Redis): validade (timestamp,
+# 0 = sem validade) e versão do banco da resposta
+_HEADER = struct.Struct('<dq')
+
+def _expiry_ts(expires_at):
+    return expires_at.timestamp() if expires_at is not None else 0.0
+
+def _now_ts():
+    return datetime.now().timestamp()
+
+def _pack(version, body, expires_at):
+    return _HEADER.pack(_expiry_ts(expires_at), version) + body
+
+def _unpack(data):
+    """(validade, versão, corpo) de um valor gravado com _pack."""
+    expiry, version = _HEADER.unpack_from(data)
+    return expiry, version, data[_HEADER.size:]
+
+# Os backends guardam uma entrada por chave, com a versão do banco em que foi
+# gerada: get(key) devolve (versão, corpo) e quem consulta decide se a versão
+# serve (entrada de versão anterior = resposta velha, útil para o
+# stale-while-revalidate). Entradas vencidas (expires_at) nunca são devolvidas.
+
+class MemoryBackend:
+    """LRU em memória do próprio processo (cada worker do gunicorn tem o seu)."""
+
+    shared = False
+
+    def __init__(self, name, max_bytes):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        body, _, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, expiry, version = entry
+            if expiry and _now_ts() >= expiry:
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return version, body
+
+    def set(self, key, version, body, expires_at=None):
+        size = len(body)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # Entradas vencidas não voltam a ser consultadas (a chave tem o período)
+            now = _now_ts()
+            for stale in [k for k, (_, expiry, _) in self._entries.items() if expiry and now >= expiry]:
+                self._remove(stale)
+                self.expirations += 1
+
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            self._entries[key] = (body, _expiry_ts(expires_at), version)
+            self._bytes += size
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._entries), "bytes": self._bytes,
+                    "evictions": self.evictions, "expirations": self.expirations}
+
+class FileBackend:
+    """
+    Um arquivo por entrada num diretório comum aos workers (por padrão em
+    /dev/shm, ou seja, memória compartilhada). Os tempos do arquivo guardam
+    os metadados do descarte, lidos só com stat: o mtime é a validade (0 =
+    sem validade) e o atime, o último uso (LRU), renovado a cada acerto.
+
+    Gravar não varre o diretório: cada processo soma o que grava sobre o
+    total da última varredura e só varre ao passar de max_bytes, ou a cada
+    TRIM_INTERVAL_S (gravações dos outros workers e entradas vencidas que
+    ninguém mais consulta).
+    """
+
+    shared = True
+
+    # Intervalo máximo entre varreduras do diretório
+    TRIM_INTERVAL_S = 60
+
+    def __init__(self, name, max_bytes, directory=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.directory = directory or Config.CACHE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._bytes = None  # total estimado; None = ainda não varrido
+        self._last_trim = 0.0
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{self.name}-{digest}.bin")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            # Outro worker já removeu
+            return False
+
+    def _scan(self):
+        """Arquivos deste cache: (caminho, tamanho, último uso, validade)."""
+        prefix = f"{self.name}-"
+        files = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not (item.name.startswith(prefix) and item.name.endswith('.bin')):
+                    continue
+                try:
+                    st = item.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((item.path, st.st_size, st.st_atime, st.st_mtime))
+        return files
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        expiry, version, body = _unpack(data)
+        if expiry and _now_ts() >= expiry:
+            if self._remove(path):
+                self.expirations += 1
+            return None
+
+        try:
+            os.utime(path, (_now_ts(), expiry))
+        except FileNotFoundError:
+            pass
+        return version, body
+
+    def set(self, key, version, body, expires_at=None):
+        path = self._path(key)
+        data = _pack(version, body, expires_at)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.utime(tmp_path, (_now_ts(), _expiry_ts(expires_at)))
+        # Troca atômica: leitores veem o arquivo antigo ou o novo, nunca pela metade
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            now = _now_ts()
+            if self._bytes is not None:
+                self._bytes += len(data)
+            if self._bytes is None or self._bytes > self.max_bytes or now - self._last_trim >= self.TRIM_INTERVAL_S:
+                self._trim(path, now)
+
+    def _trim(self, keep_path, now):
+        """Remove as entradas vencidas e, se passar do limite, as menos usadas."""
+        live = []
+        for path, size, used, expiry in self._scan():
+            if path != keep_path and expiry and now >= expiry:
+                if self._remove(path):
+                    self.expirations += 1
+                continue
+            live.append((used, path, size))
+
+        total = sum(size for _, _, size in live)
+        for used, path, size in sorted(live):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            if self._remove(path):
+                self.evictions += 1
+            total -= size
+
+        self._bytes = total
+        self._last_trim = now
+
+    def stats(self):
+        files = self._scan()
+        return {"backend": "file", "directory": self.directory, "entries": len(files),
+                "bytes": sum(size for _, size, _, _ in files), "evictions": self.evictions,
+                "expirations": self.expirations}
+
+class RedisBackend:
+    """
+    Redis (ou compatível) compartilhado entre workers e instâncias. Entradas
+    sem uso somem pelo TTL; o limite de memória e o LRU ficam a cargo do
+    servidor (maxmemory + allkeys-lru).
+    """
+
+    shared = True
+
+    def __init__(self, name, max_bytes, client=None, url=None, ttl_s=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' (pip install redis)")
+            client = redis.Redis.from_url(url or Config.CACHE_REDIS_URL)
+        self.client = client
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s or Config.CACHE_REDIS_TTL_S
+        self.prefix = f"statusdiario:{name}:"
+        self.expirations = 0
+
+    def _key(self, key):
+        return f"{self.prefix}{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+    def get(self, key):
+        data = self.client.get(self._key(key))
+        if data is None:
+            return None
+        expiry, version, body = _unpack(data)
+        # O PX do SET já remove na validade; a checagem cobre relógios desencontrados
+        if expiry and _now_ts() >= expiry:
+            self.expirations += 1
+            return None
+        return version, body
+
+    def set(self, key, version, body, expires_at=None):
+        if len(body) > self.max_bytes:
+            return
+        ttl_ms = self.ttl_s * 1000
+        if expires_at is not None:
+            ttl_ms = min(ttl_ms, int((_expiry_ts(expires_at) - _now_ts()) * 1000))
+            if ttl_ms <= 0:
+                return
+        self.client.set(self._key(key), _pack(version, body, expires_at), px=ttl_ms)
+
+    def stats(self):
+        entries = sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*", count=500))
+        return {"backend": "redis", "entries": entries, "expirations": self.expirations}
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "file": FileBackend,
+    "redis": RedisBackend,
+}
+
+def create_backend(name, max_bytes, kind=None):
+    """Backend configurado (CACHE_BACKEND); se falhar, cai para a memória do processo."""
+    kind = (kind or Config.CACHE_BACKEND).lower()
+    try:
+        return BACKENDS[kind](name, max_bytes)
+    except Exception as e:
+        print(f"⚠️ Cache '{name}': backend '{kind}' indisponível ({e}). Usando memória do processo.")
+        return MemoryBackend(name, max_bytes)
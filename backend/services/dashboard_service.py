@@ -1,88 +1,123 @@
+import base64
+import json
 from sqlalchemy import text
 from backend.db.connection import get_db_engine
-from datetime import datetime, date
-import re
+from backend.services.formatting import format_minutes
+from datetime import datetime, date, timedelta
 
-def get_last_migration_time():
+def get_migration_state():
+    """(versão, data da última migração) do migration_log, ou None se o banco não responder."""
     engine = get_db_engine()
     if not engine: return None
     try:
         with engine.connect() as conn:
-            return conn.execute(text("SELECT last_updated_at FROM migration_log WHERE id = 1")).scalar()
+            row = conn.execute(text("SELECT version, last_updated_at FROM migration_log WHERE id = 1")).first()
+            return (row[0], row[1]) if row else (None, None)
     except:
         return None
 
-def is_valid_entry(value):
-    if value is None: return False
-    s = str(value).strip()
-    if not s: return False
-    if s in ['-', '--', '.', '?', 'N/A', 'NULL', '0']: return False
-    if re.match(r'^[\W_]+$', s): return False
-    return True
+# Hora a partir da qual o detalhamento de hoje passa a mostrar o fechamento (status_2)
+DETALHAMENTO_CUTOFF_HOUR = 13
 
-def determine_detalhamento(row):
+def get_detalhamento_bucket(now=None):
     """
-    Define qual status mostrar (1 ou 2) com base na data e hora atual.
+    Reduz o "agora" ao que decide o detalhamento: o dia atual e se já passou
+    do corte. Calculado uma vez por requisição e usado também na chave do cache.
     """
-    s1 = row.get('status_1') or ''
-    s2 = row.get('status_2') or ''
-    
-    row_date = row.get('data')
-    
-    # --- CORREÇÃO DO ERRO ---
-    # Se for datetime, pega só a data (.date())
-    if isinstance(row_date, datetime):
-        row_date = row_date.date()
-    # Se for string, tenta converter
-    elif isinstance(row_date, str):
-        try:
-            row_date = datetime.strptime(row_date, '%Y-%m-%d').date()
-        except:
-            pass # Se falhar, vai cair no fallback abaixo
-            
-    today = datetime.now().date()
-    current_hour = datetime.now().hour
-    
-    # Fallback de segurança: se ainda não for date, assume hoje
-    if not isinstance(row_date, date):
-        row_date = today
-
-    # Lógica de Seleção
-    if row_date < today:
-        # Passado: Prioriza o fechamento (2)
-        return s2 if s2 else s1
-        
-    elif row_date > today:
-        # Futuro: Planejamento (1)
-        return s1
-        
-    else:
-        # Hoje: Corte às 13h
-        if current_hour >= 13:
-            return s2 if s2 else s1
-        else:
-            return s1
+    now = now or datetime.now()
+    return now.date(), now.hour >= DETALHAMENTO_CUTOFF_HOUR
 
-def get_dashboard_data(filters=None):
-    engine = get_db_engine()
-    if not engine: return []
+def get_bucket_expiry(bucket):
+    """Próxima troca de bucket: o corte de hoje ou, depois dele, a meia-noite."""
+    today, after_cutoff = bucket
+    if after_cutoff:
+        return datetime.combine(today + timedelta(days=1), datetime.min.time())
+    return datetime.combine(today, datetime.min.time()) + timedelta(hours=DETALHAMENTO_CUTOFF_HOUR)
 
-    filters = filters or {}
-    
-    # Query buscando status_1 e status_2 explicitamente
-    sql = """
-        SELECT 
+def detalhamento_params(bucket):
+    today, after_cutoff = bucket
+    today_start = datetime.combine(today, datetime.min.time())
+    return {"today_start": today_start, "tomorrow_start": today_start + timedelta(days=1),
+            "after_cutoff": after_cutoff}
+
+# Qual status mostrar (1 ou 2): passado prioriza o fechamento (2), futuro mostra
+# o planejamento (1) e hoje (ou sem data) muda do 1 para o 2 no corte
+DETALHAMENTO_SQL = """
+            CASE
+                WHEN data >= :tomorrow_start THEN COALESCE(status_1, '')
+                WHEN data < :today_start OR :after_cutoff THEN COALESCE(NULLIF(status_2, ''), status_1, '')
+                ELSE COALESCE(status_1, '')
+            END AS detalhamento
+"""
+
+TIME_COLUMNS = ['inicio_prog', 'inicio_real', 'fim_prog', 'fim_real', 'tempo_prog', 'tempo_real']
+
+DASHBOARD_COLUMNS = """
             id, gerencia_da_via, trecho_da_via, sub_trecho, atividade, tipo, data, status,
-            inicio_prog, inicio_real, fim_prog, fim_real,
-            tempo_prog, tempo_real,
+            inicio_prog_min, inicio_real_min, fim_prog_min, fim_real_min,
+            tempo_prog_min, tempo_real_min,
             local_prog, local_real,
             producao_prog, producao_real,
             status_1, status_2,
-            ativo
-        FROM atividades
-        WHERE 1=1
-    """
+            ativo, is_valid_gerencia,
+""" + DETALHAMENTO_SQL
+
+def format_dashboard_row(item):
+    """Prepara uma linha do banco para o JSON do dashboard (None se inválida)."""
+    # Validade da gerência já calculada no ETL
+    if not item.pop('is_valid_gerencia', False):
+        return None
+    
+    # Campos auxiliares para filtros do frontend
+    item['trecho'] = item.get('trecho_da_via')
+    item['sub'] = item.get('sub_trecho')
     
+    # Formata Data para string antes de enviar pro JSON
+    if isinstance(item.get('data'), (datetime, date)):
+        item['data'] = item['data'].strftime('%Y-%m-%d')
+    else:
+        item['data'] = str(item['data'])
+    
+    # Formata Horas (o banco guarda minutos desde 00:00)
+    for col in TIME_COLUMNS:
+        item[col] = format_minutes(item.pop(f"{col}_min", None))
+    
+    return item
+
+# Campos repetidos em cada linha com outro nome (usados pelos filtros do frontend)
+COLUMN_ALIASES = {'trecho': 'trecho_da_via', 'sub': 'sub_trecho'}
+
+def to_columnar(rows):
+    """
+    Formato colunar do dashboard (?format=columnar): um array por coluna, sem
+    repetir os nomes dos campos, e colunas de texto com poucos valores
+    distintos codificadas por dicionário ({"values": [...], "codes": [...]}).
+    Os apelidos (trecho, sub) não são enviados; o frontend os recria.
+    """
+    names = [name for name in rows[0] if name not in COLUMN_ALIASES] if rows else []
+    columns = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if all(v is None or isinstance(v, str) for v in values):
+            index = {}
+            codes = [index.setdefault(v, len(index)) for v in values]
+            if len(index) * 2 <= len(values):
+                columns[name] = {"values": list(index), "codes": codes}
+                continue
+        columns[name] = values
+    return {"format": "columnar", "length": len(rows), "columns": columns, "aliases": COLUMN_ALIASES}
+
+# Ordem estável do dashboard (id desempata); também é a chave do cursor da paginação
+DASHBOARD_ORDER = "data DESC, COALESCE(inicio_prog_min, 1440) ASC, id ASC"
+
+# Linhas da resposta sem paginação; além disso ela vem marcada como truncada
+# (X-Truncated + Link para a próxima página, ver load_dashboard nas rotas)
+DASHBOARD_LIMIT = 2000
+
+def build_dashboard_filters(filters=None):
+    """Condições dos filtros do dashboard (" AND ...", vazio sem filtros) e seus parâmetros."""
+    filters = filters or {}
+    sql = ""
     params = {}
 
     if filters.get('dateRange'):
@@ -106,49 +141,249 @@ def get_dashboard_data(filters=None):
             params['status_list'] = tuple(status_list)
 
     if filters.get('tipo'):
-        tipo_term = filters['tipo'].upper()
-        if tipo_term == 'CONTRATO': sql += " AND tipo LIKE '%CONTRATO%'"
-        elif tipo_term == 'OPORTUNIDADE': sql += " AND tipo NOT LIKE '%CONTRATO%'"
+        tipos = {t.lower() for t in filters['tipo']} & {'contrato', 'oportunidade'}
+        # Os dois tipos juntos equivalem a não filtrar
+        if len(tipos) == 1:
+            sql += " AND tipo_class = :tipo_class"
+            params['tipo_class'] = tipos.pop()
+
+    if filters.get('atividade'):
+        sql += " AND atividade IN :atividades"
+        params['atividades'] = tuple(filters['atividade'])
+
+    if filters.get('trecho'):
+        sql += " AND trecho_da_via IN :trechos"
+        params['trechos'] = tuple(filters['trecho'])
+
+    return sql, params
+
+def build_dashboard_query(filters=None, bucket=None):
+    """SELECT do dashboard com os filtros aplicados (sem ORDER BY/LIMIT) e seus parâmetros."""
+    filter_sql, filter_params = build_dashboard_filters(filters)
+
+    # Query buscando status_1 e status_2 explicitamente
+    sql = f"""
+        SELECT {DASHBOARD_COLUMNS}
+        FROM atividades
+        WHERE is_valid_gerencia{filter_sql}
+    """
+
+    params = detalhamento_params(bucket or get_detalhamento_bucket())
+    params.update(filter_params)
+    return sql, params
+
+def get_dashboard_data(filters=None, bucket=None):
+    """
+    Primeiras DASHBOARD_LIMIT atividades do filtro ([] se o banco falhar).
+    Para saber se há mais, use get_dashboard_page (next_cursor).
+    """
+    page = get_dashboard_page(filters, bucket, DASHBOARD_LIMIT)
+    return page["items"] if page else []
+
+# Listas dos seletores de filtro do frontend -> coluna de origem
+OPTION_COLUMNS = {
+    'gerencia': 'gerencia_da_via',
+    'trecho': 'trecho_da_via',
+    'sub': 'sub_trecho',
+    'ativo': 'ativo',
+    'atividade': 'atividade',
+}
+
+def get_dashboard_options(filters=None):
+    """
+    Valores distintos de cada filtro no período (só o dateRange de filters
+    é usado), para montar os seletores sem baixar as atividades do dia.
+    Devolve {} se o banco falhar.
+    """
+    engine = get_db_engine()
+    if not engine: return {}
+
+    date_sql, params = "", {}
+    date_range = (filters or {}).get('dateRange') or {}
+    if date_range.get('start') and date_range.get('end'):
+        date_sql = " AND data >= :start_date AND data <= :end_date"
+        params = {'start_date': date_range['start'], 'end_date': date_range['end']}
+
+    # Uma consulta por coluna (os tipos diferem, ex.: sub_trecho numérico); vazios ficam de fora
+    options = {}
+    try:
+        with engine.connect() as conn:
+            for key, column in OPTION_COLUMNS.items():
+                rows = conn.execute(text(f"""
+                    SELECT DISTINCT {column} FROM atividades
+                    WHERE is_valid_gerencia{date_sql} AND {column} IS NOT NULL
+                """), params).scalars()
+                options[key] = sorted(value for value in rows if value != '')
+    except Exception as e:
+        print(f"🔴 Erro nas opções do Dashboard: {e}")
+        return {}
+    return options
+
+def encode_cursor(row):
+    """Cursor opaco da posição depois da linha (valores de DASHBOARD_ORDER)."""
+    data = row['data'].isoformat() if row['data'] is not None else None
+    inicio = row['inicio_prog_min'] if row['inicio_prog_min'] is not None else 1440
+    raw = json.dumps([data, int(inicio), int(row['id'])], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Parâmetros do cursor; ValueError se for inválido."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data, inicio, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return {
+            "cursor_data": datetime.fromisoformat(data) if data is not None else None,
+            "cursor_inicio": int(inicio),
+            "cursor_id": int(row_id),
+        }
+    except Exception:
+        raise ValueError("cursor inválido")
+
+def keyset_condition(cursor_params):
+    """Linhas depois do cursor em DASHBOARD_ORDER (data nula vem primeiro no DESC do PostgreSQL)."""
+    after_in_day = "(COALESCE(inicio_prog_min, 1440), id) > (:cursor_inicio, :cursor_id)"
+    if cursor_params["cursor_data"] is None:
+        return f" AND (data IS NOT NULL OR {after_in_day})"
+    # data <= :cursor_data é redundante, mas vira condição do índice (o OR não vira)
+    return f" AND data <= :cursor_data AND (data < :cursor_data OR (data = :cursor_data AND {after_in_day}))"
+
+def get_dashboard_page(filters=None, bucket=None, limit=DASHBOARD_LIMIT, cursor=None):
+    """
+    Uma página do dashboard por keyset (data, inicio_prog, id): {"items",
+    "next_cursor"}, com next_cursor None na última página. Cada página é uma
+    consulta indexada, sem OFFSET. None se o banco falhar; ValueError se o
+    cursor for inválido.
+    """
+    engine = get_db_engine()
+    if not engine: return None
 
-    sql += " ORDER BY data DESC, inicio_prog ASC LIMIT 2000"
+    sql, params = build_dashboard_query(filters, bucket)
+    if cursor:
+        cursor_params = decode_cursor(cursor)
+        sql += keyset_condition(cursor_params)
+        params.update(cursor_params)
+    # Uma linha a mais diz se existe próxima página
+    sql += f" ORDER BY {DASHBOARD_ORDER} LIMIT {int(limit) + 1}"
 
     try:
         with engine.connect() as conn:
             conn.execute(text("SET statement_timeout = 60000;"))
-            result = conn.execute(text(sql), params)
-            rows = result.mappings().all()
-            
-            data = []
+            rows = conn.execute(text(sql), params).mappings().all()
+    except Exception as e:
+        print(f"🔴 Erro no DashboardService (página): {e}")
+        return None
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]) if has_more else None
+    items = [item for item in (format_dashboard_row(dict(row)) for row in rows) if item is not None]
+    return {"items": items, "next_cursor": next_cursor}
+
+def iter_dashboard_rows(filters=None, bucket=None, batch_size=1000):
+    """
+    Todas as linhas do filtro, sem limite, lidas por cursor no servidor
+    (yield_per): a memória fica em um lote, qualquer que seja o período.
+    """
+    engine = get_db_engine()
+    if not engine:
+        raise RuntimeError("Engine não conectada")
+
+    sql, params = build_dashboard_query(filters, bucket)
+    sql += f" ORDER BY {DASHBOARD_ORDER}"
+
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(text(sql), params)
+        for row in result.mappings():
+            item = format_dashboard_row(dict(row))
+            if item is not None:
+                yield item
+
+def get_changes_since(since, filters=None, bucket=None):
+    """
+    Retorna o delta entre a versão do cliente (since) e a versão atual:
+    linhas inseridas/alteradas (já formatadas) e ids removidos. Com filtros,
+    só entram as linhas do recorte; as que saíram dele (outra data, outro
+    status...) vêm como removidas. Quando o histórico não cobre a versão
+    pedida, devolve full_resync=True e o cliente deve recarregar /dashboard.
+    """
+    engine = get_db_engine()
+    if not engine: return None
+
+    date_range = (filters or {}).get('dateRange') or {}
+    filter_sql, filter_params = build_dashboard_filters(filters)
+
+    try:
+        with engine.connect() as conn:
+            current = conn.execute(text("SELECT version FROM migration_log WHERE id = 1")).scalar() or 0
+            response = {"version": current, "full_resync": False, "upserted": [], "deleted": []}
+
+            if since is None or since > current:
+                response["full_resync"] = True
+                return response
+            if since == current:
+                return response
+
+            bounds = conn.execute(text("""
+                SELECT MIN(version) AS oldest,
+                       MAX(CASE WHEN op = 'R' THEN version END) AS last_reset
+                FROM atividades_changes
+            """)).mappings().first()
+
+            history_gap = bounds["oldest"] is None or since < bounds["oldest"] - 1
+            reset_after = bounds["last_reset"] is not None and since < bounds["last_reset"]
+            if history_gap or reset_after:
+                response["full_resync"] = True
+                return response
+
+            sql = f"""
+                WITH latest AS (
+                    SELECT DISTINCT ON (id) id, op
+                    FROM atividades_changes
+                    WHERE version > :since AND id IS NOT NULL
+                    ORDER BY id, version DESC
+                )
+                SELECT latest.id AS change_id, latest.op AS change_op,
+                       (atividades.id IS NOT NULL{filter_sql}) AS change_visible,
+                       {DASHBOARD_COLUMNS}
+                FROM latest LEFT JOIN atividades USING (id)
+            """
+            params = {"since": since, **detalhamento_params(bucket or get_detalhamento_bucket()),
+                      **filter_params}
+
+            # Só as linhas que estão no período ou estavam nele (prev_data) na versão do
+            # cliente; sem prev_data (histórico antigo) a remoção/alteração sempre segue
+            if date_range.get('start') and date_range.get('end'):
+                sql += """
+                WHERE (atividades.data >= :start_date AND atividades.data <= :end_date)
+                   OR EXISTS (
+                       SELECT 1 FROM atividades_changes c
+                       WHERE c.id = latest.id AND c.version > :since AND c.op <> 'I'
+                         AND (c.prev_data IS NULL
+                              OR (c.prev_data >= :start_date AND c.prev_data <= :end_date))
+                   )
+                """
+
+            rows = conn.execute(text(sql), params).mappings().all()
+
             for row in rows:
                 item = dict(row)
+                change_id = item.pop('change_id')
+                change_op = item.pop('change_op')
+                change_visible = item.pop('change_visible')
 
-                if not is_valid_entry(item.get('gerencia_da_via')):
+                if change_op == 'D' or not change_visible:
+                    response["deleted"].append(change_id)
                     continue
-                
-                # Campos auxiliares para filtros do frontend
-                item['trecho'] = item.get('trecho_da_via')
-                item['sub'] = item.get('sub_trecho')
-                
-                # --- APLICA A REGRA DE DETALHAMENTO COM A CORREÇÃO ---
-                item['detalhamento'] = determine_detalhamento(item)
-                # -----------------------------------------------------
-
-                # Formata Data para string antes de enviar pro JSON
-                if isinstance(item.get('data'), (datetime, date)):
-                    item['data'] = item['data'].strftime('%Y-%m-%d')
+
+                formatted = format_dashboard_row(item)
+                if formatted is None:
+                    # Linha deixou de ser exibível: para o cliente equivale a remoção
+                    response["deleted"].append(change_id)
                 else:
-                    item['data'] = str(item['data'])
-                
-                # Formata Horas
-                time_cols = ['inicio_prog', 'inicio_real', 'fim_prog', 'fim_real', 'tempo_prog', 'tempo_real']
-                for col in time_cols:
-                    val = item.get(col)
-                    item[col] = str(val)[:5] if val is not None else None
-                
-                data.append(item)
-                
-            return data
+                    response["upserted"].append(formatted)
+
+            return response
 
     except Exception as e:
-        print(f"🔴 Erro no DashboardService: {e}")
-        return []
\ No newline at end of file
+        print(f"🔴 Erro no DashboardService (changes): {e}")
+        return None
@@ -0,0 +1,11 @@
+# Rótulos HH:MM pré-calculados para todos os minutos do dia
+MINUTE_LABELS = tuple(f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60))
+
+def format_minutes(minutes):
+    """Minutos desde 00:00 (ou duração em minutos) -> 'HH:MM'; None se vazio."""
+    if minutes is None:
+        return None
+    minutes = int(minutes)
+    if 0 <= minutes < len(MINUTE_LABELS):
+        return MINUTE_LABELS[minutes]
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
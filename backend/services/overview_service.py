@@ -1,79 +1,77 @@
 from sqlalchemy import text
 from backend.db.connection import get_db_engine
 from datetime import datetime, timedelta
-import re
 
-def parse_time_to_hours(time_str):
-    if not time_str: return 0.0
+STATUS_KEYS = ['concluido', 'parcial', 'andamento', 'nao_iniciado', 'cancelado']
+
+# Agrupamento do gráfico: hora do início real no modo "hoje", dia nos demais
+# (no resumo, hora = -1 marca atividades sem início real)
+BUCKET_EXPRESSIONS = {
+    'hora': "NULLIF(hora, -1)",
+    'dia': "data",
+}
+
+def build_overview_sql(bucket):
+    """
+    Soma o resumo do overview (overview_rollup, atualizado a cada migração)
+    por gerência, tipo (contrato/oportunidade) e ponto do gráfico. O grupo
+    virtual MECANIZAÇÃO já vem no resumo como mais uma gerência.
+    """
+    breakdown = "".join(
+        f"            SUM(CASE WHEN status_key = '{key}' THEN atividades ELSE 0 END) AS {key},\n"
+        for key in STATUS_KEYS
+    )
+    return f"""
+        SELECT
+            gerencia_id, MIN(gerencia_da_via) AS gerencia_da_via, tipo_class,
+            {BUCKET_EXPRESSIONS[bucket]} AS bucket,
+            SUM(prog_h) AS prog_h,
+            SUM(real_h) AS real_h,
+            SUM(atividades) AS prog_int,
+{breakdown}            SUM(points) AS points,
+            SUM(CASE WHEN status_key IN ('concluido', 'parcial', 'cancelado') THEN atividades ELSE 0 END) AS total_valid
+        FROM overview_rollup
+        WHERE data >= :start AND data <= :end
+        GROUP BY gerencia_id, tipo_class, {BUCKET_EXPRESSIONS[bucket]}
+    """
+
+def bucket_label(bucket, view_mode):
+    if view_mode == 'hoje':
+        return f"{bucket:02d}h" if bucket is not None else "N/I"
     try:
-        parts = str(time_str).split(':')
-        h = int(parts[0])
-        m = int(parts[1])
-        return h + (m / 60.0)
+        dt_obj = bucket if isinstance(bucket, datetime) else datetime.strptime(str(bucket)[:10], '%Y-%m-%d')
+        return dt_obj.strftime('%d/%m')
     except:
-        return 0.0
-
-def get_status_key(db_status):
-    if not db_status: return 'nao_iniciado'
-    s = str(db_status).upper().strip()
-    mapping = {
-        'CONCLUIDO': 'concluido',
-        'PARCIAL': 'parcial',
-        'ANDAMENTO': 'andamento',
-        'NAO_INICIADO': 'nao_iniciado',
-        'CANCELADO': 'cancelado'
-    }
-    return mapping.get(s, 'nao_iniciado')
-
-def is_valid_entry(value):
-    if value is None: return False
-    s = str(value).strip()
-    if not s: return False
-    if s in ['-', '--', '.', '?', 'N/A', 'NULL', '0']: return False
-    if re.match(r'^[\W_]+$', s): return False
-    return True
-
-def process_row_for_target(row, target, day_label):
-    tipo_raw = str(row['tipo'] or '').upper()
-    type_key = 'contrato' if 'CONTRATO' in tipo_raw else 'oportunidade'
-    group = target["types"][type_key]
-
-    h_prog = parse_time_to_hours(row['tempo_prog'])
-    h_real = parse_time_to_hours(row['tempo_real'])
-    status_key = get_status_key(row['status'])
-
-    group["kpis"]["prog_h"] += h_prog
-    group["kpis"]["real_h"] += h_real
-    group["kpis"]["prog_int"] += 1
-    
-    if status_key in ['concluido', 'parcial']: 
-        group["kpis"]["real_int"] += 1
+        return str(bucket)
 
-    if status_key in group["kpis"]["breakdown"]:
-        group["kpis"]["breakdown"][status_key] += 1
+def apply_aggregate(target, row, label):
+    """Soma uma linha agregada (gerência × tipo × ponto do gráfico) na estrutura."""
+    group = target["types"][row['tipo_class']]
+    kpis = group["kpis"]
 
-    day_point = next((p for p in group["chartData"] if p["name"] == day_label), None)
+    kpis["prog_h"] += row['prog_h']
+    kpis["real_h"] += row['real_h']
+    kpis["prog_int"] += row['prog_int']
+    kpis["real_int"] += row['concluido'] + row['parcial']
+    for key in STATUS_KEYS:
+        kpis["breakdown"][key] += row[key]
+
+    day_point = group["chart_index"].get(label)
     if not day_point:
-        day_point = {"name": day_label, "prog": 0, "real": 0}
+        day_point = {"name": label, "prog": 0, "real": 0}
         group["chartData"].append(day_point)
-    
-    day_point["prog"] += h_prog
-    day_point["real"] += h_real
-
-    # REMOVIDO: IGNORED_ACTIVITIES
-    # Aderência calcula para todas as atividades que chegam aqui
-    if status_key in ['concluido', 'parcial', 'cancelado']:
-        group["meta_calc"]["total_valid"] += 1
-        if status_key == 'concluido':
-            group["meta_calc"]["points"] += 1.0
-        elif status_key == 'parcial':
-            group["meta_calc"]["points"] += 0.5
-
-def get_overview_data(view_mode='semana'):
-    engine = get_db_engine()
-    if not engine: return []
+        group["chart_index"][label] = day_point
+
+    day_point["prog"] += row['prog_h']
+    day_point["real"] += row['real_h']
 
-    today = datetime.now().date()
+    # Aderência: concluído vale 1 e parcial 0,5, sobre concluídos + parciais + cancelados
+    group["meta_calc"]["points"] += row['points']
+    group["meta_calc"]["total_valid"] += row['total_valid']
+
+def get_view_window(view_mode, today=None):
+    """Período (início, fim) coberto por cada modo de visualização."""
+    today = today or datetime.now().date()
     start_date = today
     end_date = today
 
@@ -88,89 +86,67 @@ def get_overview_data(view_mode='semana'):
         next_month = today.replace(day=28) + timedelta(days=4)
         end_date = next_month - timedelta(days=next_month.day)
 
-    sql = """
-        SELECT 
-            gerencia_da_via, atividade, tipo, data, status,
-            tempo_prog, tempo_real, inicio_real
-        FROM atividades
-        WHERE data >= :start AND data <= :end
-    """
-    
+    return start_date, end_date
+
+def get_window_expiry(end_date):
+    """Momento em que o período deixa de ser o atual (virada do dia, da semana ISO ou do mês)."""
+    return datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+def build_overview(conn, start_date, end_date, view_mode):
+    """Monta a resposta do overview a partir das linhas agregadas no banco."""
+    sql = build_overview_sql('hora' if view_mode == 'hoje' else 'dia')
+    result = conn.execute(text(sql), {
+        "start": start_date.strftime('%Y-%m-%d'),
+        "end": end_date.strftime('%Y-%m-%d')
+    })
+
     agg = {}
-    
-    ATIVIDADES_MECANIZACAO = [
-        "MECANIZACAO", "MECANIZAÇÃO", "SOCADORA", "REGULADORA", "ESMERILHADORA", 
-        "DESGUARNECEDORA", "ESTABILIZADORA", "CAPINA QUÍMICA", "CAPINA QUIMICA"
-    ]
+    for row in result.mappings():
+        ger_id = row['gerencia_id']
 
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text(sql), {
-                "start": start_date.strftime('%Y-%m-%d'),
-                "end": end_date.strftime('%Y-%m-%d')
-            })
-            rows = result.mappings().all()
-
-            for row in rows:
-                if not is_valid_entry(row['gerencia_da_via']):
-                    continue
-
-                gerencia_raw = row['gerencia_da_via'].upper()
-                ger_id = gerencia_raw.replace(' ', '_').lower()
-
-                if ger_id not in agg:
-                    agg[ger_id] = init_gerencia_structure(ger_id, gerencia_raw)
-                
-                if view_mode == 'hoje':
-                    time_val = row.get('inicio_real')
-                    if time_val:
-                        time_str = str(time_val)
-                        hour_prefix = time_str.split(':')[0]
-                        day_label = f"{hour_prefix}h"
-                    else:
-                        day_label = "N/I" 
-                else:
-                    row_date_str = str(row['data'])
-                    try:
-                        dt_obj = row['data'] if isinstance(row['data'], datetime) else datetime.strptime(str(row['data'])[:10], '%Y-%m-%d')
-                        day_label = dt_obj.strftime('%d/%m')
-                    except:
-                        day_label = row_date_str
-
-                process_row_for_target(row, agg[ger_id], day_label)
-
-                ativ_upper = (row['atividade'] or '').upper()
-                is_mecanizacao = any(k in ativ_upper for k in ATIVIDADES_MECANIZACAO)
-                
-                if is_mecanizacao:
-                    mec_id = 'mecanizacao_extra'
-                    if mec_id not in agg:
-                        agg[mec_id] = init_gerencia_structure(mec_id, 'MECANIZAÇÃO')
-                    process_row_for_target(row, agg[mec_id], day_label)
+        if ger_id not in agg:
+            agg[ger_id] = init_gerencia_structure(ger_id, row['gerencia_da_via'].upper())
+
+        apply_aggregate(agg[ger_id], row, bucket_label(row['bucket'], view_mode))
+    
+    final_data = []
+    for gid, data in agg.items():
+        for tkey in ['contrato', 'oportunidade']:
+            tdata = data["types"][tkey]
             
-            final_data = []
-            for gid, data in agg.items():
-                for tkey in ['contrato', 'oportunidade']:
-                    tdata = data["types"][tkey]
-                    
-                    tdata["kpis"]["prog_h"] = round(tdata["kpis"]["prog_h"], 1)
-                    tdata["kpis"]["real_h"] = round(tdata["kpis"]["real_h"], 1)
-                    
-                    total = tdata["meta_calc"]["total_valid"]
-                    points = tdata["meta_calc"]["points"]
-                    if total > 0:
-                        tdata["percentual"] = round((points / total) * 100, 1)
-                    else:
-                        tdata["percentual"] = 0 
-                    
-                    tdata["chartData"].sort(key=lambda x: x["name"])
-                    del tdata["meta_calc"]
-
-                final_data.append(data)
+            tdata["kpis"]["prog_h"] = round(tdata["kpis"]["prog_h"], 1)
+            tdata["kpis"]["real_h"] = round(tdata["kpis"]["real_h"], 1)
             
-            final_data.sort(key=lambda x: (x["id"] == 'mecanizacao_extra', x["title"]))
+            total = tdata["meta_calc"]["total_valid"]
+            points = tdata["meta_calc"]["points"]
+            if total > 0:
+                tdata["percentual"] = round((points / total) * 100, 1)
+            else:
+                tdata["percentual"] = 0 
             
-            return final_data
+            tdata["chartData"].sort(key=lambda x: x["name"])
+            del tdata["meta_calc"]
+            del tdata["chart_index"]
+
+        final_data.append(data)
+    
+    final_data.sort(key=lambda x: (x["id"] == 'mecanizacao_extra', x["title"]))
+    
+    return final_data
+
+def get_overview_data(view_mode='semana', start_date=None, end_date=None):
+    """Overview de um modo (hoje/semana/mes) ou de um período start_date..end_date (por dia)."""
+    engine = get_db_engine()
+    if not engine: return []
+
+    if start_date is None or end_date is None:
+        start_date, end_date = get_view_window(view_mode)
+    elif view_mode == 'hoje' and start_date != end_date:
+        view_mode = 'periodo'
+
+    try:
+        with engine.connect() as conn:
+            return build_overview(conn, start_date, end_date, view_mode)
 
     except Exception as e:
         print(f"🔴 Erro no OverviewService: {e}")
@@ -199,5 +175,7 @@ def init_type_structure():
             }
         },
         "chartData": [],
+        # Pontos do gráfico por rótulo (evita busca linear por linha)
+        "chart_index": {},
         "meta_calc": { "points": 0, "total_valid": 0 }
     }
\ No newline at end of file
@@ -0,0 +1,184 @@
+import threading
+
+from backend.config import Config
+from backend.services.cache_backends import create_backend
+
+# Caches criados no processo, por nome (para o endpoint de estatísticas)
+CACHES = {}
+
+class _Flight:
+    """Cálculo em andamento de uma chave: os demais pedidos esperam por ele."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.body = None
+        self.error = None
+
+class ResponseCache:
+    """
+    Cache de respostas já serializadas, com armazenamento plugável
+    (CACHE_BACKEND: memória do processo, arquivos compartilhados entre os
+    workers ou Redis). Cada entrada guarda a versão do banco (migration_log)
+    em que foi gerada e só é um acerto na mesma versão. Uma entrada pode
+    ainda ter validade própria (expires_at), para respostas que dependem da
+    data atual.
+
+    get_or_compute evita a avalanche de consultas depois de uma migração:
+    pedidos iguais e simultâneos esperam um único cálculo (single-flight) e,
+    com stale-while-revalidate, a resposta da versão anterior continua sendo
+    servida enquanto um único cálculo em segundo plano gera a nova.
+    """
+
+    def __init__(self, name, max_bytes, backend=None, stale_while_revalidate=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.backend = backend or create_backend(name, max_bytes)
+        if stale_while_revalidate is None:
+            stale_while_revalidate = Config.CACHE_STALE_WHILE_REVALIDATE
+        self.stale_while_revalidate = stale_while_revalidate
+        self.version = None
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        CACHES[name] = self
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _lookup(self, key):
+        try:
+            return self.backend.get(repr(key))
+        except Exception as e:
+            print(f"⚠️ Cache '{self.name}': falha na leitura ({e})")
+            return None
+
+    def get(self, key, version):
+        """Corpo em cache para a chave na versão atual, ou None."""
+        if version is None:
+            return None
+        self.version = version
+        entry = self._lookup(key)
+        if entry is not None and entry[0] == version:
+            self._count("hits")
+            return entry[1]
+        self._count("misses")
+        return None
+
+    def put(self, key, version, body, expires_at=None):
+        """Guarda o corpo (bytes); o backend descarta os menos usados se passar do limite."""
+        if version is None or len(body) > self.max_bytes:
+            return
+        try:
+            self.backend.set(repr(key), version, body, expires_at)
+        except Exception as e:
+            print(f"⚠️ Cache '{self.name}': falha na gravação ({e})")
+
+    def get_or_compute(self, key, version, compute, expires_at=None):
+        """
+        (corpo, velho) da chave. compute() -> (corpo, cachear) só roda quando
+        não há entrada válida, e no máximo uma vez por chave ao mesmo tempo
+        neste processo. velho=True quando o corpo é de uma versão anterior
+        (stale-while-revalidate).
+        """
+        if version is None:
+            return compute()[0], False
+        self.version = version
+
+        entry = self._lookup(key)
+        if entry is not None and entry[0] == version:
+            self._count("hits")
+            return entry[1], False
+
+        if entry is not None and entry[0] < version and self.stale_while_revalidate:
+            self._count("stale_hits")
+            self._refresh_in_background(key, version, compute, expires_at)
+            return entry[1], True
+
+        self._count("misses")
+        return self._single_flight(key, version, compute, expires_at), False
+
+    def _join_flight(self, key, version):
+        """(voo, é_o_líder): o primeiro pedido da chave calcula, os outros esperam."""
+        flight_key = (repr(key), version)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[flight_key] = _Flight()
+            return flight, True
+
+    def _fly(self, flight, key, version, compute, expires_at):
+        try:
+            body, cacheable = compute()
+            if cacheable:
+                self.put(key, version, body, expires_at)
+            flight.body = body
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop((repr(key), version), None)
+            flight.done.set()
+
+    def _single_flight(self, key, version, compute, expires_at):
+        flight, leader = self._join_flight(key, version)
+        if leader:
+            self._fly(flight, key, version, compute, expires_at)
+        else:
+            self._count("coalesced")
+            if not flight.done.wait(Config.CACHE_FLIGHT_TIMEOUT_S):
+                # Cálculo travado: não segura o pedido indefinidamente
+                return compute()[0]
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.body
+
+    def _refresh_in_background(self, key, version, compute, expires_at):
+        flight, leader = self._join_flight(key, version)
+        if not leader:
+            return
+        self._count("refreshes")
+        threading.Thread(target=self._fly, args=(flight, key, version, compute, expires_at),
+                         name=f"cache-refresh-{self.name}", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale_hits
+            local = {
+                "version": self.version,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "in_flight": len(self._flights),
+            }
+        try:
+            return {**local, **self.backend.stats()}
+        except Exception as e:
+            return {**local, "error": str(e)}
+
+def filters_cache_key(filters):
+    """Chave normalizada dos filtros do dashboard (ordem não importa; caixa só em gerência, status e tipo)."""
+    filters = filters or {}
+    date_range = filters.get('dateRange') or {}
+    return (
+        date_range.get('start'),
+        date_range.get('end'),
+        tuple(sorted({g.upper() for g in filters.get('gerencia') or []})),
+        tuple(sorted({s.upper() for s in filters.get('status') or []})),
+        tuple(sorted({t.lower() for t in filters.get('tipo') or []})),
+        tuple(sorted(set(filters.get('atividade') or []))),
+        tuple(sorted(set(filters.get('trecho') or []))),
+    )
+
+def get_all_stats():
+    return {name: cache.stats() for name, cache in CACHES.items()}
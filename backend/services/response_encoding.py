@@ -0,0 +1,84 @@
+import gzip
+import json
+import struct
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+from werkzeug.http import http_date
+
+from backend.config import Config
+
+# orjson e brotli são opcionais: sem eles, json da biblioteca padrão e só gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ordem de preferência do servidor quando o cliente aceita várias com o mesmo peso
+ENCODINGS = ('br', 'gzip', 'identity')
+
+# Entra na chave do cache: se o formato empacotado mudar, entradas antigas
+# (arquivos/Redis que sobrevivem a um deploy) deixam de ser lidas
+CACHE_FORMAT = 'variants-2'
+
+# Tamanhos das variantes (identity, gzip, br) e dos cabeçalhos extras (JSON)
+# gravados antes dos corpos; 0 = ausente
+_LENGTHS = struct.Struct('<IIII')
+
+def _default(obj):
+    # Mesmas conversões do JSON do Flask
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+def encode_json(data):
+    """JSON compacto e com chaves ordenadas (como o Flask), em bytes UTF-8."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+def build_variants(body, headers=None):
+    """
+    Empacota o corpo com as versões gzip e brotli, geradas uma vez por versão
+    do banco (quando a resposta entra no cache). Corpos pequenos não são
+    comprimidos. headers (ex.: X-Truncated/Link) vão junto e voltam em
+    packed_headers.
+    """
+    gz = br = b''
+    if len(body) >= Config.RESPONSE_COMPRESS_MIN_BYTES:
+        gz = gzip.compress(body, compresslevel=Config.RESPONSE_GZIP_LEVEL, mtime=0)
+        if brotli is not None:
+            br = brotli.compress(body, quality=Config.RESPONSE_BROTLI_QUALITY)
+    extra = json.dumps(headers).encode('utf-8') if headers else b''
+    return _LENGTHS.pack(len(body), len(gz), len(br), len(extra)) + body + gz + br + extra
+
+def _spans(packed):
+    offset = _LENGTHS.size
+    spans = {}
+    for part, length in zip(('identity', 'gzip', 'br', 'headers'), _LENGTHS.unpack_from(packed)):
+        spans[part] = (offset, offset + length)
+        offset += length
+    return spans
+
+def packed_headers(packed):
+    """Cabeçalhos extras guardados com o corpo ({} se não houver)."""
+    start, end = _spans(packed)['headers']
+    return json.loads(packed[start:end]) if end > start else {}
+
+def pick_variant(packed, accept_encodings):
+    """(codificação, corpo) mais adequado ao Accept-Encoding do pedido."""
+    spans = _spans(packed)
+
+    available = [e for e in ENCODINGS if e == 'identity' or spans[e][1] > spans[e][0]]
+    encoding = accept_encodings.best_match(available) or 'identity'
+    start, end = spans[encoding]
+    return encoding, packed[start:end]
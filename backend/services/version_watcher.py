@@ -0,0 +1,113 @@
+import os
+import select
+import threading
+import time
+
+from backend.config import Config
+from backend.db.connection import get_db_engine
+from backend.services.dashboard_service import get_migration_state
+
+class VersionWatcher:
+    """
+    Versão do banco (migration_log) mantida em memória para os pedidos, sem
+    ida ao banco por requisição. Uma thread do processo fica em LISTEN no
+    canal avisado pelo run_migration (pg_notify no commit da migração) e
+    relê o migration_log a cada aviso. Sem LISTEN (outro banco, conexão
+    caída) ela volta a consultar a cada VERSION_POLL_INTERVAL_S; com LISTEN,
+    essa consulta periódica continua como rede de segurança.
+    """
+
+    def __init__(self, channel, poll_interval_s):
+        self.channel = channel
+        self.poll_interval_s = poll_interval_s
+        self.state = None  # (versão, last_updated_at)
+        self.mode = None   # listen | poll
+        self.notifications = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def get_state(self):
+        self._ensure_started()
+        state = self.state
+        if state is None:
+            # Antes da primeira leitura (ou com o banco fora): consulta direta
+            state = self.refresh()
+        return state or (None, None)
+
+    def refresh(self):
+        state = get_migration_state()
+        if state is not None:
+            if self.state is not None and state[0] != self.state[0]:
+                print(f"🔔 Versão do banco: {self.state[0]} -> {state[0]}")
+            self.state = state
+            self.refreshes += 1
+        return state
+
+    def _ensure_started(self):
+        # Cada worker do gunicorn (fork) precisa da sua própria thread
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="version-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"⚠️ VersionWatcher: LISTEN interrompido ({e}). Consultando a cada {self.poll_interval_s}s.")
+            self.mode = 'poll'
+            time.sleep(self.poll_interval_s)
+            self.refresh()
+
+    def _listen(self):
+        """Fica em LISTEN até a conexão cair. Retorna na hora se o banco não for PostgreSQL."""
+        engine = get_db_engine()
+        if not engine or engine.dialect.name != 'postgresql':
+            return
+
+        # Conexão dedicada: sai do pool para o LISTEN não vazar para outros usos
+        raw = engine.raw_connection()
+        conn = raw.driver_connection
+        raw.detach()
+        try:
+            conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}";')
+            self.mode = 'listen'
+            # Cobre uma migração entre a primeira leitura e o LISTEN
+            self.refresh()
+
+            while True:
+                readable, _, _ = select.select([conn], [], [], self.poll_interval_s)
+                if not readable:
+                    self.refresh()
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    self.notifications += len(conn.notifies)
+                    conn.notifies.clear()
+                    self.refresh()
+        finally:
+            conn.close()
+
+    def stats(self):
+        version, last_updated_at = self.state or (None, None)
+        return {"mode": self.mode, "channel": self.channel, "poll_interval_s": self.poll_interval_s,
+                "version": version, "last_updated_at": last_updated_at,
+                "notifications": self.notifications, "refreshes": self.refreshes}
+
+WATCHER = VersionWatcher(Config.VERSION_NOTIFY_CHANNEL, Config.VERSION_POLL_INTERVAL_S)
+
+def get_migration_snapshot():
+    """(versão, last_updated_at) atuais. Com VERSION_WATCHER_ENABLED=false, consulta o banco a cada chamada."""
+    if not Config.VERSION_WATCHER_ENABLED:
+        return get_migration_state() or (None, None)
+    return WATCHER.get_state()
@@ -1,5 +1,6 @@
 import { useState, useEffect, useRef, useCallback } from 'react';
 import { fetchAPI } from '../services/api'; 
+import { getDashboardData } from '../services/dashboardService';
 
 export const useDashboard = (selectedDate) => {
   const [data, setData] = useState([]);
@@ -25,7 +26,7 @@ export const useDashboard = (selectedDate) => {
       const dateQuery = selectedDate || new Date().toISOString().split('T')[0];
       
       const [dashboardRes, updateRes] = await Promise.all([
-        fetchAPI(`/dashboard?data=${dateQuery}`, {}, { signal }).catch(err => {
+        getDashboardData(dateQuery, { signal }).catch(err => {
             if (err.name !== 'AbortError') throw err; 
         }),
         fetchAPI(`/last-update`, {}, { signal }).catch(err => {
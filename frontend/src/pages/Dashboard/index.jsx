@@ -1,24 +1,37 @@
-import React, { useState, useEffect, useCallback, useMemo } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import DashboardContent from '../../components/Dashboard/DashboardContent';
 import FiltersSection from '../../components/Dashboard/FiltersSection';
-import { getDashboardData } from '../../services/dashboardService';
+import {
+  getDashboardData, getDashboardOptions, getDataVersion, getDashboardChanges, mergeDashboardChanges,
+  SERVER_FILTER_KEYS
+} from '../../services/dashboardService';
 import { toast } from 'react-hot-toast';
 
+// Intervalo da busca do delta (/changes); sem migração nova a resposta é mínima
+const CHANGES_POLL_MS = 2 * 60 * 1000;
+
+// Filtros da URL (?gerencia=...&status=..., enviados pelo Bot ou em links)
+const getUrlFilters = () => {
+  const searchParams = new URLSearchParams(window.location.search);
+  return Object.fromEntries(SERVER_FILTER_KEYS.map(key => [key, searchParams.getAll(key)]));
+};
+
 const DashboardPage = () => {
-  // CORREÇÃO: Inicialização lazy para capturar a data da URL (enviada pelo Bot)
+  // CORREÇÃO: Inicialização lazy para capturar a data e os filtros da URL (enviados pelo Bot)
   const [filters, setFilters] = useState(() => {
     const searchParams = new URLSearchParams(window.location.search);
     const urlDate = searchParams.get('data');
+    const urlFilters = getUrlFilters();
     
     return {
       data: urlDate || new Date().toISOString().split('T')[0], 
-      gerencia: [],
-      trecho: [],
+      gerencia: urlFilters.gerencia,
+      trecho: urlFilters.trecho,
       sub: [],
       ativo: [],
-      atividade: [],
-      tipo: [],
-      status: []
+      atividade: urlFilters.atividade,
+      tipo: urlFilters.tipo.map(t => t.toUpperCase()),
+      status: urlFilters.status.map(s => s.toUpperCase())
     };
   });
 
@@ -29,35 +42,82 @@ const DashboardPage = () => {
 
   const [data, setData] = useState([]);
   const [loading, setLoading] = useState(false);
+  // Versão da migração refletida em data (null enquanto carrega)
+  const versionRef = useRef(null);
+
+  // Gerência, status, tipo, atividade e trecho são filtrados pela API: só as linhas do recorte vêm
+  const serverFilters = useMemo(() => ({
+    gerencia: filters.gerencia,
+    status: filters.status,
+    tipo: filters.tipo,
+    atividade: filters.atividade,
+    trecho: filters.trecho
+  }), [filters.gerencia, filters.status, filters.tipo, filters.atividade, filters.trecho]);
 
-  const loadData = useCallback(async () => {
+  const loadData = useCallback(async (signal) => {
     setLoading(true);
+    versionRef.current = null;
     try {
-      const result = await getDashboardData(filters.data); 
+      // Versão antes dos dados: se uma migração cair no meio, o próximo delta a reaplica
+      const version = await getDataVersion({ signal }).catch(error => {
+        if (error.name === 'AbortError') throw error;
+        return null;
+      });
+      const result = await getDashboardData(filters.data, { signal }, serverFilters);
       setData(result || []);
+      versionRef.current = version;
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error("Erro dashboard:", error);
       toast.error("Erro ao atualizar dados");
     } finally {
-      setLoading(false);
+      if (!signal.aborted) setLoading(false);
     }
-  }, [filters.data]); 
+  }, [filters.data, serverFilters]);
 
+  // Troca rápida de filtros: cancela o pedido anterior para uma resposta velha não sobrescrever a nova
   useEffect(() => {
-    loadData();
+    const controller = new AbortController();
+    loadData(controller.signal);
+    return () => controller.abort();
   }, [loadData]);
 
-  // Extração dinâmica de opções com REGRAS DE FILTRO
+  // Após cada migração só baixa o que mudou (I/U/D por id); sem histórico suficiente, recarrega tudo
   useEffect(() => {
-    if (data && data.length > 0) {
-        const extractUnique = (key) => {
-            return [...new Set(data.map(item => item[key]).filter(Boolean))].sort();
-        };
+    const controller = new AbortController();
+
+    const syncChanges = async () => {
+      const since = versionRef.current;
+      if (since === null) return;
+      try {
+        const changes = await getDashboardChanges(since, filters.data, { signal: controller.signal }, serverFilters);
+        if (changes.full_resync) {
+          loadData(controller.signal);
+        } else if (changes.version !== since && versionRef.current === since) {
+          setData(prev => mergeDashboardChanges(prev, changes));
+          versionRef.current = changes.version;
+        }
+      } catch (error) {
+        if (error.name !== 'AbortError') console.warn("Falha ao sincronizar alterações:", error);
+      }
+    };
+
+    const interval = setInterval(syncChanges, CHANGES_POLL_MS);
+    return () => {
+      clearInterval(interval);
+      controller.abort();
+    };
+  }, [filters.data, serverFilters, loadData]);
+
+  // Opções dos seletores do dia, com REGRAS DE FILTRO (endpoint leve, independe dos filtros escolhidos)
+  useEffect(() => {
+    const controller = new AbortController();
+    getDashboardOptions(filters.data, { signal: controller.signal })
+      .then(result => {
+        if (!result || !result.gerencia) return;
 
-        const todasGerencias = extractUnique('gerencia_da_via');
-        
         // FILTRO: Remove Mecanização e Outros da lista de opções de Gerência
-        const gerenciasFiltradas = todasGerencias.filter(g => {
+        const gerenciasFiltradas = result.gerencia.filter(g => {
             const upper = g.toUpperCase();
             return !upper.includes('MECANIZA') && !upper.includes('OUTROS');
         });
@@ -65,13 +125,17 @@ const DashboardPage = () => {
         setOptions(prev => ({
             ...prev,
             gerencia: gerenciasFiltradas,
-            ativo: extractUnique('ativo'),
-            atividade: extractUnique('atividade'),
-            trecho: extractUnique('trecho'),
-            sub: extractUnique('sub'),
+            ativo: result.ativo,
+            atividade: result.atividade,
+            trecho: result.trecho,
+            sub: result.sub,
         }));
-    }
-  }, [data]);
+      })
+      .catch(error => {
+        if (error.name !== 'AbortError') console.warn("Falha ao carregar opções de filtro:", error);
+      });
+    return () => controller.abort();
+  }, [filters.data]);
 
   const handleClearFilters = () => {
     setFilters(prev => ({
@@ -80,27 +144,15 @@ const DashboardPage = () => {
     }));
   };
 
+  // Só sub e ativo (sem filtro na API) ainda são aplicados aqui
   const filteredData = useMemo(() => {
       if (!data) return [];
       return data.filter(row => {
-          if (filters.gerencia.length > 0 && !filters.gerencia.includes(row.gerencia_da_via)) return false;
-          if (filters.trecho.length > 0 && !filters.trecho.includes(row.trecho)) return false;
           if (filters.sub.length > 0 && !filters.sub.includes(row.sub)) return false;
-          
           if (filters.ativo.length > 0 && !filters.ativo.includes(row.ativo)) return false;
-          if (filters.atividade.length > 0 && !filters.atividade.includes(row.atividade)) return false;
-          if (filters.status.length > 0) {
-             const s = (row.status || '').toUpperCase();
-             if (!filters.status.includes(s)) return false;
-          }
-          if (filters.tipo.length > 0) {
-             const t = (row.tipo || '').toUpperCase();
-             const match = filters.tipo.some(ft => t.includes(ft));
-             if (!match) return false;
-          }
           return true;
       });
-  }, [data, filters]);
+  }, [data, filters.sub, filters.ativo]);
 
   return (
     <div className="w-full min-h-screen bg-slate-50 dark:bg-slate-900/50 flex flex-col p-2 gap-3">
@@ -4,11 +4,14 @@ const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 export const fetchAPI = async (endpoint, params = {}, options = {}) => {
   const url = new URL(`${API_URL}${endpoint}`);
   
-  // Limpa params undefined/null e adiciona à URL
+  // Limpa params undefined/null e adiciona à URL (arrays viram o parâmetro repetido)
   Object.entries(params).forEach(([key, value]) => {
-    if (value !== undefined && value !== null && value !== '') {
-      url.searchParams.append(key, value);
-    }
+    const values = Array.isArray(value) ? value : [value];
+    values.forEach(item => {
+      if (item !== undefined && item !== null && item !== '') {
+        url.searchParams.append(key, item);
+      }
+    });
   });
 
   const response = await fetch(url.toString(), {
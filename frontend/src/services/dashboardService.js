@@ -1,5 +1,69 @@
 import { fetchAPI } from './api';
 
-export const getDashboardData = async (date) => {
-  return await fetchAPI('/dashboard', { data: date });
-};
\ No newline at end of file
+// Formato colunar (?format=columnar): um array por coluna; colunas de texto
+// repetitivas vêm como { values, codes }. Remonta a lista de linhas de sempre.
+export const decodeColumnar = (payload) => {
+  if (!payload || payload.format !== 'columnar') return payload;
+
+  const columns = Object.entries(payload.columns).map(([name, column]) =>
+    Array.isArray(column) ? [name, column] : [name, column.codes.map(code => column.values[code])]
+  );
+  const aliases = Object.entries(payload.aliases || {});
+
+  const rows = new Array(payload.length);
+  for (let i = 0; i < payload.length; i++) {
+    const row = {};
+    for (const [name, values] of columns) row[name] = values[i];
+    for (const [alias, source] of aliases) row[alias] = row[source];
+    rows[i] = row;
+  }
+  return rows;
+};
+
+// Filtros aplicados pela API (listas: gerencia, status, tipo, atividade, trecho)
+export const SERVER_FILTER_KEYS = ['gerencia', 'status', 'tipo', 'atividade', 'trecho'];
+
+export const getDashboardData = async (date, options = {}, filters = {}) => {
+  const params = { data: date, format: 'columnar' };
+  SERVER_FILTER_KEYS.forEach(key => { params[key] = filters[key]; });
+  return decodeColumnar(await fetchAPI('/dashboard', params, options));
+};
+
+// Listas dos seletores de filtro do dia (gerencia, trecho, sub, ativo, atividade),
+// sem baixar as atividades
+export const getDashboardOptions = async (date, options = {}) => {
+  return await fetchAPI('/dashboard/options', { data: date }, options);
+};
+
+// Versão da migração em vigor (a base do delta de /changes)
+export const getDataVersion = async (options = {}) => {
+  const result = await fetchAPI('/last-update', {}, options);
+  return result?.version ?? null;
+};
+
+// Delta desde a versão que o cliente já possui, com os mesmos filtros do /dashboard.
+// Se vier full_resync = true, recarregar com getDashboardData.
+export const getDashboardChanges = async (since, date, options = {}, filters = {}) => {
+  const params = { since, data: date };
+  SERVER_FILTER_KEYS.forEach(key => { params[key] = filters[key]; });
+  return await fetchAPI('/changes', params, options);
+};
+
+// Aplica o delta nas linhas atuais: remove os ids apagados, troca as linhas
+// alteradas no lugar e acrescenta as novas (a tabela ordena por conta própria)
+export const mergeDashboardChanges = (rows, changes) => {
+  const deleted = new Set(changes.deleted);
+  const upserted = new Map(changes.upserted.map(row => [row.id, row]));
+
+  const merged = [];
+  rows.forEach(row => {
+    if (deleted.has(row.id)) return;
+    if (upserted.has(row.id)) {
+      merged.push(upserted.get(row.id));
+      upserted.delete(row.id);
+    } else {
+      merged.push(row);
+    }
+  });
+  return merged.concat([...upserted.values()]);
+};